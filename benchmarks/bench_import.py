@@ -0,0 +1,108 @@
+"""
+Import-time benchmark for the DAG file and pipeline modules.
+
+Each module is imported in a fresh interpreter so nothing is cached between
+measurements. For every module the benchmark reports the best-of-N wall time,
+the cumulative time from `python -X importtime`, and which heavy dependencies
+ended up in sys.modules. The DAG module is skipped when Airflow isn't installed.
+
+Usage:
+    python -m benchmarks.bench_import --repeat 5 --output import_times.json
+"""
+from typing import Any, Dict, List, Optional
+import argparse
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC_DIR = os.path.join(REPO_ROOT, 'src')
+DAGS_DIR = os.path.join(REPO_ROOT, 'dags')
+
+HEAVY_MODULES = ['requests', 'numpy', 'dotenv', 'pyarrow', 'transformers.address_transformer']
+
+DEFAULT_MODULES = [
+    'etl_dag',
+    'integrations.geocode_util',
+    'transformers.address_transformer',
+    'utils.reader',
+    'utils.writer',
+]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'loaded': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+def _run(args: List[str]) -> subprocess.CompletedProcess:
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([SRC_DIR, DAGS_DIR]))
+    return subprocess.run([sys.executable] + args, cwd=REPO_ROOT, env=env, capture_output=True, text=True)
+
+def _cumulative_importtime_us(stderr: str, module: str) -> Optional[int]:
+    """Extracts the cumulative microseconds for module from -X importtime output."""
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = [part.strip() for part in line[len('import time:'):].split('|')]
+        if len(parts) == 3 and parts[2].strip() == module:
+            return int(parts[1])
+    return None
+
+def measure_module(module: str, repeat: int = 5) -> Dict[str, Any]:
+    """
+    Measures how long importing module takes in a fresh interpreter.
+
+    Args:
+        module (str): Dotted module name, importable with src/ and dags/ on the path
+        repeat (int): Number of fresh-interpreter runs; the fastest is reported
+
+    Returns:
+        Dict[str, Any]: Best wall time, -X importtime cumulative time and loaded heavy modules
+    """
+    timings = []
+    loaded: List[str] = []
+    for _ in range(repeat):
+        completed = _run(['-c', PROBE.format(module=module, heavy=HEAVY_MODULES)])
+        if completed.returncode != 0:
+            return {'module': module, 'error': completed.stderr.strip().splitlines()[-1]}
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        timings.append(result['seconds'])
+        loaded = result['loaded']
+
+    importtime = _run(['-X', 'importtime', '-c', f'import {module}'])
+    cumulative_us = _cumulative_importtime_us(importtime.stderr, module)
+    return {
+        'module': module,
+        'best_ms': round(min(timings) * 1000, 3),
+        'importtime_cumulative_ms': round(cumulative_us / 1000, 3) if cumulative_us is not None else None,
+        'heavy_modules_loaded': [name for name in loaded if name != module]
+    }
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modules', nargs='+', default=DEFAULT_MODULES)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help='Write results to this JSON file instead of stdout')
+    args = parser.parse_args(argv)
+
+    results = []
+    for module in args.modules:
+        if module == 'etl_dag' and importlib.util.find_spec('airflow') is None:
+            results.append({'module': module, 'skipped': 'airflow is not installed'})
+            continue
+        results.append(measure_module(module, args.repeat))
+
+    payload = json.dumps({'python': sys.version.split()[0], 'results': results}, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(payload)
+    else:
+        print(payload)
+
+if __name__ == '__main__':
+    main()
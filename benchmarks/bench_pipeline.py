@@ -0,0 +1,288 @@
+"""
+End-to-end throughput benchmark for read_json -> AddressTransformer.transform -> write_json.
+
+Starts local LocationIQ stand-ins, generates synthetic input files of the
+requested sizes and runs each size in a fresh subprocess so peak RSS is
+measured per run. Results are printed (or written with --output) as JSON.
+
+The geocoding setup under test is passed to the subprocess through the
+pipeline's own settings: --max-concurrency sets GEOCODE_MAX_CONCURRENCY,
+--cache-path sets GEOCODE_CACHE_PATH and --endpoints starts several stubs
+listed in LOCATIONIQ_ENDPOINTS (with --hedge setting LOCATIONIQ_HEDGE).
+
+Usage:
+    python -m benchmarks.bench_pipeline --sizes 1000 10000 --latency-ms 5 --output bench.json
+    python -m benchmarks.bench_pipeline --sizes 10000 --unique-ratio 0.2 --max-concurrency 16 \
+        --cache-path :memory: --endpoints 2 --endpoint-latency-ms 5 50 --hedge
+"""
+from collections import Counter
+from contextlib import ExitStack
+from typing import Any, Dict, List, Optional
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(REPO_ROOT, 'src'))
+
+from benchmarks.locationiq_stub import LocationIQStub
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+
+def percentile(sorted_values: List[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of the current process in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in KiB elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def generate_dataset(path: str, size: int, unique_addresses: int) -> None:
+    """
+    Writes a synthetic input file in the input_sample.json format.
+
+    Args:
+        path (str): Output file path
+        size (int): Number of records
+        unique_addresses (int): Number of distinct project addresses to cycle through
+    """
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write('[')
+        for i in range(size):
+            if i:
+                file.write(',')
+            json.dump({
+                'publication_media': 'Neue Zürcher Zeitung',
+                'project_title': f'Benchmark project {i}',
+                'date_scraped': '15/03/2024 14:23:45',
+                'project_address': f'Bahnhofstrasse {i % max(1, unique_addresses)}'
+            }, file, ensure_ascii=False)
+        file.write(']')
+
+def run_single(size: int, unique_addresses: int, workdir: str) -> Dict[str, Any]:
+    """
+    Runs the pipeline once in the current process against LOCATIONIQ_API_URL
+    or LOCATIONIQ_ENDPOINTS.
+
+    Uses the geocode cache when GEOCODE_CACHE_PATH is set and adaptive
+    concurrency when GEOCODE_MAX_CONCURRENCY is set, as the DAG does.
+
+    Args:
+        size (int): Number of input records
+        unique_addresses (int): Number of distinct addresses in the input
+        workdir (str): Directory for input and output files
+
+    Returns:
+        Dict[str, Any]: Throughput, latency and memory measurements
+    """
+    from integrations.adaptive_concurrency import AdaptiveConcurrencyLimiter
+    from integrations.geocode_cache import GeocodeCache
+    from utils.metrics import PipelineMetrics
+    from utils.reader import read_json
+    from utils.writer import write_json
+    from transformers.address_transformer import AddressTransformer
+
+    input_path = os.path.join(workdir, f'input_{size}.json')
+    output_path = os.path.join(workdir, f'output_{size}.json')
+    generate_dataset(input_path, size, unique_addresses)
+
+    metrics = PipelineMetrics()
+    cache = GeocodeCache.from_env() if os.getenv('GEOCODE_CACHE_PATH') else None
+    concurrency = AdaptiveConcurrencyLimiter.from_env(metrics)
+    transformer = AddressTransformer(metrics=metrics, cache=cache, concurrency=concurrency)
+    geocoder = transformer.geocoder
+    latencies: List[float] = []
+
+    def timed_geocoder(address):
+        start = time.perf_counter()
+        try:
+            return geocoder(address)
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+    transformer.geocoder = timed_geocoder
+    statuses: Counter = Counter()
+
+    def counted(records):
+        for record in records:
+            statuses[record['geocoding_status'] if isinstance(record, dict) else record.status] += 1
+            yield record
+
+    start = time.perf_counter()
+    try:
+        write_json(counted(transformer.transform(read_json(input_path))), output_path)
+    finally:
+        if cache is not None:
+            cache.close()
+    elapsed = time.perf_counter() - start
+    counters = metrics.summary()['counters']
+
+    latencies.sort()
+    return {
+        'records': size,
+        'unique_addresses': unique_addresses,
+        'seconds': round(elapsed, 4),
+        'records_per_sec': round(size / elapsed, 2) if elapsed else None,
+        'geocode_calls': len(latencies),
+        'latency_ms': {
+            'p50': round(percentile(latencies, 0.50) * 1000, 3) if latencies else None,
+            'p99': round(percentile(latencies, 0.99) * 1000, 3) if latencies else None,
+            'max': round(latencies[-1] * 1000, 3) if latencies else None
+        },
+        'statuses': dict(statuses),
+        'max_concurrency': concurrency.max_limit if concurrency is not None else 1,
+        'cache_hits': sum(value for name, value in counters.items() if name.startswith('geocode_cache_hits_total')),
+        'coalesced': counters.get('geocode_coalesced_total', 0),
+        'retries': sum(value for name, value in counters.items() if name.startswith('geocode_retries_total')),
+        'peak_rss_mb': round(peak_rss_mb(), 2),
+        'output_bytes': os.path.getsize(output_path)
+    }
+
+def pipeline_env(stub_urls: List[str], max_concurrency: int = 1, cache_path: Optional[str] = None,
+                 hedge: bool = False) -> Dict[str, str]:
+    """
+    Builds the environment of a single-run subprocess.
+
+    Pipeline settings inherited from the caller's environment are replaced, so
+    each run measures exactly the given setup.
+
+    Args:
+        stub_urls (List[str]): Search URLs of the running stubs
+        max_concurrency (int): GEOCODE_MAX_CONCURRENCY; 1 geocodes sequentially
+        cache_path (Optional[str]): GEOCODE_CACHE_PATH, e.g. ':memory:' for a cache private to
+            the run; None disables the cache
+        hedge (bool): Enables hedged requests across the endpoints
+
+    Returns:
+        Dict[str, str]: The subprocess environment
+    """
+    env = {key: value for key, value in os.environ.items()
+           if key not in ('LOCATIONIQ_ENDPOINTS', 'LOCATIONIQ_HEDGE', 'GEOCODE_CACHE_PATH')}
+    env.update(
+        LOCATIONIQ_API_URL=stub_urls[0],
+        LOCATIONIQ_API_KEY=os.environ.get('LOCATIONIQ_API_KEY', 'benchmark-key'),
+        LOCATIONIQ_RATE_LIMIT_DELAY='0',
+        GEOCODE_MAX_CONCURRENCY=str(max_concurrency),
+    )
+    if len(stub_urls) > 1:
+        env['LOCATIONIQ_ENDPOINTS'] = ','.join(stub_urls)
+    if hedge:
+        env['LOCATIONIQ_HEDGE'] = '1'
+    if cache_path is not None:
+        env['GEOCODE_CACHE_PATH'] = cache_path
+    return env
+
+def run_benchmarks(sizes: List[int], unique_ratio: float = 1.0, latency_ms: float = 0.0,
+                   jitter_ms: float = 0.0, error_rate: float = 0.0, no_result_rate: float = 0.0,
+                   rate_limit_per_sec: Optional[float] = None, seed: Optional[int] = 0,
+                   max_concurrency: int = 1, cache_path: Optional[str] = None, endpoints: int = 1,
+                   endpoint_latency_ms: Optional[List[float]] = None, hedge: bool = False) -> Dict[str, Any]:
+    """
+    Runs the pipeline benchmark for each size against fresh LocationIQ stand-ins.
+
+    Each size runs in its own subprocess so peak_rss_mb isn't inflated by earlier runs.
+    A cache file at cache_path is shared by all sizes; use ':memory:' for a cold
+    cache per run.
+
+    Args:
+        endpoints (int): Number of stubs to start and route between
+        endpoint_latency_ms (Optional[List[float]]): Latency of each stub, overriding latency_ms,
+            e.g. to measure routing away from a slow endpoint
+        hedge (bool): Enables hedged requests across the endpoints
+
+    Returns:
+        Dict[str, Any]: Benchmark configuration and one result entry per size
+    """
+    if endpoint_latency_ms is not None and len(endpoint_latency_ms) != endpoints:
+        raise ValueError(f"Expected {endpoints} endpoint latencies, got {len(endpoint_latency_ms)}")
+    latencies = endpoint_latency_ms or [latency_ms] * endpoints
+    stub_config = {
+        'jitter_ms': jitter_ms, 'error_rate': error_rate, 'no_result_rate': no_result_rate,
+        'rate_limit_per_sec': rate_limit_per_sec
+    }
+    config = {
+        'latency_ms': latency_ms, **stub_config, 'seed': seed, 'max_concurrency': max_concurrency,
+        'cache_path': cache_path, 'endpoint_latency_ms': latencies, 'hedge': hedge
+    }
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in sizes:
+            with ExitStack() as stack:
+                stubs = [
+                    stack.enter_context(LocationIQStub(latency_ms=latency, seed=None if seed is None else seed + i,
+                                                       **stub_config))
+                    for i, latency in enumerate(latencies)
+                ]
+                env = pipeline_env([stub.url for stub in stubs], max_concurrency, cache_path, hedge)
+                unique_addresses = max(1, int(size * unique_ratio))
+                completed = subprocess.run(
+                    [sys.executable, '-m', 'benchmarks.bench_pipeline', '--single',
+                     '--sizes', str(size), '--unique-addresses', str(unique_addresses), '--workdir', workdir],
+                    cwd=REPO_ROOT, env=env, capture_output=True, text=True, check=True
+                )
+                result = json.loads(completed.stdout.strip().splitlines()[-1])
+                result['stub'] = {key: sum(stub.stats[key] for stub in stubs) for key in stubs[0].stats}
+                result['endpoints'] = [dict(stub.stats) for stub in stubs]
+                results.append(result)
+    return {'config': config, 'results': results}
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--unique-ratio', type=float, default=1.0,
+                        help='Fraction of records with a distinct address')
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--no-result-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit-per-sec', type=float, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-concurrency', type=int, default=1,
+                        help='GEOCODE_MAX_CONCURRENCY of the pipeline; 1 geocodes sequentially')
+    parser.add_argument('--cache-path',
+                        help="GEOCODE_CACHE_PATH of the pipeline, ':memory:' for a per-run cache; no cache by default")
+    parser.add_argument('--endpoints', type=int,
+                        help='Number of stubs to start and list in LOCATIONIQ_ENDPOINTS; defaults to one '
+                             'per --endpoint-latency-ms value, else 1')
+    parser.add_argument('--endpoint-latency-ms', type=float, nargs='+',
+                        help='Latency of each stub, overriding --latency-ms')
+    parser.add_argument('--hedge', action='store_true', help='Set LOCATIONIQ_HEDGE for the pipeline')
+    parser.add_argument('--output', help='Write results to this JSON file instead of stdout')
+    parser.add_argument('--single', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--unique-addresses', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--workdir', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    # Logging every geocoded address would dominate the measurement
+    import logging
+    logging.disable(logging.INFO)
+
+    if args.single:
+        print(json.dumps(run_single(args.sizes[0], args.unique_addresses, args.workdir)))
+        return
+
+    report = run_benchmarks(args.sizes, args.unique_ratio, args.latency_ms, args.jitter_ms,
+                            args.error_rate, args.no_result_rate, args.rate_limit_per_sec, args.seed,
+                            args.max_concurrency, args.cache_path,
+                            args.endpoints or len(args.endpoint_latency_ms or [args.latency_ms]),
+                            args.endpoint_latency_ms,
+                            args.hedge)
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(payload)
+    else:
+        print(payload)
+
+if __name__ == '__main__':
+    main()
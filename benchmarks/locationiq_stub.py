@@ -0,0 +1,178 @@
+"""
+Local stand-in for the LocationIQ search API.
+
+Serves `/v1/search.php` with the same JSON response shape as LocationIQ so the
+pipeline can be exercised end to end without network access or API quota.
+Latency, server errors, no-result responses and 429 rate limiting are
+configurable.
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse, parse_qs
+import hashlib
+import json
+import random
+import threading
+import time
+
+SEARCH_PATH = '/v1/search.php'
+
+def fake_candidates(query: str, count: int = 3) -> List[Dict[str, Any]]:
+    """
+    Builds deterministic LocationIQ-style candidates for a query.
+
+    The first candidates sit a few metres apart, mirroring the near-duplicate
+    results LocationIQ returns for street names; the last one is far away.
+
+    Args:
+        query (str): The address query
+        count (int): Number of candidates to return
+
+    Returns:
+        List[Dict[str, Any]]: Candidates with display_name, lat and lon strings
+    """
+    digest = hashlib.sha1(query.encode('utf-8')).digest()
+    base_lat = 45.8 + digest[0] / 255 * 2.0
+    base_lon = 5.9 + digest[1] / 255 * 4.5
+    candidates = []
+    for i in range(count):
+        offset = 0.0003 * i if i < count - 1 else 0.5
+        candidates.append({
+            'place_id': str(int.from_bytes(digest[:4], 'big') + i),
+            'display_name': f"{query}, Candidate {i}, Switzerland",
+            'lat': f"{base_lat + offset:.7f}",
+            'lon': f"{base_lon + offset:.7f}",
+            'importance': round(0.9 - 0.1 * i, 2)
+        })
+    return candidates
+
+class LocationIQStub:
+    """
+    Threaded HTTP server mimicking the LocationIQ search endpoint.
+
+    Args:
+        latency_ms (float): Mean artificial response latency in milliseconds
+        jitter_ms (float): Uniform jitter added to or removed from the latency
+        error_rate (float): Probability of answering with HTTP 500
+        no_result_rate (float): Probability of answering with LocationIQ's 404 "Unable to geocode"
+        rate_limit_per_sec (Optional[float]): Requests per second above which requests get HTTP 429
+        candidates (int): Number of candidates per successful response
+        seed (Optional[int]): Seed for the random error and latency decisions
+        host (str): Interface to bind
+        port (int): Port to bind; 0 picks a free port
+    """
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0,
+                 no_result_rate: float = 0.0, rate_limit_per_sec: Optional[float] = None,
+                 candidates: int = 3, seed: Optional[int] = None, host: str = '127.0.0.1', port: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.no_result_rate = no_result_rate
+        self.rate_limit_per_sec = rate_limit_per_sec
+        self.candidates = candidates
+        self.host = host
+        self.port = port
+        self.stats = {'requests': 0, 'ok': 0, 'errors': 0, 'no_results': 0, 'rate_limited': 0}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._window_count = 0
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """The search URL to use as LOCATIONIQ_API_URL."""
+        if self._server is None:
+            raise RuntimeError("Stub server is not running")
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{SEARCH_PATH}"
+
+    def _decide(self) -> Dict[str, Any]:
+        """Picks the outcome and latency of one request."""
+        with self._lock:
+            self.stats['requests'] += 1
+            if self.rate_limit_per_sec is not None:
+                now = time.monotonic()
+                if now - self._window_start >= 1.0:
+                    self._window_start = now
+                    self._window_count = 0
+                self._window_count += 1
+                if self._window_count > self.rate_limit_per_sec:
+                    self.stats['rate_limited'] += 1
+                    return {'outcome': 'rate_limited', 'delay': 0.0}
+            roll = self._random.random()
+            delay = max(0.0, self.latency_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+            if roll < self.error_rate:
+                self.stats['errors'] += 1
+                return {'outcome': 'error', 'delay': delay}
+            if roll < self.error_rate + self.no_result_rate:
+                self.stats['no_results'] += 1
+                return {'outcome': 'no_results', 'delay': delay}
+            self.stats['ok'] += 1
+            return {'outcome': 'ok', 'delay': delay}
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, payload: Any) -> None:
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                if parsed.path != SEARCH_PATH:
+                    self._send(404, {'error': 'Not found'})
+                    return
+                params = parse_qs(parsed.query)
+                if not params.get('key'):
+                    self._send(401, {'error': 'Invalid key'})
+                    return
+                query = params.get('q', [''])[0]
+
+                decision = stub._decide()
+                if decision['delay']:
+                    time.sleep(decision['delay'])
+                if decision['outcome'] == 'rate_limited':
+                    self._send(429, {'error': 'Rate Limited Second'})
+                elif decision['outcome'] == 'error':
+                    self._send(500, {'error': 'Internal Server Error'})
+                elif decision['outcome'] == 'no_results':
+                    self._send(404, {'error': 'Unable to geocode'})
+                else:
+                    self._send(200, fake_candidates(query, stub.candidates))
+
+        return Handler
+
+    def start(self) -> 'LocationIQStub':
+        """Starts serving in a background thread."""
+        self._server = ThreadingHTTPServer((self.host, self.port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stops the server and waits for the serving thread to exit."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+
+    def __enter__(self) -> 'LocationIQStub':
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
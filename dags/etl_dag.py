@@ -1,14 +1,16 @@
 from datetime import datetime, timedelta
 from airflow import DAG
 from airflow.operators.python import PythonOperator
+from geocoding.operators import DeferrableGeocodingOperator, task_profile_dir
 import sys
 import os
 
-# Add src directory to path
-sys.path.append('/opt/airflow/src')
-from utils.reader import read_json
-from transformers.address_transformer import AddressTransformer
-from utils.writer import write_json
+# The scheduler parses this file constantly, so only Airflow, the standard
+# library and the plugins/ operators are imported here; pipeline modules
+# (requests, numpy, dotenv) are imported inside the task callables.
+SRC_DIR = '/opt/airflow/src'
+if SRC_DIR not in sys.path:
+    sys.path.append(SRC_DIR)
 
 # Default arguments for the DAG
 default_args = {
@@ -29,29 +31,87 @@ dag = DAG(
     schedule_interval=None,  # Manual trigger
     catchup=False,
     tags=['etl', 'geocoding', 'address'],
+    params={
+        'output_format': 'json',  # 'json' or 'parquet'
+        'profile': False,  # Write per-stage cProfile/tracemalloc reports (also enabled by ETL_PROFILE=1)
+        'priority_rules': None,  # Geocoding priority rules when LOCATIONIQ_DAILY_QUOTA is set; None uses the defaults
+        'load_mode': 'overwrite',  # 'overwrite' rewrites the output; 'upsert' merges into the partitioned JSON store by record fingerprint
+        'upsert_partitions': None,  # Hash partitions per date_scraped month of a new upsert store (default 1); fixed once the store exists
+        'write_index': True,  # Write a <output>.idx offset index next to JSON output for random access by record key
+    },
 )
 
+def publish_metrics(metrics, context):
+    """Push a metrics summary to XCom and export to Prometheus/StatsD if configured"""
+    from utils.metrics import export_metrics
+    task_instance = context['task_instance']
+    task_instance.xcom_push(key='metrics', value=metrics.summary())
+    export_metrics(metrics, f"{task_instance.dag_id}_{task_instance.task_id}")
+
+def stage_profiler(stage, context):
+    """Profile a stage when enabled, writing reports next to the task logs"""
+    from utils.profiling import profile_stage, profiling_enabled
+    output_dir = task_profile_dir(context['task_instance'])
+    return profile_stage(stage, output_dir, enabled=profiling_enabled(context['params']))
+
+def staging_path(context, name):
+    """Per-run file handing records between tasks; XCom only carries its path"""
+    return f"/opt/airflow/data/staging/{context['dag'].dag_id}/{context['ts_nodash']}/{name}"
+
 def extract_data(**context):
     """Extract data from input JSON file"""
+    from utils.reader import read_json
+    from utils.schema import compile_schema, INPUT_RECORD_SCHEMA
+    from utils.dead_letter import DeadLetterWriter
+    from utils.writer import write_json
+    from utils.metrics import PipelineMetrics
+    metrics = PipelineMetrics()
     input_path = '/opt/airflow/data/int_test_input/input_sample.json'  # Changed to input.json
-    records = list(read_json(input_path))
+    dead_letter_path = f"/opt/airflow/data/dead_letter/{context['dag'].dag_id}_{context['ts_nodash']}.jsonl"
+    extracted_path = staging_path(context, 'extracted.json')
+    validator = compile_schema(INPUT_RECORD_SCHEMA)
+    with stage_profiler('extract', context), DeadLetterWriter(dead_letter_path) as dead_letter:
+        records = list(read_json(input_path, validator, dead_letter))
+        write_json(iter(records), extracted_path)
+    metrics.incr('records_out_total', len(records), stage='extract')
+    metrics.incr('records_invalid_total', dead_letter.count, stage='extract')
     print(f"Extracted {len(records)} records from {input_path}")
-    return records
-
-def transform_data(**context):
-    """Transform data by enriching addresses with geocoding"""
-    records = context['task_instance'].xcom_pull(task_ids='extract_task')
-    transformer = AddressTransformer()  # Instantiate the class
-    enriched_records = list(transformer.transform(iter(records)))  # Call method
-    print(f"Transformed {len(enriched_records)} records")
-    return enriched_records
+    if dead_letter.count:
+        print(f"Rejected {dead_letter.count} invalid records to {dead_letter_path}")
+    publish_metrics(metrics, context)
+    return extracted_path
 
 def load_data(**context):
     """Load enriched data to output file"""
-    enriched_records = context['task_instance'].xcom_pull(task_ids='transform_task')
-    output_path = '/opt/airflow/data/int_test_output/enriched_data.json'
-    write_json(iter(enriched_records), output_path)
+    from utils.fingerprint import DEFAULT_KEY_FIELDS
+    from utils.reader import read_json
+    from utils.writer import write_json, write_parquet
+    from utils.metrics import PipelineMetrics
+    enriched_path = context['task_instance'].xcom_pull(task_ids='transform_task')
+    metrics = PipelineMetrics()
+    with stage_profiler('load', context):
+        enriched_records = list(read_json(enriched_path))
+        metrics.incr('records_in_total', len(enriched_records), stage='load')
+        if context['params'].get('load_mode') == 'upsert':
+            from utils.partitioned_store import PartitionedJsonStore
+            if context['params'].get('output_format') == 'parquet':
+                raise ValueError("The upsert load mode only supports JSON output")
+            output_path = '/opt/airflow/data/int_test_output/enriched_data'
+            store = PartitionedJsonStore(output_path, partitions=context['params'].get('upsert_partitions'))
+            stats = store.upsert(iter(enriched_records))
+            metrics.incr('records_upserted_total', stats['inserted'], action='inserted')
+            metrics.incr('records_upserted_total', stats['updated'], action='updated')
+            metrics.set_gauge('partitions_rewritten', stats['partitions_rewritten'])
+        elif context['params'].get('output_format') == 'parquet':
+            output_path = '/opt/airflow/data/int_test_output/enriched_data.parquet'
+            write_parquet(iter(enriched_records), output_path)
+        else:
+            output_path = '/opt/airflow/data/int_test_output/enriched_data.json'
+            index_key = DEFAULT_KEY_FIELDS if context['params'].get('write_index') else None
+            write_json(iter(enriched_records), output_path, index_key=index_key)
+    metrics.incr('records_out_total', len(enriched_records), stage='load')
     print(f"Loaded {len(enriched_records)} records to {output_path}")
+    publish_metrics(metrics, context)
 
 # Define tasks
 extract_task = PythonOperator(
@@ -60,9 +120,12 @@ extract_task = PythonOperator(
     dag=dag,
 )
 
-transform_task = PythonOperator(
+# Geocoding waits on the network for most of its runtime, so it runs on the
+# triggerer instead of holding a worker slot; the trigger profiles it when enabled
+transform_task = DeferrableGeocodingOperator(
     task_id='transform_task',
-    python_callable=transform_data,
+    input_path="{{ task_instance.xcom_pull(task_ids='extract_task') }}",
+    output_path="/opt/airflow/data/staging/{{ dag.dag_id }}/{{ ts_nodash }}/enriched.json",
     dag=dag,
 )
 
@@ -0,0 +1,91 @@
+from typing import Any, Dict, Optional, Sequence
+import os
+import sys
+
+from airflow.exceptions import AirflowException
+from airflow.models import BaseOperator
+
+from geocoding.triggers import GeocodingTrigger, cancel_marker_path
+
+SRC_DIR = os.getenv('ETL_SRC_DIR', '/opt/airflow/src')
+
+def task_profile_dir(task_instance: Any) -> str:
+    """Directory of a task attempt's stage profiles, under ETL_PROFILE_DIR or next to the task logs"""
+    from airflow.configuration import conf
+    base_dir = os.getenv('ETL_PROFILE_DIR') or os.path.join(conf.get('logging', 'base_log_folder'), 'profiles')
+    return os.path.join(
+        base_dir,
+        f"dag_id={task_instance.dag_id}",
+        f"run_id={task_instance.run_id}",
+        f"task_id={task_instance.task_id}",
+        f"attempt={task_instance.try_number}",
+    )
+
+class DeferrableGeocodingOperator(BaseOperator):
+    """
+    Geocodes a staged JSON file without holding a worker slot.
+
+    The operator immediately defers to a GeocodingTrigger, which waits on the
+    LocationIQ requests and rate-limit delays on the triggerer; the task
+    resumes on a worker only to record the result. Returns the output path,
+    and pushes the transform metrics to XCom under the key 'metrics'. With
+    the DAG's profile param (or ETL_PROFILE) set, the trigger profiles the
+    transform stage into the task's profile directory.
+
+    Args:
+        input_path (str): Staged input records (templated)
+        output_path (str): File receiving the enriched records (templated)
+        data_dir (str): Base data directory holding the cache, quota state and deferred queue
+        priority_rules (Optional[list]): Quota priority rules; defaults to the DAG's priority_rules param
+    """
+
+    template_fields: Sequence[str] = ('input_path', 'output_path')
+
+    def __init__(self, *, input_path: str, output_path: str, data_dir: str = '/opt/airflow/data',
+                 priority_rules: Optional[list] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.input_path = input_path
+        self.output_path = output_path
+        self.data_dir = data_dir
+        self.priority_rules = priority_rules
+
+    def execute(self, context: Dict[str, Any]) -> None:
+        if SRC_DIR not in sys.path:
+            sys.path.append(SRC_DIR)
+        from utils.profiling import profiling_enabled
+
+        # A marker left by on_kill in an earlier try must not stop this one
+        try:
+            os.remove(cancel_marker_path(self.output_path))
+        except FileNotFoundError:
+            pass
+        priority_rules = self.priority_rules
+        if priority_rules is None:
+            priority_rules = context['params'].get('priority_rules')
+        profile_dir = task_profile_dir(context['task_instance']) if profiling_enabled(context['params']) else None
+        self.defer(
+            trigger=GeocodingTrigger(
+                input_path=self.input_path,
+                output_path=self.output_path,
+                data_dir=self.data_dir,
+                job_id=self.dag_id,
+                priority_rules=priority_rules,
+                metrics_job=f"{self.dag_id}_{self.task_id}",
+                profile_dir=profile_dir,
+            ),
+            method_name='execute_complete',
+        )
+
+    def execute_complete(self, context: Dict[str, Any], event: Dict[str, Any]) -> str:
+        if event.get('status') != 'success':
+            raise AirflowException(f"Geocoding failed: {event.get('error')}")
+        context['task_instance'].xcom_push(key='metrics', value=event['metrics'])
+        self.log.info("Transformed %s records to %s", event['records'], event['output_path'])
+        return event['output_path']
+
+    def on_kill(self) -> None:
+        # Asks a trigger still enriching this output to stop; Airflow also
+        # cancels the trigger itself when a deferred task is cleared or failed
+        with open(cancel_marker_path(self.output_path), 'w'):
+            pass
+        self.log.info("Requested cancellation of geocoding into %s", self.output_path)
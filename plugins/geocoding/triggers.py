@@ -0,0 +1,110 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import asyncio
+import functools
+import os
+import sys
+import threading
+
+from airflow.triggers.base import BaseTrigger, TriggerEvent
+
+# The triggerer imports this module to deserialize triggers; pipeline code
+# lives in src and is imported only when the trigger runs.
+SRC_DIR = os.getenv('ETL_SRC_DIR', '/opt/airflow/src')
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+def _shared_executor() -> ThreadPoolExecutor:
+    """Returns the triggerer-wide pool running enrichment jobs, bounded by GEOCODING_TRIGGER_THREADS."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=int(os.getenv('GEOCODING_TRIGGER_THREADS', '8')),
+                                       thread_name_prefix='geocoding-trigger')
+    return _executor
+
+def cancel_marker_path(output_path: str) -> str:
+    """Returns the file whose presence asks the trigger writing output_path to stop."""
+    return f'{output_path}.cancel'
+
+class GeocodingTrigger(BaseTrigger):
+    """
+    Enriches a staged JSON file on the triggerer.
+
+    The blocking requests and rate-limit sleeps of enrich_file run on a
+    thread of a pool shared by the triggerer's geocoding triggers, so the
+    event loop keeps serving other triggers. Cancelling the trigger (the
+    task is cleared, marked failed or timed out) or creating the cancel
+    marker stops the job before its next record and leaves the previous
+    output in place. A re-run trigger for the same output waits for any
+    earlier job and reuses its result when the input is unchanged.
+
+    Fires a single event: {'status': 'success', 'output_path', 'records',
+    'metrics'} or {'status': 'error', 'error'}.
+
+    Args:
+        input_path (str): Staged input records
+        output_path (str): File receiving the enriched records
+        data_dir (str): Base data directory holding the cache, quota state and deferred queue
+        job_id (str): Name of the deferred queue, usually the DAG id
+        priority_rules (Optional[List[Dict[str, Any]]]): Quota priority rules, None for the defaults
+        metrics_job (Optional[str]): Job name for exporting metrics to Prometheus/StatsD
+        profile_dir (Optional[str]): Directory receiving the transform profile; None disables profiling
+        poll_interval (float): Seconds between checks for the cancel marker
+    """
+
+    def __init__(self, input_path: str, output_path: str, data_dir: str, job_id: str,
+                 priority_rules: Optional[List[Dict[str, Any]]] = None, metrics_job: Optional[str] = None,
+                 profile_dir: Optional[str] = None, poll_interval: float = 5.0):
+        super().__init__()
+        self.input_path = input_path
+        self.output_path = output_path
+        self.data_dir = data_dir
+        self.job_id = job_id
+        self.priority_rules = priority_rules
+        self.metrics_job = metrics_job
+        self.profile_dir = profile_dir
+        self.poll_interval = poll_interval
+
+    def serialize(self) -> Tuple[str, Dict[str, Any]]:
+        return (
+            'geocoding.triggers.GeocodingTrigger',
+            {
+                'input_path': self.input_path,
+                'output_path': self.output_path,
+                'data_dir': self.data_dir,
+                'job_id': self.job_id,
+                'priority_rules': self.priority_rules,
+                'metrics_job': self.metrics_job,
+                'profile_dir': self.profile_dir,
+                'poll_interval': self.poll_interval,
+            },
+        )
+
+    async def run(self) -> AsyncIterator[TriggerEvent]:
+        if SRC_DIR not in sys.path:
+            sys.path.append(SRC_DIR)
+        from transformers.enrichment_job import enrich_file
+
+        cancel = threading.Event()
+        job = asyncio.get_running_loop().run_in_executor(
+            _shared_executor(),
+            functools.partial(enrich_file, self.input_path, self.output_path, self.data_dir, self.job_id,
+                              self.priority_rules, self.metrics_job, self.profile_dir, cancel),
+        )
+        try:
+            while not job.done():
+                await asyncio.wait({job}, timeout=self.poll_interval)
+                if os.path.exists(cancel_marker_path(self.output_path)):
+                    cancel.set()
+            summary = job.result()
+        except asyncio.CancelledError:
+            # The thread can't be interrupted; it stops before its next record
+            # with a TransformCancelledError nobody is waiting for any more
+            cancel.set()
+            job.add_done_callback(lambda finished: finished.cancelled() or finished.exception())
+            raise
+        except Exception as e:
+            self.log.exception("Geocoding of %s failed", self.input_path)
+            yield TriggerEvent({'status': 'error', 'error': f"{type(e).__name__}: {str(e)}"})
+            return
+        yield TriggerEvent({'status': 'success', **summary})
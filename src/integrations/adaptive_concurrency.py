@@ -0,0 +1,181 @@
+from typing import Callable, Optional, TypeVar
+import os
+import threading
+import time
+
+from integrations.geocode_util import GeocodingTimeoutError, NoGeocodingResultsError, RateLimitedError
+from utils.metrics import PipelineMetrics
+
+T = TypeVar('T')
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Limits concurrent geocoding requests with an AIMD (additive increase,
+    multiplicative decrease) controller.
+
+    Each request that completes normally while the limit is fully used raises
+    the limit by 1/limit, i.e. by about one per round of requests. A 429, a
+    timeout, or a short-term latency average above latency_tolerance times the
+    long-term average multiplies the limit by backoff. Only requests started
+    after the previous decrease can trigger another one, so a burst of errors
+    from the same congestion event backs off once.
+
+    Probing the limit deliberately provokes those errors, so a request that
+    hit a 429 or a timeout is retried up to max_retries times after its slot
+    is released: after the Retry-After the API asked for, or otherwise after
+    an exponential backoff starting at retry_delay. Only the last error is
+    raised to the caller.
+
+    Args:
+        initial_limit (int): Starting number of concurrent requests
+        min_limit (int): Lowest limit
+        max_limit (int): Highest limit
+        backoff (float): Factor applied to the limit on overload
+        latency_tolerance (float): Ratio of recent to baseline latency treated as overload
+        min_samples (int): Latency samples collected before latency can trigger a decrease
+        max_retries (int): Retries of a request that was rate limited or timed out
+        retry_delay (float): Seconds before the first retry when the API gave no Retry-After
+        max_retry_delay (float): Upper bound on the wait before a retry
+        metrics (Optional[PipelineMetrics]): Registry receiving the geocode_concurrency_limit gauge
+            and the geocode_retries_total counter
+    """
+
+    def __init__(self, initial_limit: int = 4, min_limit: int = 1, max_limit: int = 32, backoff: float = 0.5,
+                 latency_tolerance: float = 2.0, min_samples: int = 10, max_retries: int = 3,
+                 retry_delay: float = 1.0, max_retry_delay: float = 60.0,
+                 metrics: Optional[PipelineMetrics] = None):
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError("Concurrency limits must satisfy 1 <= min_limit <= initial_limit <= max_limit")
+        if not 0 < backoff < 1:
+            raise ValueError("Backoff must be between 0 and 1")
+        if max_retries < 0:
+            raise ValueError("Retries cannot be negative")
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.min_samples = min_samples
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.metrics = metrics
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+        self._samples = 0
+        self._short_latency: Optional[float] = None
+        self._long_latency: Optional[float] = None
+        self._last_decrease = float('-inf')
+        self._condition = threading.Condition()
+        self._publish()
+
+    @classmethod
+    def from_env(cls, metrics: Optional[PipelineMetrics] = None) -> Optional['AdaptiveConcurrencyLimiter']:
+        """
+        Builds the limiter configured by GEOCODE_MAX_CONCURRENCY, GEOCODE_INITIAL_CONCURRENCY
+        and GEOCODE_MAX_RETRIES.
+
+        Args:
+            metrics (Optional[PipelineMetrics]): Registry receiving the limit gauge
+
+        Returns:
+            Optional[AdaptiveConcurrencyLimiter]: The limiter, or None when geocoding
+                should stay sequential (GEOCODE_MAX_CONCURRENCY unset or 1)
+        """
+        max_limit = int(os.getenv('GEOCODE_MAX_CONCURRENCY') or 1)
+        if max_limit <= 1:
+            return None
+        initial_limit = min(int(os.getenv('GEOCODE_INITIAL_CONCURRENCY') or 2), max_limit)
+        max_retries = int(os.getenv('GEOCODE_MAX_RETRIES') or 3)
+        return cls(initial_limit=initial_limit, max_limit=max_limit, max_retries=max_retries, metrics=metrics)
+
+    @property
+    def limit(self) -> int:
+        """The current number of requests allowed in flight."""
+        with self._condition:
+            return int(self._limit)
+
+    def _publish(self) -> None:
+        if self.metrics is not None:
+            self.metrics.set_gauge('geocode_concurrency_limit', int(self._limit))
+
+    def _decrease(self, started: float) -> None:
+        if started < self._last_decrease:
+            return
+        self._limit = max(float(self.min_limit), self._limit * self.backoff)
+        self._last_decrease = time.monotonic()
+        self._publish()
+
+    def _record_latency(self, started: float, latency: float, saturated: bool) -> None:
+        self._samples += 1
+        if self._short_latency is None:
+            self._short_latency = self._long_latency = latency
+        else:
+            self._short_latency = 0.3 * latency + 0.7 * self._short_latency
+            self._long_latency = 0.05 * latency + 0.95 * self._long_latency
+        if self._samples >= self.min_samples and self._short_latency > self.latency_tolerance * self._long_latency:
+            self._decrease(started)
+        elif saturated and self._limit < self.max_limit:
+            self._limit = min(float(self.max_limit), self._limit + 1 / self._limit)
+            self._publish()
+
+    def call(self, fn: Callable[[str], T], address: str) -> T:
+        """
+        Runs fn(address) once a slot is free and adjusts the limit from its outcome.
+
+        Requests rejected with RateLimitedError or GeocodingTimeoutError are
+        retried, see the class description.
+
+        Args:
+            fn (Callable[[str], T]): The geocoder
+            address (str): The address to geocode
+
+        Returns:
+            T: Whatever fn returned
+
+        Raises:
+            Exception: Whatever fn raised, for overload errors once the retries are exhausted
+        """
+        attempt = 0
+        while True:
+            try:
+                return self._call_once(fn, address)
+            except (RateLimitedError, GeocodingTimeoutError) as e:
+                if attempt >= self.max_retries:
+                    raise
+                retry_after = getattr(e, 'retry_after', None)
+                delay = retry_after if retry_after is not None else self.retry_delay * 2 ** attempt
+                attempt += 1
+                if self.metrics is not None:
+                    reason = 'rate_limited' if isinstance(e, RateLimitedError) else 'timeout'
+                    self.metrics.incr('geocode_retries_total', reason=reason)
+                time.sleep(min(delay, self.max_retry_delay))
+
+    def _call_once(self, fn: Callable[[str], T], address: str) -> T:
+        """Runs fn(address) in a slot and adjusts the limit from its outcome."""
+        with self._condition:
+            while self._in_flight >= int(self._limit):
+                self._condition.wait()
+            self._in_flight += 1
+            started = time.monotonic()
+
+        overloaded = False
+        try:
+            return fn(address)
+        except (RateLimitedError, GeocodingTimeoutError):
+            overloaded = True
+            raise
+        except NoGeocodingResultsError:
+            # A definitive answer: the provider responded normally
+            raise
+        except Exception:
+            started = None
+            raise
+        finally:
+            with self._condition:
+                saturated = self._in_flight >= int(self._limit)
+                self._in_flight -= 1
+                if overloaded:
+                    self._decrease(started)
+                elif started is not None:
+                    self._record_latency(started, time.monotonic() - started, saturated)
+                self._condition.notify_all()
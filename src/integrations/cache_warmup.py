@@ -0,0 +1,203 @@
+"""
+Warms a GeocodeCache from historical pipeline outputs and seed files.
+
+Usage (from the repository root):
+
+    PYTHONPATH=src python -m integrations.cache_warmup --cache data/cache/geocode_cache.sqlite \\
+        data/int_test_output/enriched_data.json --seed seeds/geocode_seed.jsonl
+
+    PYTHONPATH=src python -m integrations.cache_warmup --cache data/cache/geocode_cache.sqlite \\
+        --export seeds/geocode_seed.jsonl
+"""
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import argparse
+import json
+import logging
+import os
+
+from integrations.geocode_cache import DEFAULT_TTL_SECONDS, GeocodeCache, normalize_address
+from utils.fs import ensure_parent_directory
+from utils.reader import read_json
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 10_000
+
+CacheEntries = Iterator[Tuple[str, List[Dict[str, str]]]]
+
+def iter_enriched_entries(path: str) -> CacheEntries:
+    """
+    Yields (address, candidates) pairs from enriched output files.
+
+    Only records that were geocoded successfully and still carry their
+    geocoded_addresses are used; failed and unaddressed records are skipped.
+
+    Args:
+        path (str): An enriched JSON file, or a directory of them
+
+    Yields:
+        Tuple[str, List[Dict[str, str]]]: The project address and its candidates
+    """
+    for record in read_json(path):
+        address = record.get('project_address')
+        candidates = record.get('geocoded_addresses')
+        if record.get('geocoding_status') != 'success' or not isinstance(address, str) or not address.strip():
+            continue
+        if isinstance(candidates, list) and candidates:
+            yield address, candidates
+
+def iter_seed_entries(path: str) -> CacheEntries:
+    """
+    Yields (address, results) pairs from a JSON Lines seed file written by export_seed.
+
+    Args:
+        path (str): The seed file
+
+    Yields:
+        Tuple[str, List[Dict[str, str]]]: The address and its cached results
+
+    Raises:
+        FileNotFoundError: When the seed file doesn't exist
+        ValueError: When a line is not a valid seed entry
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Path does not exist: {path}")
+
+    with open(path, 'r', encoding='utf-8') as file:
+        for line_number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON on line {line_number} of seed file {path}: {str(e)}")
+            if (not isinstance(entry, dict) or not isinstance(entry.get('address'), str)
+                    or not isinstance(entry.get('results'), list)):
+                raise ValueError(f"Invalid seed entry on line {line_number} of seed file {path}")
+            if entry['results']:
+                yield entry['address'], entry['results']
+
+def load_entries(cache: GeocodeCache, entries: Iterable[Tuple[str, List[Dict[str, str]]]],
+                 batch_size: int = DEFAULT_BATCH_SIZE, ttl: Optional[float] = None,
+                 replace: bool = False) -> Dict[str, int]:
+    """
+    Bulk-inserts (address, results) pairs into the cache.
+
+    Entries are deduplicated by normalized address within each batch, keeping
+    the last occurrence, and each batch is written with one put_many call.
+
+    Args:
+        cache (GeocodeCache): The cache to warm
+        entries (Iterable[Tuple[str, List[Dict[str, str]]]]): (address, results) pairs
+        batch_size (int): Number of distinct addresses written per transaction
+        ttl (Optional[float]): Lifetime of the warmed entries, defaults to the cache TTL
+        replace (bool): Overwrite unexpired entries already in the cache
+
+    Returns:
+        Dict[str, int]: Counts of entries 'read', 'duplicates' dropped and 'written'
+    """
+    if batch_size <= 0:
+        raise ValueError("Batch size must be positive")
+
+    stats = {'read': 0, 'duplicates': 0, 'written': 0}
+    batch: Dict[str, List[Dict[str, str]]] = {}
+
+    def flush() -> None:
+        stats['written'] += cache.put_many(batch.items(), ttl=ttl, replace=replace)
+        batch.clear()
+
+    for address, results in entries:
+        stats['read'] += 1
+        key = normalize_address(address)
+        if key in batch:
+            stats['duplicates'] += 1
+        batch[key] = results
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    return stats
+
+def warm_cache(cache: GeocodeCache, paths: Iterable[str] = (), seed_paths: Iterable[str] = (),
+               batch_size: int = DEFAULT_BATCH_SIZE, ttl: Optional[float] = None,
+               replace: bool = False) -> Dict[str, int]:
+    """
+    Warms the cache from enriched output files and seed files.
+
+    Seed files are loaded first, then enriched outputs in the order given, so
+    with replace=True later sources win.
+
+    Args:
+        cache (GeocodeCache): The cache to warm
+        paths (Iterable[str]): Enriched JSON files or directories of them
+        seed_paths (Iterable[str]): JSON Lines seed files written by export_seed
+        batch_size (int): Number of distinct addresses written per transaction
+        ttl (Optional[float]): Lifetime of the warmed entries, defaults to the cache TTL
+        replace (bool): Overwrite unexpired entries already in the cache
+
+    Returns:
+        Dict[str, int]: Counts of entries 'read', 'duplicates' dropped and 'written'
+    """
+    def entries() -> CacheEntries:
+        for seed_path in seed_paths:
+            yield from iter_seed_entries(seed_path)
+        for path in paths:
+            yield from iter_enriched_entries(path)
+
+    stats = load_entries(cache, entries(), batch_size=batch_size, ttl=ttl, replace=replace)
+    logger.info(f"Warmed geocode cache: {stats['written']} entries written from {stats['read']} read "
+                f"({stats['duplicates']} duplicates)")
+    return stats
+
+def export_seed(cache: GeocodeCache, path: str) -> int:
+    """
+    Writes every unexpired positive cache entry to a JSON Lines seed file.
+
+    Args:
+        cache (GeocodeCache): The cache to export
+        path (str): Destination seed file
+
+    Returns:
+        int: Number of entries written
+
+    Raises:
+        OSError: When the file cannot be written
+    """
+    ensure_parent_directory(path)
+    count = 0
+    try:
+        with open(path, 'w', encoding='utf-8') as file:
+            for address, results in cache.iter_entries():
+                file.write(json.dumps({'address': address, 'results': results}, ensure_ascii=False))
+                file.write('\n')
+                count += 1
+    except IOError as e:
+        raise OSError(f"Failed to write to file {path}: {str(e)}")
+    return count
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('paths', nargs='*', help='Enriched JSON files or directories to load')
+    parser.add_argument('--cache', default=os.getenv('GEOCODE_CACHE_PATH'), required=not os.getenv('GEOCODE_CACHE_PATH'),
+                        help='SQLite cache database (default: $GEOCODE_CACHE_PATH)')
+    parser.add_argument('--seed', action='append', default=[], help='JSON Lines seed file to load (repeatable)')
+    parser.add_argument('--export', help='Write the warmed cache to this seed file')
+    parser.add_argument('--ttl', type=float, help='Lifetime of warmed entries in seconds (default: cache TTL)')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Addresses per transaction')
+    parser.add_argument('--replace', action='store_true', help='Overwrite unexpired cache entries')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    cache = GeocodeCache(args.cache, ttl=float(os.getenv('GEOCODE_CACHE_TTL_SECONDS', DEFAULT_TTL_SECONDS)))
+    try:
+        stats: Dict[str, Any] = warm_cache(cache, args.paths, args.seed, batch_size=args.batch_size,
+                                           ttl=args.ttl, replace=args.replace)
+        if args.export:
+            stats['exported'] = export_seed(cache, args.export)
+            logger.info(f"Exported {stats['exported']} entries to {args.export}")
+    finally:
+        cache.close()
+    return stats
+
+if __name__ == '__main__':
+    main()
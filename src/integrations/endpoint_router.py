@@ -0,0 +1,258 @@
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait
+from typing import Any, Callable, Deque, Dict, List, Optional
+import threading
+import time
+
+import requests
+
+# Sends one request: (url, params, timeout) -> response
+Sender = Callable[[str, Dict[str, Any], float], requests.Response]
+# Claims one extra billable request, e.g. DailyQuota.acquire; False when none is left
+Budget = Callable[[], bool]
+
+def _is_server_error(response: requests.Response) -> bool:
+    status = getattr(response, 'status_code', None)
+    return isinstance(status, int) and status >= 500
+
+class EndpointStats:
+    """Latency and health of one endpoint."""
+
+    def __init__(self, url: str, window: int):
+        self.url = url
+        self.ewma: Optional[float] = None
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.unhealthy_until = 0.0
+
+    def p95(self) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)]
+
+class EndpointRouter:
+    """
+    Routes geocoding requests to the fastest healthy endpoint.
+
+    Every response updates the endpoint's latency EWMA and a sliding window of
+    recent latencies. Requests go to the healthy endpoint with the lowest EWMA;
+    endpoints without measurements are tried first so each gets probed. An
+    endpoint that fails failure_threshold times in a row (connection errors,
+    timeouts or HTTP 5xx) is skipped for cooldown seconds. Failed requests are
+    retried once on the next endpoint.
+
+    With hedging enabled, a request still unanswered after the primary
+    endpoint's p95 latency is duplicated to the next endpoint and the first good
+    response wins. Hedged requests count against the API quota, so at most
+    max_hedge_ratio of all requests are hedged. Requests that may be hedged
+    are sent from a pool of max_workers threads; the hedge delay runs from
+    when the primary request is actually sent, so time queued for a thread
+    never triggers a hedge.
+
+    Failover and hedged requests are real, billable API calls. When get() is
+    given a budget, each of them claims a unit from it first and is skipped
+    when the budget is used up; the caller pays for the first attempt.
+
+    Args:
+        urls (List[str]): Search endpoint URLs
+        send (Sender): Function performing one HTTP request
+        hedge (bool): Whether to send hedged requests
+        max_hedge_ratio (float): Upper bound on hedged requests as a fraction of all requests
+        min_samples (int): Latency samples needed before an endpoint's p95 is trusted for hedging
+        window (int): Number of recent latencies kept per endpoint
+        failure_threshold (int): Consecutive failures after which an endpoint is skipped
+        cooldown (float): Seconds an unhealthy endpoint is skipped
+        ewma_alpha (float): Weight of the newest latency in the moving average
+        max_workers (int): Threads sending hedgeable requests; should cover the callers'
+            concurrency plus their hedges
+    """
+
+    def __init__(self, urls: List[str], send: Sender, hedge: bool = False, max_hedge_ratio: float = 0.1,
+                 min_samples: int = 20, window: int = 100, failure_threshold: int = 3, cooldown: float = 30.0,
+                 ewma_alpha: float = 0.2, max_workers: int = 8):
+        if not urls:
+            raise ValueError("At least one endpoint URL is required")
+        self.urls = list(dict.fromkeys(urls))
+        self.send = send
+        self.hedge = hedge and len(self.urls) > 1
+        self.max_hedge_ratio = max_hedge_ratio
+        self.min_samples = min_samples
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.ewma_alpha = ewma_alpha
+        self.max_workers = max_workers
+        self.hedged = 0
+        self.total = 0
+        self._stats = {url: EndpointStats(url, window) for url in self.urls}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def ranked(self) -> List[str]:
+        """
+        Returns the endpoints in the order they would be tried.
+
+        Healthy endpoints come first, unmeasured ones before the rest, then by
+        latency EWMA; unhealthy endpoints follow by how soon they recover.
+        """
+        now = time.monotonic()
+        with self._lock:
+            healthy = [stats for stats in self._stats.values() if stats.unhealthy_until <= now]
+            unhealthy = [stats for stats in self._stats.values() if stats.unhealthy_until > now]
+            healthy.sort(key=lambda stats: (stats.ewma is not None, stats.ewma or 0.0))
+            unhealthy.sort(key=lambda stats: stats.unhealthy_until)
+        return [stats.url for stats in healthy + unhealthy]
+
+    def record(self, url: str, latency: float, ok: bool) -> None:
+        """
+        Records the outcome of a request.
+
+        Args:
+            url (str): The endpoint
+            latency (float): Seconds until the response or error
+            ok (bool): Whether the endpoint answered without a connection error, timeout or 5xx
+        """
+        with self._lock:
+            stats = self._stats[url]
+            stats.requests += 1
+            if ok:
+                stats.samples.append(latency)
+                stats.ewma = latency if stats.ewma is None else (
+                    self.ewma_alpha * latency + (1 - self.ewma_alpha) * stats.ewma)
+                stats.consecutive_failures = 0
+                return
+            stats.failures += 1
+            stats.consecutive_failures += 1
+            if stats.consecutive_failures >= self.failure_threshold:
+                stats.unhealthy_until = time.monotonic() + self.cooldown
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Returns a snapshot of per-endpoint request counts, latencies and health."""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                url: {
+                    'requests': stats.requests,
+                    'failures': stats.failures,
+                    'ewma_seconds': stats.ewma,
+                    'p95_seconds': stats.p95(),
+                    'healthy': stats.unhealthy_until <= now,
+                }
+                for url, stats in self._stats.items()
+            }
+
+    def close(self) -> None:
+        """Shuts down the hedging threads; requests still in flight finish in the background."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def _attempt(self, url: str, params: Dict[str, Any], timeout: float) -> requests.Response:
+        start = time.perf_counter()
+        try:
+            response = self.send(url, params, timeout)
+        except requests.exceptions.RequestException:
+            self.record(url, time.perf_counter() - start, ok=False)
+            raise
+        self.record(url, time.perf_counter() - start, ok=not _is_server_error(response))
+        return response
+
+    def _hedge_delay(self, url: str) -> Optional[float]:
+        if not self.hedge:
+            return None
+        with self._lock:
+            stats = self._stats[url]
+            if len(stats.samples) < self.min_samples or self.hedged >= self.max_hedge_ratio * self.total:
+                return None
+            return stats.p95()
+
+    def get(self, params: Dict[str, Any], timeout: float = 10,
+            budget: Optional[Budget] = None) -> requests.Response:
+        """
+        Sends a search request to the best endpoint.
+
+        Args:
+            params (Dict[str, Any]): Query parameters
+            timeout (float): Per-request timeout in seconds
+            budget (Optional[Budget]): Charged for every request beyond the first (failover
+                or hedge); None sends them unmetered
+
+        Returns:
+            requests.Response: The first usable response; a 5xx response only if every attempt failed
+
+        Raises:
+            requests.exceptions.RequestException: When no endpoint could be reached
+        """
+        order = self.ranked()
+        with self._lock:
+            self.total += 1
+        delay = self._hedge_delay(order[0])
+        if delay is not None:
+            return self._get_hedged(order[0], order[1], params, timeout, delay, budget)
+
+        last_error: Optional[Exception] = None
+        response = None
+        for attempt, url in enumerate(order[:2]):
+            if attempt and budget is not None and not budget():
+                break
+            try:
+                response = self._attempt(url, params, timeout)
+            except requests.exceptions.RequestException as e:
+                last_error = e
+                continue
+            if not _is_server_error(response):
+                return response
+        if response is not None:
+            return response
+        raise last_error
+
+    def _get_hedged(self, primary: str, secondary: str, params: Dict[str, Any], timeout: float,
+                    delay: float, budget: Optional[Budget]) -> requests.Response:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix='geocode-hedge')
+            executor = self._executor
+        started = threading.Event()
+
+        def send_primary() -> requests.Response:
+            started.set()
+            return self._attempt(primary, params, timeout)
+
+        first = executor.submit(send_primary)
+        # Time queued for a pool thread is not endpoint latency and must not trigger a hedge
+        started.wait()
+        try:
+            response = first.result(timeout=delay)
+            if not _is_server_error(response):
+                return response
+        except FutureTimeoutError:
+            pass
+        except requests.exceptions.RequestException:
+            pass
+
+        if budget is not None and not budget():
+            # No budget for a second request: settle for the primary's outcome
+            return first.result()
+        with self._lock:
+            self.hedged += 1
+        pending = {first, executor.submit(self._attempt, secondary, params, timeout)}
+        last_error: Optional[Exception] = None
+        response = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    response = future.result()
+                except requests.exceptions.RequestException as e:
+                    last_error = e
+                    continue
+                if not _is_server_error(response):
+                    # The slower request finishes in the background; its latency is still recorded
+                    return response
+        if response is not None:
+            return response
+        raise last_error
@@ -0,0 +1,245 @@
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from integrations.geocode_util import NoGeocodingResultsError
+from utils.metrics import PipelineMetrics
+
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+DEFAULT_NEGATIVE_TTL_SECONDS = 24 * 3600
+
+Geocoder = Callable[[str], List[Dict[str, str]]]
+
+def normalize_address(address: str) -> str:
+    """
+    Returns the cache key for an address: whitespace collapsed and case folded.
+
+    Args:
+        address (str): The address as it appears in the input
+
+    Returns:
+        str: The normalized address
+    """
+    return ' '.join(address.split()).casefold()
+
+class CacheEntry(NamedTuple):
+    """A cached lookup: results for a hit, or the error message of a definitive no-result."""
+    results: Optional[List[Dict[str, str]]]
+    error: Optional[str]
+    expires_at: float
+
+    @property
+    def negative(self) -> bool:
+        return self.results is None
+
+class GeocodeCache:
+    """
+    SQLite-backed cache of geocoding results keyed by normalized address.
+
+    Positive entries hold the candidates returned by get_structured_address.
+    Negative entries record addresses LocationIQ definitively could not geocode
+    and expire after their own, usually shorter, TTL. The cache is safe to share
+    between threads.
+
+    Args:
+        path (str): SQLite database file, or ':memory:' for a per-process cache
+        ttl (float): Lifetime of positive entries in seconds
+        negative_ttl (float): Lifetime of negative entries in seconds
+    """
+
+    def __init__(self, path: str = ':memory:', ttl: float = DEFAULT_TTL_SECONDS,
+                 negative_ttl: float = DEFAULT_NEGATIVE_TTL_SECONDS):
+        if ttl <= 0 or negative_ttl <= 0:
+            raise ValueError("Cache TTLs must be positive")
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        if path != ':memory:':
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL' if path != ':memory:' else 'PRAGMA journal_mode=MEMORY')
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS geocode_cache ('
+            ' address_key TEXT PRIMARY KEY,'
+            ' results TEXT,'
+            ' error TEXT,'
+            ' expires_at REAL NOT NULL'
+            ')'
+        )
+        self._connection.commit()
+
+    @classmethod
+    def from_env(cls, default_path: str = ':memory:') -> 'GeocodeCache':
+        """
+        Opens the cache configured by GEOCODE_CACHE_PATH, GEOCODE_CACHE_TTL_SECONDS and
+        GEOCODE_NEGATIVE_CACHE_TTL_SECONDS.
+
+        Args:
+            default_path (str): Database path used when GEOCODE_CACHE_PATH is not set
+
+        Returns:
+            GeocodeCache: The opened cache
+        """
+        return cls(
+            os.getenv('GEOCODE_CACHE_PATH', default_path),
+            ttl=float(os.getenv('GEOCODE_CACHE_TTL_SECONDS', DEFAULT_TTL_SECONDS)),
+            negative_ttl=float(os.getenv('GEOCODE_NEGATIVE_CACHE_TTL_SECONDS', DEFAULT_NEGATIVE_TTL_SECONDS)),
+        )
+
+    def get(self, address: str) -> Optional[CacheEntry]:
+        """
+        Looks up an address.
+
+        Args:
+            address (str): The address to look up
+
+        Returns:
+            Optional[CacheEntry]: The unexpired entry, or None on a miss
+        """
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT results, error, expires_at FROM geocode_cache WHERE address_key = ? AND expires_at > ?',
+                (normalize_address(address), time.time())
+            ).fetchone()
+        if row is None:
+            return None
+        results, error, expires_at = row
+        return CacheEntry(json.loads(results) if results is not None else None, error, expires_at)
+
+    def put(self, address: str, results: List[Dict[str, str]], ttl: Optional[float] = None) -> None:
+        """Stores the geocoding results for an address."""
+        self.put_many([(address, results)], ttl)
+
+    def put_negative(self, address: str, error: str, ttl: Optional[float] = None) -> None:
+        """Records that an address has no geocoding results."""
+        expires_at = time.time() + (ttl if ttl is not None else self.negative_ttl)
+        with self._lock:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO geocode_cache (address_key, results, error, expires_at) VALUES (?, NULL, ?, ?)',
+                (normalize_address(address), error, expires_at)
+            )
+            self._connection.commit()
+
+    def put_many(self, entries: Iterable[Tuple[str, List[Dict[str, str]]]], ttl: Optional[float] = None,
+                 replace: bool = True) -> int:
+        """
+        Stores geocoding results for many addresses in one transaction.
+
+        Args:
+            entries (Iterable[Tuple[str, List[Dict[str, str]]]]): (address, results) pairs
+            ttl (Optional[float]): Lifetime in seconds, defaults to the cache TTL
+            replace (bool): Overwrite existing entries; when False only missing or
+                expired addresses are written
+
+        Returns:
+            int: Number of entries written
+        """
+        expires_at = time.time() + (ttl if ttl is not None else self.ttl)
+        rows = [
+            (normalize_address(address), json.dumps(results, ensure_ascii=False), expires_at)
+            for address, results in entries
+        ]
+        if replace:
+            statement = ('INSERT OR REPLACE INTO geocode_cache (address_key, results, error, expires_at) '
+                         'VALUES (?, ?, NULL, ?)')
+        else:
+            statement = ('INSERT INTO geocode_cache (address_key, results, error, expires_at) VALUES (?, ?, NULL, ?) '
+                         'ON CONFLICT(address_key) DO UPDATE SET results = excluded.results, error = NULL, '
+                         'expires_at = excluded.expires_at WHERE geocode_cache.expires_at <= ?')
+            now = time.time()
+            rows = [row + (now,) for row in rows]
+        with self._lock:
+            before = self._connection.total_changes
+            self._connection.executemany(statement, rows)
+            self._connection.commit()
+            return self._connection.total_changes - before
+
+    def iter_entries(self) -> Iterator[Tuple[str, List[Dict[str, str]]]]:
+        """
+        Yields (normalized address, results) for every unexpired positive entry.
+
+        Rows are fetched in pages so the cache can be exported while it is in use.
+        """
+        last_key = ''
+        while True:
+            with self._lock:
+                rows = self._connection.execute(
+                    'SELECT address_key, results FROM geocode_cache '
+                    'WHERE address_key > ? AND results IS NOT NULL AND expires_at > ? '
+                    'ORDER BY address_key LIMIT 1000',
+                    (last_key, time.time())
+                ).fetchall()
+            if not rows:
+                return
+            for address_key, results in rows:
+                yield address_key, json.loads(results)
+            last_key = rows[-1][0]
+
+    def purge_expired(self) -> int:
+        """
+        Deletes expired entries.
+
+        Returns:
+            int: Number of entries deleted
+        """
+        with self._lock:
+            cursor = self._connection.execute('DELETE FROM geocode_cache WHERE expires_at <= ?', (time.time(),))
+            self._connection.commit()
+        return cursor.rowcount
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute(
+                'SELECT COUNT(*) FROM geocode_cache WHERE expires_at > ?', (time.time(),)
+            ).fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+class CachedGeocoder:
+    """
+    Geocoder wrapper that answers repeat lookups from a GeocodeCache.
+
+    Successful lookups are cached with the cache TTL. Definitive no-result
+    responses (NoGeocodingResultsError) are cached as negative entries with the
+    negative TTL and re-raised on later lookups without calling the API.
+    Transient failures such as timeouts, HTTP errors or rate limiting are never
+    cached.
+
+    Args:
+        geocoder (Geocoder): The underlying geocoder, e.g. get_structured_address
+        cache (GeocodeCache): The cache to read and populate
+        metrics (Optional[PipelineMetrics]): Registry receiving cache hit and miss counts
+    """
+
+    def __init__(self, geocoder: Geocoder, cache: GeocodeCache, metrics: Optional[PipelineMetrics] = None):
+        self.geocoder = geocoder
+        self.cache = cache
+        self.metrics = metrics
+
+    def __call__(self, address: str) -> List[Dict[str, str]]:
+        entry = self.cache.get(address)
+        if entry is not None:
+            if self.metrics is not None:
+                self.metrics.incr('geocode_cache_hits_total', kind='negative' if entry.negative else 'positive')
+            if entry.negative:
+                raise NoGeocodingResultsError(entry.error)
+            return entry.results
+
+        if self.metrics is not None:
+            self.metrics.incr('geocode_cache_misses_total')
+        try:
+            results = self.geocoder(address)
+        except NoGeocodingResultsError as e:
+            self.cache.put_negative(address, str(e))
+            raise
+        if results:
+            self.cache.put(address, results)
+        return results
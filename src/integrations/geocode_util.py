@@ -1,27 +1,150 @@
+import atexit
 import requests
 import os
-from dotenv import load_dotenv
+import threading
 import time
-from typing import Dict, List
+from collections.abc import Mapping
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Optional, Tuple
 
-load_dotenv()
+from integrations.endpoint_router import Budget, EndpointRouter
+
+DEFAULT_API_URL = "https://us1.locationiq.com/v1/search.php"
+EU_API_URL = "https://eu1.locationiq.com/v1/search.php"
+DEFAULT_RATE_LIMIT_DELAY = 0.1
+
+_router: Optional[EndpointRouter] = None
+_router_config: Optional[Tuple[Any, ...]] = None
+_router_lock = threading.Lock()
 
 class GeocodingError(Exception):
     """Custom exception for geocoding errors"""
     pass
 
-def get_structured_address(partial_address: str) -> List[Dict[str, str]]:
+class NoGeocodingResultsError(GeocodingError):
+    """Raised when LocationIQ definitively has no usable result for an address"""
+    pass
+
+class RateLimitedError(GeocodingError):
+    """
+    Raised when LocationIQ answers HTTP 429 Too Many Requests.
+
+    Args:
+        message (str): The error message
+        retry_after (Optional[float]): Seconds the API asked to wait before retrying, if it said
+    """
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class GeocodingTimeoutError(GeocodingError):
+    """Raised when the request to LocationIQ times out"""
+    pass
+
+def _is_unable_to_geocode(response) -> bool:
+    """LocationIQ answers 404 with {"error": "Unable to geocode"} when nothing matches."""
+    if response.status_code != 404:
+        return False
+    try:
+        return response.json().get('error') == 'Unable to geocode'
+    except (ValueError, AttributeError):
+        return False
+
+def _retry_after(response) -> Optional[float]:
+    """Parses a Retry-After header given in seconds or as an HTTP date."""
+    headers = getattr(response, 'headers', None)
+    if not isinstance(headers, Mapping):
+        return None
+    value = headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(retry_at.timestamp() - time.time(), 0.0)
+
+def load_environment() -> None:
+    """
+    Loads LOCATIONIQ_* settings from the nearest .env file into the environment.
+
+    Entry points call this explicitly so that importing the module has no side effects.
+    Variables already set in the environment take precedence.
+    """
+    from dotenv import load_dotenv
+    # Without a path, python-dotenv searches upwards from this module's directory
+    load_dotenv()
+
+def _send(url: str, params: Dict[str, Any], timeout: float) -> requests.Response:
+    return requests.get(url, params=params, timeout=timeout)
+
+def get_router() -> EndpointRouter:
+    """
+    Returns the process-wide endpoint router for the configured endpoints.
+
+    LOCATIONIQ_ENDPOINTS holds a comma-separated list of search URLs, e.g.
+    EU_API_URL and DEFAULT_API_URL; without it LOCATIONIQ_API_URL (or the US
+    endpoint) is used alone. LOCATIONIQ_HEDGE=1 enables hedged requests and
+    LOCATIONIQ_HEDGE_MAX_RATIO bounds their share. Its pool for hedgeable
+    requests is sized for GEOCODE_MAX_CONCURRENCY callers and their hedges.
+    The router, and the latency history it has collected, is kept until the
+    configuration changes.
+    """
+    global _router, _router_config
+    endpoints = os.getenv('LOCATIONIQ_ENDPOINTS')
+    if endpoints:
+        urls = [url.strip() for url in endpoints.split(',') if url.strip()]
+    else:
+        urls = [os.getenv('LOCATIONIQ_API_URL', DEFAULT_API_URL)]
+    config = (
+        tuple(urls),
+        os.getenv('LOCATIONIQ_HEDGE', '').lower() in ('1', 'true', 'yes'),
+        float(os.getenv('LOCATIONIQ_HEDGE_MAX_RATIO', 0.1)),
+        2 * max(int(os.getenv('GEOCODE_MAX_CONCURRENCY') or 1), 4),
+    )
+    with _router_lock:
+        if _router is None or _router_config != config:
+            if _router is not None:
+                _router.close()
+            _router = EndpointRouter(list(config[0]), _send, hedge=config[1], max_hedge_ratio=config[2],
+                                     max_workers=config[3])
+            _router_config = config
+        return _router
+
+def close_router() -> None:
+    """Shuts down the process-wide endpoint router, if one was created."""
+    global _router, _router_config
+    with _router_lock:
+        if _router is not None:
+            _router.close()
+        _router = None
+        _router_config = None
+
+atexit.register(close_router)
+
+def get_structured_address(partial_address: str, budget: Optional[Budget] = None) -> List[Dict[str, str]]:
     """
     Given a partial address, returns all structured addresses using LocationIQ API.
     
     Args:
         partial_address (str): The partial address to geocode
+        budget (Optional[Budget]): Charged for each failover or hedged request the router sends
+            beyond the first, e.g. DailyQuota.acquire; the extra request is skipped when it
+            returns False
         
     Returns:
         List[Dict[str, str]]: List of dictionaries containing full_address, latitude, and longitude
         
     Raises:
-        GeocodingError: When geocoding fails or API returns no results
+        NoGeocodingResultsError: When the API returns no results or no usable coordinates
+        RateLimitedError: When the API rate limits the request
+        GeocodingTimeoutError: When the request times out
+        GeocodingError: When geocoding fails for any other reason
     """
     if not partial_address or not partial_address.strip():
         raise GeocodingError("Address cannot be empty")
@@ -30,7 +153,9 @@ def get_structured_address(partial_address: str) -> List[Dict[str, str]]:
     if not api_key:
         raise GeocodingError("LOCATIONIQ_API_KEY not found in environment variables")
     
-    url = "https://us1.locationiq.com/v1/search.php"
+    # LOCATIONIQ_API_URL or LOCATIONIQ_ENDPOINTS also let tests and benchmarks point at local stand-ins
+    router = get_router()
+    rate_limit_delay = float(os.getenv('LOCATIONIQ_RATE_LIMIT_DELAY', DEFAULT_RATE_LIMIT_DELAY))
     
     params = {
         'key': api_key,
@@ -40,13 +165,18 @@ def get_structured_address(partial_address: str) -> List[Dict[str, str]]:
     }
     
     try:
-        time.sleep(0.1)  # Respect rate limits
-        response = requests.get(url, params=params, timeout=10)
+        time.sleep(rate_limit_delay)  # Respect rate limits
+        response = router.get(params, timeout=10, budget=budget)
+        if _is_unable_to_geocode(response):
+            raise NoGeocodingResultsError(f"No geocoding results found for address: {partial_address}")
+        if response.status_code == 429:
+            raise RateLimitedError(f"API request failed for address '{partial_address}': 429 Too Many Requests",
+                                   retry_after=_retry_after(response))
         response.raise_for_status()
         data = response.json()
         
         if not data or len(data) == 0:
-            raise GeocodingError(f"No geocoding results found for address: {partial_address}")
+            raise NoGeocodingResultsError(f"No geocoding results found for address: {partial_address}")
         
         results = []
         for result in data:
@@ -61,10 +191,14 @@ def get_structured_address(partial_address: str) -> List[Dict[str, str]]:
                 })
         
         if not results:
-            raise GeocodingError(f"No valid coordinates returned for address: {partial_address}")
+            raise NoGeocodingResultsError(f"No valid coordinates returned for address: {partial_address}")
         
         return results
     
+    except GeocodingError:
+        raise
+    except requests.exceptions.Timeout as e:
+        raise GeocodingTimeoutError(f"API request failed for address '{partial_address}': {str(e)}")
     except requests.exceptions.RequestException as e:
         raise GeocodingError(f"API request failed for address '{partial_address}': {str(e)}")
     except ValueError as e:
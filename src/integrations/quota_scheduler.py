@@ -0,0 +1,407 @@
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+
+from integrations.geocode_cache import GeocodeCache, normalize_address
+from integrations.geocode_util import GeocodingError
+from utils.fs import ensure_parent_directory
+from utils.metrics import PipelineMetrics
+
+logger = logging.getLogger(__name__)
+
+Geocoder = Callable[[str], List[Dict[str, str]]]
+
+# Ordered list of priority rules applied to records competing for API quota;
+# earlier rules take precedence. Each rule maps to:
+#   field:  record field the rule reads
+#   order:  'desc' (default) puts larger values first, 'asc' smaller ones
+#   format: strptime format for date strings, compared as datetimes
+#   values: preferred values, highest priority first; other values follow
+# Records missing the field, or whose value doesn't parse, sort after the rest.
+DEFAULT_PRIORITY_RULES: List[Dict[str, Any]] = [
+    {'field': 'date_scraped', 'format': '%d/%m/%Y %H:%M:%S', 'order': 'desc'},
+]
+
+class QuotaExceededError(GeocodingError):
+    """Raised instead of calling the API when the daily request quota is used up."""
+    pass
+
+class DailyQuota:
+    """
+    Tracks API requests against a daily limit that resets at midnight UTC.
+
+    The count is persisted to a small JSON state file so DAG runs and the
+    streaming processor share the day's budget. Every claim re-reads and
+    updates the file under an exclusive lock on <state_path>.lock, so several
+    processes can draw from one state file without losing updates.
+
+    Args:
+        limit (int): Requests allowed per day
+        state_path (Optional[str]): JSON file holding the day's usage; None keeps it in memory
+        reserve (int): Requests held back from the pipeline, e.g. for manual lookups
+    """
+
+    def __init__(self, limit: int, state_path: Optional[str] = None, reserve: int = 0):
+        if limit <= 0:
+            raise ValueError("Daily quota must be positive")
+        if reserve < 0 or reserve >= limit:
+            raise ValueError("Quota reserve must be between 0 and the daily limit")
+        self.limit = limit
+        self.state_path = state_path
+        self.reserve = reserve
+        self._lock = threading.Lock()
+        self._day = self._today()
+        self._used = 0
+        # Validates an existing state file up front
+        with self._lock, self._state_locked():
+            pass
+
+    @classmethod
+    def from_env(cls, default_state_path: Optional[str] = None) -> Optional['DailyQuota']:
+        """
+        Builds the quota configured by LOCATIONIQ_DAILY_QUOTA, LOCATIONIQ_QUOTA_RESERVE and
+        GEOCODE_QUOTA_STATE_PATH.
+
+        Args:
+            default_state_path (Optional[str]): State file used when GEOCODE_QUOTA_STATE_PATH is not set
+
+        Returns:
+            Optional[DailyQuota]: The quota, or None when no daily limit is configured
+        """
+        limit = os.getenv('LOCATIONIQ_DAILY_QUOTA')
+        if not limit:
+            return None
+        return cls(
+            int(limit),
+            state_path=os.getenv('GEOCODE_QUOTA_STATE_PATH', default_state_path),
+            reserve=int(os.getenv('LOCATIONIQ_QUOTA_RESERVE', 0)),
+        )
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.fromtimestamp(time.time(), tz=timezone.utc).strftime('%Y-%m-%d')
+
+    def _roll_over(self) -> None:
+        today = self._today()
+        if today != self._day:
+            self._day = today
+            self._used = 0
+
+    def _load(self) -> None:
+        """Adopts the day's usage recorded in the state file, if any."""
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as file:
+                state = json.load(file)
+        except FileNotFoundError:
+            return
+        except (json.JSONDecodeError, IOError) as e:
+            raise ValueError(f"Invalid quota state file {self.state_path}: {str(e)}")
+        if state.get('date') == self._day:
+            self._used = int(state.get('used', 0))
+
+    @contextmanager
+    def _state_locked(self) -> Iterator[None]:
+        """Refreshes the usage from the state file and holds its lock; call with self._lock held."""
+        self._roll_over()
+        if not self.state_path:
+            yield
+            return
+        lock_path = f'{self.state_path}.lock'
+        ensure_parent_directory(lock_path)
+        with open(lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                self._load()
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def remaining(self) -> int:
+        """Returns the number of requests still available today."""
+        with self._lock, self._state_locked():
+            return max(self.limit - self.reserve - self._used, 0)
+
+    def acquire(self) -> bool:
+        """
+        Claims one request from today's budget.
+
+        Returns:
+            bool: True if the request may be made, False when the quota is used up
+        """
+        with self._lock, self._state_locked():
+            if self._used >= self.limit - self.reserve:
+                return False
+            self._used += 1
+            self._save()
+            return True
+
+    def _save(self) -> None:
+        if not self.state_path:
+            return
+        ensure_parent_directory(self.state_path)
+        temp_path = f'{self.state_path}.tmp'
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                json.dump({'date': self._day, 'used': self._used}, file)
+            os.replace(temp_path, self.state_path)
+        except IOError as e:
+            raise OSError(f"Failed to write to file {self.state_path}: {str(e)}")
+
+class MeteredGeocoder:
+    """
+    Geocoder wrapper that charges every call to a DailyQuota.
+
+    Args:
+        geocoder (Geocoder): The underlying geocoder
+        quota (DailyQuota): The budget to draw from
+        metrics (Optional[PipelineMetrics]): Registry receiving the remaining quota gauge
+    """
+
+    def __init__(self, geocoder: Geocoder, quota: DailyQuota, metrics: Optional[PipelineMetrics] = None):
+        self.geocoder = geocoder
+        self.quota = quota
+        self.metrics = metrics
+
+    def __call__(self, address: str) -> List[Dict[str, str]]:
+        acquired = self.quota.acquire()
+        if self.metrics is not None:
+            self.metrics.set_gauge('geocode_quota_remaining', self.quota.remaining())
+        if not acquired:
+            raise QuotaExceededError(f"Daily geocoding quota of {self.quota.limit} requests exhausted")
+        return self.geocoder(address)
+
+def compile_priority(rules: List[Dict[str, Any]]) -> Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]]:
+    """
+    Compiles priority rules into a function ordering records by priority.
+
+    Args:
+        rules (List[Dict[str, Any]]): Priority rules, see DEFAULT_PRIORITY_RULES
+
+    Returns:
+        Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]]: Function returning the
+            records sorted from highest to lowest priority; ties keep their input order
+
+    Raises:
+        ValueError: When a rule is malformed
+    """
+    passes: List[Tuple[Callable[[Dict[str, Any]], Any], bool]] = []
+
+    for rule in rules:
+        unknown = set(rule) - {'field', 'order', 'format', 'values'}
+        if unknown:
+            raise ValueError(f"Unknown priority rule options: {sorted(unknown)}")
+        if 'field' not in rule:
+            raise ValueError("Priority rules need a 'field'")
+        order = rule.get('order', 'desc')
+        if order not in ('asc', 'desc'):
+            raise ValueError(f"Priority rule order must be 'asc' or 'desc', got {order!r}")
+
+        field = rule['field']
+        date_format = rule.get('format')
+        values = rule.get('values')
+
+        if values is not None:
+            ranks = {value: rank for rank, value in enumerate(values)}
+
+            def key(record: Dict[str, Any], field: str = field, ranks: Dict[Any, int] = ranks) -> Any:
+                return ranks.get(record.get(field), len(ranks))
+            passes.append((key, False))
+            continue
+
+        def key(record: Dict[str, Any], field: str = field, date_format: Optional[str] = date_format) -> Any:
+            value = record.get(field)
+            if value is None or date_format is None:
+                return value
+            try:
+                return datetime.strptime(value, date_format)
+            except (TypeError, ValueError):
+                return None
+        passes.append((key, order == 'desc'))
+
+    def prioritize(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        ordered = list(records)
+        # Stable sorts from the least to the most significant rule
+        for key, descending in reversed(passes):
+            keyed = [(key(record), record) for record in ordered]
+            present = [item for item in keyed if item[0] is not None]
+            present.sort(key=lambda item: item[0], reverse=descending)
+            ordered = [record for _, record in present] + [record for value, record in keyed if value is None]
+        return ordered
+
+    return prioritize
+
+class DeferredQueue:
+    """
+    JSON Lines file holding records deferred to a later run.
+
+    Args:
+        path (str): The queue file
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self) -> List[Dict[str, Any]]:
+        """
+        Reads the queued records.
+
+        Returns:
+            List[Dict[str, Any]]: The records, oldest deferral first
+
+        Raises:
+            ValueError: When the queue file is corrupt
+        """
+        if not os.path.exists(self.path):
+            return []
+        records = []
+        with open(self.path, 'r', encoding='utf-8') as file:
+            for line_number, line in enumerate(file, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"Invalid JSON on line {line_number} of deferred queue {self.path}: {str(e)}")
+        return records
+
+    def replace(self, records: Iterable[Dict[str, Any]]) -> int:
+        """
+        Atomically replaces the queue contents.
+
+        Args:
+            records (Iterable[Dict[str, Any]]): The records to queue
+
+        Returns:
+            int: Number of records queued
+
+        Raises:
+            OSError: When the file cannot be written
+        """
+        ensure_parent_directory(self.path)
+        temp_path = f'{self.path}.tmp'
+        count = 0
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                for record in records:
+                    file.write(json.dumps(record, ensure_ascii=False))
+                    file.write('\n')
+                    count += 1
+            os.replace(temp_path, self.path)
+        except IOError as e:
+            raise OSError(f"Failed to write to file {self.path}: {str(e)}")
+        return count
+
+def _address(record: Dict[str, Any]) -> str:
+    address = record.get('project_address')
+    return address.strip() if isinstance(address, str) else ''
+
+def _status(enriched: Any) -> Optional[str]:
+    return enriched.get('geocoding_status') if isinstance(enriched, dict) else getattr(enriched, 'status', None)
+
+class QuotaScheduler:
+    """
+    Decides which records to geocode with the remaining daily quota.
+
+    Records that cost no API request (no address, or an address already in the
+    cache) are always processed. The remaining budget goes to uncached records
+    in priority order, counting each distinct normalized address once; records
+    that don't fit are deferred to a persisted queue and retried, together with
+    the next run's input, on the next run.
+
+    Args:
+        quota (DailyQuota): The daily request budget
+        cache (Optional[GeocodeCache]): Cache used to recognise free lookups
+        rules (Optional[List[Dict[str, Any]]]): Priority rules, defaults to DEFAULT_PRIORITY_RULES
+        queue (Optional[DeferredQueue]): Persisted queue of deferred records
+        metrics (Optional[PipelineMetrics]): Registry receiving deferral counts and the remaining quota
+    """
+
+    def __init__(self, quota: DailyQuota, cache: Optional[GeocodeCache] = None,
+                 rules: Optional[List[Dict[str, Any]]] = None, queue: Optional[DeferredQueue] = None,
+                 metrics: Optional[PipelineMetrics] = None):
+        self.quota = quota
+        self.cache = cache
+        self.queue = queue
+        self.metrics = metrics
+        self._prioritize = compile_priority(DEFAULT_PRIORITY_RULES if rules is None else rules)
+
+    def plan(self, records: Iterable[Any]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Splits records into those to process now and those to defer.
+
+        Args:
+            records (Iterable[Any]): Candidate records; non-dict records are dropped
+
+        Returns:
+            Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]: Records to process, free
+                ones first and then by priority, and records to defer, by priority
+        """
+        free, billable = [], []
+        for record in records:
+            if not isinstance(record, dict):
+                logger.warning(f"Skipping non-dict record: {type(record)}")
+                continue
+            address = _address(record)
+            if not address or (self.cache is not None and self.cache.get(address) is not None):
+                free.append(record)
+            else:
+                billable.append(record)
+
+        budget = self.quota.remaining()
+        scheduled, deferred = [], []
+        claimed = set()
+        for record in self._prioritize(billable):
+            key = normalize_address(_address(record))
+            if key not in claimed and len(claimed) < budget:
+                claimed.add(key)
+            if key in claimed:
+                scheduled.append(record)
+            else:
+                deferred.append(record)
+        return free + scheduled, deferred
+
+    def run(self, transformer: Any, records: Iterable[Any]) -> List[Any]:
+        """
+        Enriches as many records as the quota allows and defers the rest.
+
+        Records already in the deferred queue are merged with the input, without
+        duplicates. Records the transformer reports as 'quota_exceeded', because
+        the budget ran out mid-run, are deferred as well.
+
+        Args:
+            transformer (AddressTransformer): Transformer metering its API calls with the same quota
+            records (Iterable[Any]): The run's input records
+
+        Returns:
+            List[Any]: The enriched records that were processed
+        """
+        pending = self.queue.load() if self.queue is not None else []
+        seen = {json.dumps(record, sort_keys=True) for record in pending}
+        for record in records:
+            fingerprint = json.dumps(record, sort_keys=True)
+            if fingerprint not in seen:
+                seen.add(fingerprint)
+                pending.append(record)
+
+        scheduled, deferred = self.plan(pending)
+        enriched_records = []
+        for record, enriched in zip(scheduled, transformer.transform(iter(scheduled))):
+            if _status(enriched) == 'quota_exceeded':
+                deferred.append(record)
+            else:
+                enriched_records.append(enriched)
+
+        if self.queue is not None:
+            self.queue.replace(deferred)
+        if self.metrics is not None:
+            self.metrics.incr('records_deferred_total', len(deferred), stage='transform')
+            self.metrics.set_gauge('geocode_quota_remaining', self.quota.remaining())
+        if deferred:
+            logger.warning(f"Deferred {len(deferred)} records to the next run; daily geocoding quota exhausted")
+        return enriched_records
@@ -0,0 +1,107 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import threading
+
+from integrations.geocode_cache import normalize_address
+from utils.metrics import PipelineMetrics
+
+class _Call:
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+class SingleFlight:
+    """
+    Suppresses duplicate concurrent calls for the same key.
+
+    The first caller for a key runs the function; callers arriving while it is
+    in flight wait for it and receive the same result, or the same exception.
+    Once the call finishes the key is forgotten, so later callers run the
+    function again (caching is left to the function itself).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Runs fn once per key among concurrent callers.
+
+        Args:
+            key (str): Identifies duplicate calls
+            fn (Callable[[], Any]): The function to run
+
+        Returns:
+            Tuple[Any, bool]: The result and whether it was shared with another caller
+
+        Raises:
+            Exception: Whatever fn raised, re-raised in every waiting caller
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, call.waiters > 0
+
+    def in_flight(self) -> int:
+        """Returns the number of keys currently being computed."""
+        with self._lock:
+            return len(self._calls)
+
+class CoalescingGeocoder:
+    """
+    Geocoder wrapper that keeps at most one lookup per normalized address in flight.
+
+    Concurrent lookups of the same address wait for the first one and share its
+    candidates (the same list object) or its GeocodingError. This catches the
+    duplicates a cache cannot, because the first response hasn't been stored yet.
+
+    Args:
+        geocoder (Callable[[str], List[Dict[str, str]]]): The underlying geocoder
+        metrics (Optional[PipelineMetrics]): Registry receiving the number of coalesced lookups
+    """
+
+    def __init__(self, geocoder: Callable[[str], List[Dict[str, str]]], metrics: Optional[PipelineMetrics] = None):
+        self.geocoder = geocoder
+        self.metrics = metrics
+        self._flight = SingleFlight()
+
+    def __call__(self, address: str) -> List[Dict[str, str]]:
+        ran = False
+
+        def lookup() -> List[Dict[str, str]]:
+            nonlocal ran
+            ran = True
+            return self.geocoder(address)
+
+        try:
+            results, _ = self._flight.do(normalize_address(address), lookup)
+        finally:
+            if not ran and self.metrics is not None:
+                self.metrics.incr('geocode_coalesced_total')
+        return results
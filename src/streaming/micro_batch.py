@@ -0,0 +1,468 @@
+"""
+Continuously enriches JSON files dropped into a directory, in micro-batches.
+
+Usage (from the repository root):
+
+    PYTHONPATH=src python -m streaming.micro_batch --root data/stream --batch-size 500 --max-latency 5
+
+Producers drop files into <root>/incoming (writing to a dot-file or *.tmp name
+and renaming when complete); enriched batches appear in <root>/output.
+"""
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, TextIO
+import argparse
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+import uuid
+
+from integrations.quota_scheduler import DeferredQueue, QuotaScheduler
+from transformers.address_transformer import AddressTransformer
+from utils.dead_letter import DeadLetterWriter
+from utils.metrics import PipelineMetrics
+from utils.reader import read_json
+from utils.schema import Validator, compile_schema, INPUT_RECORD_SCHEMA
+from utils.writer import write_json
+
+logger = logging.getLogger(__name__)
+
+def _move_no_clobber(source: str, destination: str) -> None:
+    """
+    Moves source to destination, failing instead of overwriting an existing file.
+
+    Raises:
+        FileExistsError: When destination already exists
+        FileNotFoundError: When source no longer exists
+    """
+    # Unlike rename, link refuses to replace an existing destination
+    os.link(source, destination)
+    try:
+        os.remove(source)
+    except FileNotFoundError:
+        pass  # a concurrent claim of the same file removed it first
+
+def _try_lock(file: TextIO) -> bool:
+    """Takes an exclusive lock on an open file without waiting."""
+    try:
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+    return True
+
+class PendingFile:
+    """A claimed input file and its valid records."""
+    __slots__ = ('name', 'dropped_at', 'records')
+
+    def __init__(self, name: str, dropped_at: float, records: List[Dict[str, Any]]):
+        self.name = name
+        self.dropped_at = dropped_at
+        self.records = records
+
+class MicroBatchProcessor:
+    """
+    Watches <root>/incoming and enriches new files in micro-batches.
+
+    Each processor has an owner id and holds an exclusive lock on
+    <root>/owners/<owner>.lock for its lifetime. A file is claimed by an
+    atomic rename into the processor's own <root>/processing/<owner>
+    directory under a name prefixed with its drop time (mtime in
+    nanoseconds), so with several processors on the same directory each file
+    is claimed exactly once, and a re-delivered file with a reused name never
+    clobbers an earlier drop. Only enough files to fill the next batch are
+    claimed and read; the rest wait in incoming. Claimed files are grouped
+    until the batch holds batch_size records or its oldest file was dropped
+    max_latency seconds ago. Files are never split across batches.
+
+    Before a batch is processed its file list is written to a manifest in
+    <root>/batches/<owner>. The output name is derived from the file names, so
+    after a crash the manifest is replayed and overwrites the same output file
+    instead of producing a duplicate. recover() only adopts the claims and
+    manifests of owners whose lock is free, i.e. whose process has exited, so
+    starting a processor never takes over a live processor's work. The lock is
+    an flock, so processors sharing a root must run on one host or on a file
+    system with working flock. Processed files move to <root>/done; files
+    whose batch fails, or that cannot be read, move to <root>/failed. Invalid
+    records go to <root>/dead_letter/<claimed file>.jsonl.
+
+    When the transformer meters a daily quota, batches are enriched through a
+    QuotaScheduler: records over the quota are deferred to
+    <root>/deferred/stream.jsonl and merged into later batches instead of being
+    written as final 'quota_exceeded' output.
+
+    Args:
+        root (str): Base directory holding the incoming, processing, batches, done, failed,
+            dead_letter and output directories
+        transformer (AddressTransformer): Transformer enriching each batch; compact mode is
+            recommended
+        batch_size (int): Records per batch at which it is flushed
+        max_latency (float): Seconds after the oldest file's drop at which a batch is flushed
+        poll_interval (float): Seconds between directory scans
+        min_file_age (float): Seconds a file must be unmodified before it is claimed
+        validator (Optional[Validator]): Input record validator, defaults to INPUT_RECORD_SCHEMA
+        metrics (Optional[PipelineMetrics]): Registry receiving file, batch and latency metrics
+        scheduler (Optional[QuotaScheduler]): Scheduler for quota-limited transformers; by default
+            one with the default priority rules is built when the transformer has a quota
+    """
+
+    def __init__(self, root: str, transformer: AddressTransformer, batch_size: int = 500,
+                 max_latency: float = 5.0, poll_interval: float = 1.0, min_file_age: float = 0.0,
+                 validator: Optional[Validator] = None, metrics: Optional[PipelineMetrics] = None,
+                 scheduler: Optional[QuotaScheduler] = None):
+        if batch_size <= 0:
+            raise ValueError("Batch size must be positive")
+        if max_latency < 0 or poll_interval <= 0:
+            raise ValueError("Latency bound must be non-negative and poll interval positive")
+        self.root = root
+        self.transformer = transformer
+        self.batch_size = batch_size
+        self.max_latency = max_latency
+        self.poll_interval = poll_interval
+        self.min_file_age = min_file_age
+        self.validator = validator if validator is not None else compile_schema(INPUT_RECORD_SCHEMA)
+        self.metrics = metrics
+        if scheduler is None and transformer.quota is not None:
+            scheduler = QuotaScheduler(transformer.quota, transformer.cache, metrics=metrics,
+                                       queue=DeferredQueue(os.path.join(root, 'deferred', 'stream.jsonl')))
+        self.scheduler = scheduler
+        self._pending: List[PendingFile] = []
+        self.owner = f'{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}'
+        self.processing_dir = os.path.join(self._dir('processing'), self.owner)
+        self.batches_dir = os.path.join(self._dir('batches'), self.owner)
+        for directory in ('incoming', 'done', 'failed', 'output', 'owners'):
+            os.makedirs(self._dir(directory), exist_ok=True)
+        os.makedirs(self.processing_dir)
+        os.makedirs(self.batches_dir)
+        self._lease: Optional[TextIO] = open(self._lease_path(self.owner), 'a')
+        _try_lock(self._lease)
+
+    def _dir(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    def _lease_path(self, owner: str) -> str:
+        return os.path.join(self._dir('owners'), f'{owner}.lock')
+
+    def close(self) -> None:
+        """Releases the processor's lease; claims it leaves behind are recovered by the next processor."""
+        if self._lease is None:
+            return
+        for directory in (self.processing_dir, self.batches_dir):
+            try:
+                os.rmdir(directory)
+            except OSError:
+                pass  # unprocessed claims stay for recovery
+        os.remove(self._lease_path(self.owner))
+        self._lease.close()
+        self._lease = None
+
+    def _read(self, name: str) -> List[Dict[str, Any]]:
+        """Reads a claimed file, rewriting its dead-letter file so replays don't duplicate it."""
+        dead_letter_path = os.path.join(self._dir('dead_letter'), os.path.splitext(name)[0] + '.jsonl')
+        if os.path.exists(dead_letter_path):
+            os.remove(dead_letter_path)
+        with DeadLetterWriter(dead_letter_path) as dead_letter:
+            records = list(read_json(os.path.join(self.processing_dir, name), self.validator, dead_letter))
+        if self.metrics is not None and dead_letter.count:
+            self.metrics.incr('records_invalid_total', dead_letter.count, stage='extract')
+        return records
+
+    def _pending_records(self) -> int:
+        return sum(len(pending.records) for pending in self._pending)
+
+    def _load(self, name: str, dropped_at: float) -> bool:
+        """Reads a claimed file into the pending list, or moves it to failed when it can't be read."""
+        try:
+            records = self._read(name)
+        except OSError as e:
+            logger.error(f"Cannot read claimed file {name}, moving it to failed: {str(e)}")
+            self._finish(name, 'failed', 'unreadable')
+            if self.metrics is not None:
+                self.metrics.incr('stream_files_failed_total')
+            return False
+        self._pending.append(PendingFile(name, dropped_at, records))
+        return True
+
+    def claim(self) -> int:
+        """
+        Claims ready files from the incoming directory, oldest first, until the
+        pending files fill a batch.
+
+        Returns:
+            int: Number of files claimed
+        """
+        if self._pending_records() >= self.batch_size:
+            return 0
+        now = time.time()
+        candidates = []
+        with os.scandir(self._dir('incoming')) as entries:
+            for entry in entries:
+                if not entry.is_file() or entry.name.startswith('.') or not entry.name.endswith('.json'):
+                    continue
+                stat = entry.stat()
+                if now - stat.st_mtime >= self.min_file_age:
+                    candidates.append((stat.st_mtime_ns, entry.name))
+
+        claimed = 0
+        for mtime_ns, name in sorted(candidates):
+            if self._pending_records() >= self.batch_size:
+                break
+            source = os.path.join(self._dir('incoming'), name)
+            claimed_name = f'{mtime_ns}-{name}'
+            destination = os.path.join(self.processing_dir, claimed_name)
+            if os.path.exists(destination):
+                continue  # this very drop is already claimed by this processor
+            try:
+                # Only one of several processors renaming the same file succeeds
+                os.rename(source, destination)
+            except FileNotFoundError:
+                continue  # claimed by another processor
+            if self._load(claimed_name, mtime_ns / 1e9):
+                claimed += 1
+        if self.metrics is not None and claimed:
+            self.metrics.incr('stream_files_claimed_total', claimed)
+        return claimed
+
+    def _finish(self, name: str, destination: str, suffix: str) -> None:
+        """Moves a claimed file to done or failed without overwriting an earlier file there."""
+        source = os.path.join(self.processing_dir, name)
+        if not os.path.exists(source):
+            return
+        target = os.path.join(self._dir(destination), name)
+        try:
+            _move_no_clobber(source, target)
+        except FileExistsError:
+            stem, extension = os.path.splitext(name)
+            _move_no_clobber(source, os.path.join(self._dir(destination), f'{stem}.{suffix}{extension}'))
+
+    def _due(self) -> bool:
+        if not self._pending:
+            return False
+        if sum(len(pending.records) for pending in self._pending) >= self.batch_size:
+            return True
+        return time.time() - min(pending.dropped_at for pending in self._pending) >= self.max_latency
+
+    def _take_batch(self) -> List[PendingFile]:
+        """Takes files off the pending list until the batch holds batch_size records."""
+        batch, size = [], 0
+        while self._pending and size < self.batch_size:
+            pending = self._pending.pop(0)
+            batch.append(pending)
+            size += len(pending.records)
+        return batch
+
+    @staticmethod
+    def batch_id(batch: List[PendingFile]) -> str:
+        """
+        Returns the deterministic id of a batch of input files.
+
+        The id covers each file's name and drop time (its mtime, which renames
+        preserve), so a file name reused by a later drop yields a new id.
+        """
+        keys = sorted(f'{pending.name}:{pending.dropped_at!r}' for pending in batch)
+        return hashlib.sha1('\n'.join(keys).encode('utf-8')).hexdigest()[:16]
+
+    def _process(self, batch: List[PendingFile], batch_id: Optional[str] = None) -> str:
+        names = [pending.name for pending in batch]
+        batch_id = batch_id or self.batch_id(batch)
+        manifest_path = os.path.join(self.batches_dir, f'{batch_id}.json')
+        if not os.path.exists(manifest_path):
+            temp_path = f'{manifest_path}.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                json.dump({'batch_id': batch_id, 'files': names}, file)
+            os.replace(temp_path, manifest_path)
+
+        output_path = os.path.join(self._dir('output'), f'enriched_{batch_id}.json')
+        records = (record for pending in batch for record in pending.records)
+        try:
+            if self.scheduler is not None:
+                enriched = iter(self.scheduler.run(self.transformer, records))
+            else:
+                enriched = self.transformer.transform(records)
+            write_json(enriched, output_path)
+            destination = 'done'
+        except Exception as e:
+            logger.error(f"Batch {batch_id} failed, moving {len(names)} files to failed: {str(e)}")
+            destination = 'failed'
+
+        for name in names:
+            self._finish(name, destination, batch_id)
+        os.remove(manifest_path)
+
+        if self.metrics is not None:
+            self.metrics.incr('stream_batches_total', status='success' if destination == 'done' else 'failed')
+            self.metrics.observe('stream_end_to_end_latency_seconds',
+                                 time.time() - min(pending.dropped_at for pending in batch))
+        if destination == 'done':
+            logger.info(f"Wrote batch {batch_id} with {sum(len(p.records) for p in batch)} records to {output_path}")
+        return batch_id
+
+    @contextmanager
+    def _dead_owner(self, owner: str) -> Iterator[bool]:
+        """Holds the lease of owner while yielding True when its processor has exited."""
+        with open(self._lease_path(owner), 'a') as lease:
+            if not _try_lock(lease):
+                yield False
+                return
+            yield True
+
+    def _adopt(self, processing_dir: str, batches_dir: str) -> None:
+        """Moves the claimed files and manifests of an exited processor into this processor's directories."""
+        for source_dir, target_dir in ((processing_dir, self.processing_dir), (batches_dir, self.batches_dir)):
+            if not os.path.isdir(source_dir):
+                continue
+            for name in os.listdir(source_dir):
+                _move_no_clobber(os.path.join(source_dir, name), os.path.join(target_dir, name))
+            os.rmdir(source_dir)
+
+    def _adopt_orphans(self) -> None:
+        """Adopts the work of processors that exited without finishing it."""
+        owners = set()
+        for root in (self._dir('processing'), self._dir('batches')):
+            for name in os.listdir(root):
+                path = os.path.join(root, name)
+                if os.path.isdir(path):
+                    owners.add(name)
+                elif name.endswith('.json'):
+                    # Claims and manifests from before processors had owners
+                    target = self.processing_dir if root == self._dir('processing') else self.batches_dir
+                    _move_no_clobber(path, os.path.join(target, name))
+        owners.discard(self.owner)
+        for owner in sorted(owners):
+            with self._dead_owner(owner) as dead:
+                if not dead:
+                    continue
+                logger.info(f"Recovering the claims of exited processor {owner}")
+                self._adopt(os.path.join(self._dir('processing'), owner), os.path.join(self._dir('batches'), owner))
+                os.remove(self._lease_path(owner))
+
+    def recover(self) -> int:
+        """
+        Finishes batches of exited processors interrupted by a crash and re-queues
+        their claimed files without a batch.
+
+        Returns:
+            int: Number of batches replayed
+        """
+        self._adopt_orphans()
+        replayed = 0
+        batched = set()
+        for manifest in sorted(os.listdir(self.batches_dir)):
+            if not manifest.endswith('.json'):
+                continue
+            with open(os.path.join(self.batches_dir, manifest), 'r', encoding='utf-8') as file:
+                manifest_data = json.load(file)
+            names = manifest_data['files']
+            batched.update(names)
+            for name in names:
+                path = os.path.join(self.processing_dir, name)
+                if os.path.exists(path):
+                    self._load(name, os.stat(path).st_mtime_ns / 1e9)
+            batch = [pending for pending in self._pending if pending.name in names]
+            self._pending = [pending for pending in self._pending if pending.name not in names]
+            if batch:
+                self._process_replay(batch, names, manifest_data['batch_id'])
+            else:
+                os.remove(os.path.join(self.batches_dir, manifest))
+            replayed += 1
+
+        pending_names = {pending.name for pending in self._pending}
+        for name in sorted(os.listdir(self.processing_dir)):
+            if name.endswith('.json') and name not in batched and name not in pending_names:
+                self._load(name, os.stat(os.path.join(self.processing_dir, name)).st_mtime_ns / 1e9)
+        return replayed
+
+    def _process_replay(self, batch: List[PendingFile], names: List[str], batch_id: str) -> None:
+        # Files already moved to done before the crash are re-read from there so the output is complete
+        present = {pending.name for pending in batch}
+        for name in names:
+            done_path = os.path.join(self._dir('done'), name)
+            if name not in present and os.path.exists(done_path):
+                os.replace(done_path, os.path.join(self.processing_dir, name))
+                if self._load(name, os.stat(os.path.join(self.processing_dir, name)).st_mtime_ns / 1e9):
+                    batch.append(self._pending.pop())
+        batch.sort(key=lambda pending: names.index(pending.name))
+        self._process(batch, batch_id)
+
+    def run_once(self, flush: bool = False) -> int:
+        """
+        Claims new files and processes every batch that is due.
+
+        Args:
+            flush (bool): Process pending files even if no bound has been reached
+
+        Returns:
+            int: Number of batches processed
+        """
+        self.claim()
+        processed = 0
+        while self._pending and (flush or self._due()):
+            self._process(self._take_batch())
+            processed += 1
+            if not flush:
+                self.claim()
+        return processed
+
+    def run(self, stop: Optional[threading.Event] = None) -> None:
+        """
+        Processes files until stop is set, then flushes what was already claimed.
+
+        Args:
+            stop (Optional[threading.Event]): Event ending the loop
+        """
+        stop = stop if stop is not None else threading.Event()
+        self.recover()
+        logger.info(f"Watching {self._dir('incoming')} (batch size {self.batch_size}, "
+                    f"max latency {self.max_latency}s)")
+        while not stop.is_set():
+            self.run_once()
+            stop.wait(self.poll_interval)
+        self.run_once(flush=True)
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--root', required=True, help='Base directory of the stream (incoming/, output/, ...)')
+    parser.add_argument('--data-dir', default='data',
+                        help='Data directory whose cache/ holds the geocode cache and quota state shared with the DAG')
+    parser.add_argument('--batch-size', type=int, default=500, help='Records per batch')
+    parser.add_argument('--max-latency', type=float, default=5.0, help='Seconds from drop until a batch is flushed')
+    parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds between directory scans')
+    parser.add_argument('--min-file-age', type=float, default=0.0,
+                        help='Seconds a file must be unmodified before it is claimed')
+    args = parser.parse_args(argv)
+
+    from integrations.adaptive_concurrency import AdaptiveConcurrencyLimiter
+    from integrations.geocode_cache import GeocodeCache
+    from integrations.geocode_util import load_environment
+    from integrations.quota_scheduler import DailyQuota
+    from utils.metrics import export_metrics
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    load_environment()
+    metrics = PipelineMetrics()
+    cache = GeocodeCache.from_env(default_path=os.path.join(args.data_dir, 'cache', 'geocode_cache.sqlite'))
+    transformer = AddressTransformer(
+        compact=True, metrics=metrics, cache=cache,
+        quota=DailyQuota.from_env(default_state_path=os.path.join(args.data_dir, 'cache', 'geocode_quota.json')),
+        concurrency=AdaptiveConcurrencyLimiter.from_env(metrics),
+    )
+    processor = MicroBatchProcessor(args.root, transformer, batch_size=args.batch_size,
+                                    max_latency=args.max_latency, poll_interval=args.poll_interval,
+                                    min_file_age=args.min_file_age, metrics=metrics)
+
+    stop = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop.set())
+    try:
+        processor.run(stop)
+    finally:
+        processor.close()
+        cache.close()
+        export_metrics(metrics, 'etl_stream')
+
+if __name__ == '__main__':
+    main()
@@ -1,21 +1,154 @@
-from typing import Iterator, Dict, Any
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Deque, Iterator, Dict, Any, List, Optional, Union
 import logging
-import os
-import sys
-
-# Add src directory to path
-sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+import threading
 
+from integrations.adaptive_concurrency import AdaptiveConcurrencyLimiter
 from integrations.geocode_util import get_structured_address, GeocodingError
+from integrations.geocode_cache import GeocodeCache, CachedGeocoder
+from integrations.quota_scheduler import DailyQuota, MeteredGeocoder, QuotaExceededError
+from integrations.singleflight import CoalescingGeocoder
+from transformers.candidate_dedup import DEFAULT_DEDUP_RADIUS_M, dedupe_candidates
+from utils.metrics import PipelineMetrics
+from utils.records import EnrichedRecord
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class TransformCancelledError(Exception):
+    """Raised by transform when its cancel event is set."""
+    pass
+
 class AddressTransformer:
-    def __init__(self):
+    def __init__(self, dedup_radius_m: Optional[float] = DEFAULT_DEDUP_RADIUS_M, max_candidates: Optional[int] = 5,
+                 compact: bool = False, metrics: Optional[PipelineMetrics] = None,
+                 cache: Optional[GeocodeCache] = None, quota: Optional[DailyQuota] = None,
+                 concurrency: Optional[AdaptiveConcurrencyLimiter] = None,
+                 cancel: Optional[threading.Event] = None):
+        """
+        Args:
+            dedup_radius_m (Optional[float]): Candidates closer than this many metres are collapsed
+                into one representative; None keeps every candidate
+            max_candidates (Optional[int]): Maximum number of candidates stored per record
+            compact (bool): Yield EnrichedRecord instances instead of dicts; convert them with
+                to_dict() or pass them straight to write_json
+            metrics (Optional[PipelineMetrics]): Registry receiving record counts, API call counts,
+                geocode latencies and status counts
+            cache (Optional[GeocodeCache]): Cache of results and definitive no-result lookups
+                consulted before calling the geocoder
+            quota (Optional[DailyQuota]): Daily request budget charged for every API call; records
+                that would exceed it get the status 'quota_exceeded'
+            concurrency (Optional[AdaptiveConcurrencyLimiter]): Enrich records on worker threads with
+                the number of API requests in flight bounded by this limiter; output order is preserved
+            cancel (Optional[threading.Event]): Once set, transform raises TransformCancelledError
+                before enriching the next record
+        """
         self.geocoder = get_structured_address
+        self.dedup_radius_m = dedup_radius_m
+        self.max_candidates = max_candidates
+        self.compact = compact
+        self.metrics = metrics
+        self.cache = cache
+        self.quota = quota
+        self.concurrency = concurrency
+        self.cancel = cancel
+        # Concurrent lookups of one address share a single cache check and API call;
+        # only calls that reach the API are charged to the quota, retries included
+        self._attempt = (MeteredGeocoder(self._call_geocoder, quota, metrics) if quota is not None
+                         else self._call_geocoder)
+        lookup = CachedGeocoder(self._call_api, cache, metrics) if cache is not None else self._call_api
+        self._lookup = CoalescingGeocoder(lookup, metrics)
+
+    def _postprocess(self, candidates: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """Collapses near-duplicate candidates and caps the list at max_candidates."""
+        if not candidates:
+            return candidates
+        if self.dedup_radius_m is None:
+            return candidates[:self.max_candidates] if self.max_candidates else candidates
+        return dedupe_candidates(candidates, self.dedup_radius_m, self.max_candidates)
+
+    def _geocode(self, address: str) -> List[Dict[str, str]]:
+        """Geocodes an address, coalescing concurrent duplicates and using the cache when configured."""
+        return self._lookup(address)
+
+    def _call_api(self, address: str) -> List[Dict[str, str]]:
+        """Calls the geocoder within the concurrency limit, if any, which retries overloaded requests."""
+        if self.concurrency is not None:
+            return self.concurrency.call(self._attempt, address)
+        return self._attempt(address)
+
+    def _call_geocoder(self, address: str) -> List[Dict[str, str]]:
+        """Calls the geocoder, recording the call and its latency."""
+        if self.metrics is None:
+            return self._request(address)
+        self.metrics.incr('geocode_api_calls_total')
+        with self.metrics.timer('geocode_latency_seconds'):
+            return self._request(address)
+
+    def _request(self, address: str) -> List[Dict[str, str]]:
+        # Failover and hedged requests are billed too, so they draw on the quota
+        if self.quota is None:
+            return self.geocoder(address)
+        return self.geocoder(address, budget=self.quota.acquire)
+
+    def _build(self, record: Dict[str, Any], candidates: List[Dict[str, str]], status: str,
+               error: Optional[str] = None) -> Union[Dict[str, Any], EnrichedRecord]:
+        """Builds the enriched output for a record in the configured representation."""
+        if self.compact:
+            enriched_record = EnrichedRecord.from_candidates(record, candidates, status, error)
+        else:
+            enriched_record = self._build_dict(record, candidates, status, error)
+        # Counted only once the record exists, so a failed build is counted under the fallback status alone
+        if self.metrics is not None:
+            self.metrics.incr('geocoding_status_total', status=status)
+        return enriched_record
+
+    def _build_dict(self, record: Dict[str, Any], candidates: List[Dict[str, str]], status: str,
+                    error: Optional[str] = None) -> Dict[str, Any]:
+        """Builds the enriched record as a copy of the input dict."""
+        enriched_record = record.copy()
+        if candidates:
+            full_address = candidates[0]['full_address']
+        elif status == 'no_address':
+            full_address = ''
+        else:
+            full_address = (record.get('project_address') or '').strip()
+        enriched_record.update({
+            'geocoded_addresses': candidates,
+            'full_address': full_address,
+            'latitude': candidates[0]['latitude'] if candidates else '',
+            'longitude': candidates[0]['longitude'] if candidates else '',
+            'geocoding_status': status
+        })
+        if error is not None:
+            enriched_record['geocoding_error'] = error
+        return enriched_record
 
-    def transform(self, address_iter: Iterator[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    def _enrich(self, record: Dict[str, Any]) -> Union[Dict[str, Any], EnrichedRecord]:
+        """Geocodes a single record and returns its enriched form."""
+        address = (record.get('project_address') or '').strip()
+
+        if not address:
+            logger.warning(f"No address found in record: {record}")
+            return self._build(record, [], 'no_address')
+
+        try:
+            geocoding_results = self._postprocess(self._geocode(address))
+            if geocoding_results:
+                logger.info(f"Successfully geocoded address: {address}")
+                return self._build(record, geocoding_results, 'success')
+            return self._build(record, [], 'failed')
+        except QuotaExceededError as e:
+            logger.warning(f"Skipped geocoding address '{address}': {str(e)}")
+            return self._build(record, [], 'quota_exceeded', str(e))
+        except GeocodingError as e:
+            logger.error(f"Geocoding failed for address '{address}': {str(e)}")
+            return self._build(record, [], 'failed', str(e))
+        except Exception as e:
+            logger.error(f"Unexpected error processing address '{address}': {str(e)}")
+            return self._build(record, [], 'error', str(e))
+
+    def transform(self, address_iter: Iterator[Dict[str, Any]]) -> Iterator[Union[Dict[str, Any], EnrichedRecord]]:
         """
         Transforms an iterator of address dictionaries by enriching each address.
         Yields enriched addresses one by one.
@@ -24,66 +157,55 @@ class AddressTransformer:
             address_iter (Iterator[Dict[str, Any]]): Iterator of address dictionaries
         
         Yields:
-            Dict[str, Any]: Enriched address dictionaries with geocoding data
+            Union[Dict[str, Any], EnrichedRecord]: Enriched address dictionaries with geocoding data,
+                or EnrichedRecord instances when the transformer is compact
         """
+        if self.concurrency is not None:
+            yield from self._transform_concurrently(address_iter)
+            return
+
+        for record in self._accepted(address_iter):
+            enriched_record = self._enrich(record)
+            if self.metrics is not None:
+                self.metrics.incr('records_out_total', stage='transform')
+            yield enriched_record
+
+    def _accepted(self, address_iter: Iterator[Any]) -> Iterator[Dict[str, Any]]:
+        """Counts incoming records and drops non-dict ones."""
         for record in address_iter:
+            if self.cancel is not None and self.cancel.is_set():
+                raise TransformCancelledError("Transform cancelled")
+            if self.metrics is not None:
+                self.metrics.incr('records_in_total', stage='transform')
             if not isinstance(record, dict):
                 logger.warning(f"Skipping non-dict record: {type(record)}")
                 continue
-            
-            enriched_record = record.copy()
-            address = record.get('project_address', '').strip()
-            
-            if not address:
-                logger.warning(f"No address found in record: {record}")
-                enriched_record.update({
-                    'geocoded_addresses': [],
-                    'full_address': '',
-                    'latitude': '',
-                    'longitude': '',
-                    'geocoding_status': 'no_address'
-                })
-                yield enriched_record
-                continue
-            
-            try:
-                geocoding_results = self.geocoder(address)
-                if geocoding_results:
-                    enriched_record.update({
-                        'geocoded_addresses': geocoding_results,
-                        'full_address': geocoding_results[0]['full_address'],
-                        'latitude': geocoding_results[0]['latitude'],
-                        'longitude': geocoding_results[0]['longitude'],
-                        'geocoding_status': 'success'
-                    })
-                    logger.info(f"Successfully geocoded address: {address}")
-                else:
-                    enriched_record.update({
-                        'geocoded_addresses': [],
-                        'full_address': address,
-                        'latitude': '',
-                        'longitude': '',
-                        'geocoding_status': 'failed'
-                    })
-            except GeocodingError as e:
-                logger.error(f"Geocoding failed for address '{address}': {str(e)}")
-                enriched_record.update({
-                    'geocoded_addresses': [],
-                    'full_address': address,
-                    'latitude': '',
-                    'longitude': '',
-                    'geocoding_status': 'failed',
-                    'geocoding_error': str(e)
-                })
-            except Exception as e:
-                logger.error(f"Unexpected error processing address '{address}': {str(e)}")
-                enriched_record.update({
-                    'geocoded_addresses': [],
-                    'full_address': address,
-                    'latitude': '',
-                    'longitude': '',
-                    'geocoding_status': 'error',
-                    'geocoding_error': str(e)
-                })
-            
-            yield enriched_record
\ No newline at end of file
+            yield record
+
+    def _transform_concurrently(self, address_iter: Iterator[Any]) -> Iterator[Union[Dict[str, Any], EnrichedRecord]]:
+        """
+        Enriches records on a thread pool, yielding them in input order.
+
+        The limiter bounds requests in flight; at most twice its maximum limit
+        records are read ahead, so memory stays bounded on long inputs.
+        """
+        workers = self.concurrency.max_limit
+        pending: Deque[Future] = deque()
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='geocode')
+        try:
+            for record in self._accepted(address_iter):
+                pending.append(executor.submit(self._enrich, record))
+                if len(pending) >= 2 * workers:
+                    yield self._completed(pending.popleft())
+            while pending:
+                yield self._completed(pending.popleft())
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+    def _completed(self, future: Future) -> Union[Dict[str, Any], EnrichedRecord]:
+        enriched_record = future.result()
+        if self.metrics is not None:
+            self.metrics.incr('records_out_total', stage='transform')
+        return enriched_record
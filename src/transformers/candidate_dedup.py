@@ -0,0 +1,91 @@
+from typing import Dict, List, Optional
+import numpy as np
+
+EARTH_RADIUS_M = 6371008.8
+# Candidates closer than this are treated as the same place
+DEFAULT_DEDUP_RADIUS_M = 150.0
+
+def parse_coordinates(candidates: List[Dict[str, str]]) -> np.ndarray:
+    """
+    Parses candidate latitude/longitude strings into an (N, 2) float array.
+
+    Args:
+        candidates (List[Dict[str, str]]): Geocoding candidates as returned by get_structured_address
+
+    Returns:
+        np.ndarray: Array of [latitude, longitude] rows; unparsable coordinates become NaN
+    """
+    raw = [(c.get('latitude', ''), c.get('longitude', '')) for c in candidates]
+    try:
+        return np.array(raw, dtype=np.float64).reshape(len(raw), 2)
+    except ValueError:
+        # Fall back to per-value parsing only when the bulk conversion fails
+        coords = np.full((len(raw), 2), np.nan)
+        for i, (lat, lon) in enumerate(raw):
+            try:
+                coords[i] = (float(lat), float(lon))
+            except (TypeError, ValueError):
+                pass
+        return coords
+
+def pairwise_distances(coords: np.ndarray) -> np.ndarray:
+    """
+    Computes the haversine distance in metres between every pair of coordinates.
+
+    Args:
+        coords (np.ndarray): (N, 2) array of [latitude, longitude] in degrees
+
+    Returns:
+        np.ndarray: (N, N) distance matrix in metres
+    """
+    lat = np.radians(coords[:, 0])
+    lon = np.radians(coords[:, 1])
+    dlat = lat[:, None] - lat[None, :]
+    dlon = lon[:, None] - lon[None, :]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat[:, None]) * np.cos(lat[None, :]) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+def dedupe_candidates(candidates: List[Dict[str, str]],
+                      radius_m: float = DEFAULT_DEDUP_RADIUS_M,
+                      top_k: Optional[int] = None) -> List[Dict[str, str]]:
+    """
+    Collapses geocoding candidates that lie within radius_m of each other.
+
+    Candidates are visited in their original (provider relevance) order; each
+    kept candidate suppresses every later candidate inside its radius, so the
+    highest-ranked candidate represents its cluster.
+
+    Args:
+        candidates (List[Dict[str, str]]): Geocoding candidates as returned by get_structured_address
+        radius_m (float): Clustering distance in metres
+        top_k (Optional[int]): Maximum number of representatives to keep
+
+    Returns:
+        List[Dict[str, str]]: Representative candidates, in original order
+
+    Raises:
+        ValueError: When radius_m is negative or top_k is not positive
+    """
+    if radius_m < 0:
+        raise ValueError("radius_m cannot be negative")
+    if top_k is not None and top_k <= 0:
+        raise ValueError("top_k must be a positive integer")
+
+    if not candidates:
+        return []
+
+    coords = parse_coordinates(candidates)
+    valid = ~np.isnan(coords).any(axis=1)
+    within = pairwise_distances(coords) <= radius_m
+
+    suppressed = ~valid
+    kept: List[int] = []
+    for i in range(len(candidates)):
+        if suppressed[i]:
+            continue
+        kept.append(i)
+        if top_k is not None and len(kept) >= top_k:
+            break
+        suppressed |= within[i]
+
+    return [candidates[i] for i in kept]
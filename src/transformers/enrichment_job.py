@@ -0,0 +1,164 @@
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import threading
+
+from utils.fs import ensure_parent_directory
+from utils.metrics import PipelineMetrics
+from utils.records import EnrichedRecord
+
+logger = logging.getLogger(__name__)
+
+def enrich_records(records: Iterable[Any], metrics: PipelineMetrics, data_dir: str, job_id: str,
+                   priority_rules: Optional[List[Dict[str, Any]]] = None,
+                   cancel: Optional[threading.Event] = None) -> List[EnrichedRecord]:
+    """
+    Enriches records with the geocoding setup configured in the environment.
+
+    Uses the persistent geocode cache under <data_dir>/cache, the daily quota
+    and priority scheduling when LOCATIONIQ_DAILY_QUOTA is set (deferring the
+    overflow to <data_dir>/deferred/<job_id>.jsonl), and adaptive concurrency
+    when GEOCODE_MAX_CONCURRENCY is set. The transformer runs in compact
+    mode, so the records are held as EnrichedRecord instances until
+    utils.writer.write_json serializes them.
+
+    Args:
+        records (Iterable[Any]): Input records
+        metrics (PipelineMetrics): Registry receiving the transform metrics
+        data_dir (str): Base data directory
+        job_id (str): Name of the deferred queue, usually the DAG id
+        priority_rules (Optional[List[Dict[str, Any]]]): Quota priority rules, None for the defaults
+        cancel (Optional[threading.Event]): Stops the enrichment before the next record once set
+
+    Returns:
+        List[EnrichedRecord]: The enriched records
+
+    Raises:
+        TransformCancelledError: When cancel is set before all records are enriched
+    """
+    from integrations.adaptive_concurrency import AdaptiveConcurrencyLimiter
+    from integrations.geocode_cache import GeocodeCache
+    from integrations.geocode_util import load_environment
+    from integrations.quota_scheduler import DailyQuota, DeferredQueue, QuotaScheduler
+    from transformers.address_transformer import AddressTransformer
+
+    load_environment()
+    cache = GeocodeCache.from_env(default_path=os.path.join(data_dir, 'cache', 'geocode_cache.sqlite'))
+    quota = DailyQuota.from_env(default_state_path=os.path.join(data_dir, 'cache', 'geocode_quota.json'))
+    transformer = AddressTransformer(compact=True, metrics=metrics, cache=cache, quota=quota,
+                                     concurrency=AdaptiveConcurrencyLimiter.from_env(metrics), cancel=cancel)
+    try:
+        if quota is None:
+            return list(transformer.transform(iter(records)))
+        scheduler = QuotaScheduler(quota, cache, rules=priority_rules,
+                                   queue=DeferredQueue(os.path.join(data_dir, 'deferred', f'{job_id}.jsonl')),
+                                   metrics=metrics)
+        return scheduler.run(transformer, records)
+    finally:
+        cache.close()
+
+def enrich_file(input_path: str, output_path: str, data_dir: str, job_id: str,
+                priority_rules: Optional[List[Dict[str, Any]]] = None,
+                metrics_job: Optional[str] = None, profile_dir: Optional[str] = None,
+                cancel: Optional[threading.Event] = None) -> Dict[str, Any]:
+    """
+    Enriches the records of a JSON file and writes them to another.
+
+    Runs for one output at a time: a second call for the same output_path,
+    e.g. from a re-run trigger, waits on a lock file and then returns the
+    recorded summary instead of enriching again if the input is unchanged.
+    A changed input, e.g. re-extracted after clearing the run, is enriched
+    anew.
+
+    Args:
+        input_path (str): JSON file of input records
+        output_path (str): JSON file receiving the enriched records
+        data_dir (str): Base data directory, see enrich_records
+        job_id (str): Name of the deferred queue, see enrich_records
+        priority_rules (Optional[List[Dict[str, Any]]]): Quota priority rules, None for the defaults
+        metrics_job (Optional[str]): Job name under which the metrics are exported to
+            Prometheus/StatsD when configured, see utils.metrics.export_metrics
+        profile_dir (Optional[str]): Directory receiving the 'transform' stage profile, see
+            utils.profiling.profile_stage; None disables profiling
+        cancel (Optional[threading.Event]): Stops the enrichment before the next record once set;
+            the previous output is left in place
+
+    Returns:
+        Dict[str, Any]: JSON-serializable summary with the output_path, the number of
+            records written and the metrics summary
+
+    Raises:
+        TransformCancelledError: When cancel is set before all records are enriched
+    """
+    from utils.metrics import export_metrics
+    from utils.profiling import profile_stage
+    from utils.reader import read_json
+    from utils.writer import write_json
+
+    with _exclusive_lock(f'{output_path}.lock'):
+        checksum = _file_checksum(input_path)
+        completed = read_completion(output_path)
+        if completed is not None and completed.get('input_checksum') == checksum and os.path.exists(output_path):
+            logger.info(f"{output_path} is already enriched from the current {input_path}")
+            return completed['result']
+
+        metrics = PipelineMetrics()
+        with profile_stage('transform', profile_dir or '', enabled=profile_dir is not None):
+            enriched_records = enrich_records(read_json(input_path), metrics, data_dir, job_id, priority_rules,
+                                              cancel)
+            write_json(iter(enriched_records), output_path)
+        if metrics_job:
+            export_metrics(metrics, metrics_job)
+        summary = {'output_path': output_path, 'records': len(enriched_records), 'metrics': metrics.summary()}
+        _write_completion(output_path, {'input_checksum': checksum, 'result': summary})
+        return summary
+
+def completion_path(output_path: str) -> str:
+    """Returns the file recording which input output_path was enriched from."""
+    return f'{output_path}.job.json'
+
+def read_completion(output_path: str) -> Optional[Dict[str, Any]]:
+    """
+    Reads the completion record of an output written by enrich_file.
+
+    Returns:
+        Optional[Dict[str, Any]]: The 'input_checksum' of the enriched input and the
+            enrich_file 'result', or None when the output was never completed
+    """
+    try:
+        with open(completion_path(output_path), 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def _write_completion(output_path: str, completion: Dict[str, Any]) -> None:
+    path = completion_path(output_path)
+    temp_path = f'{path}.tmp'
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump(completion, file)
+        os.replace(temp_path, path)
+    except OSError as e:
+        raise OSError(f"Failed to write to file {path}: {str(e)}")
+
+def _file_checksum(path: str) -> str:
+    checksum = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            checksum.update(block)
+    return checksum.hexdigest()
+
+@contextmanager
+def _exclusive_lock(path: str) -> Iterator[None]:
+    """Holds an exclusive advisory lock on path, waiting for other holders."""
+    ensure_parent_directory(path)
+    with open(path, 'a') as file:
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(file.fileno(), fcntl.LOCK_UN)
@@ -0,0 +1,58 @@
+from typing import Any, List, Optional
+import json
+
+from utils.fs import ensure_parent_directory
+
+class DeadLetterWriter:
+    """
+    Appends rejected input records to a JSON Lines dead-letter file.
+    
+    Each line holds the record together with the reasons it was rejected and,
+    when known, the source file and position. The file is only created once
+    the first record is rejected.
+    
+    Args:
+        path (str): The dead-letter .jsonl file path
+    """
+    
+    def __init__(self, path: str):
+        if not path:
+            raise ValueError("Path cannot be empty")
+        self.path = path
+        self.count = 0
+        self._file = None
+    
+    def write(self, record: Any, reasons: List[str], source: Optional[str] = None,
+              index: Optional[int] = None) -> None:
+        """
+        Writes one rejected record.
+        
+        Args:
+            record (Any): The rejected record, as read from the input
+            reasons (List[str]): Why the record was rejected
+            source (Optional[str]): The input file the record came from
+            index (Optional[int]): Position of the record within the source file
+            
+        Raises:
+            OSError: When the dead-letter file cannot be written
+        """
+        try:
+            if self._file is None:
+                ensure_parent_directory(self.path)
+                self._file = open(self.path, 'a', encoding='utf-8')
+            entry = {'source': source, 'index': index, 'reasons': reasons, 'record': record}
+            self._file.write(json.dumps(entry, ensure_ascii=False, default=str) + '\n')
+        except OSError as e:
+            raise OSError(f"Failed to write to dead-letter file {self.path}: {str(e)}")
+        self.count += 1
+    
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+    
+    def __enter__(self) -> 'DeadLetterWriter':
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
@@ -0,0 +1,30 @@
+from typing import Any, Dict, Sequence, Union
+import hashlib
+import json
+
+from utils.records import EnrichedRecord
+
+# Fields identifying a scraped record across runs
+DEFAULT_KEY_FIELDS = ('project_address', 'date_scraped')
+
+def record_fingerprint(record: Union[Dict[str, Any], EnrichedRecord],
+                       fields: Sequence[str] = DEFAULT_KEY_FIELDS) -> str:
+    """
+    Returns a stable key for a record computed from selected fields.
+
+    The field values are JSON-encoded in order and hashed with BLAKE2b, so the
+    key doesn't depend on the record's other fields or on dict ordering, and
+    missing fields hash like None.
+
+    Args:
+        record (Union[Dict[str, Any], EnrichedRecord]): Input or enriched record
+        fields (Sequence[str]): Names of the fields forming the key
+
+    Returns:
+        str: 32-character hexadecimal fingerprint
+    """
+    if isinstance(record, EnrichedRecord):
+        record = record.source
+    values = [record.get(field) for field in fields]
+    payload = json.dumps(values, ensure_ascii=False, separators=(',', ':'), default=str)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
@@ -0,0 +1,18 @@
+import os
+
+def ensure_parent_directory(path: str) -> None:
+    """
+    Creates the directory containing path if it doesn't exist yet.
+    
+    Args:
+        path (str): A file path
+        
+    Raises:
+        OSError: When the directory cannot be created
+    """
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        try:
+            os.makedirs(directory, exist_ok=True)
+        except OSError as e:
+            raise OSError(f"Failed to create directory {directory}: {str(e)}")
@@ -0,0 +1,265 @@
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+import bisect
+import logging
+import os
+import socket
+import threading
+import time
+
+DEFAULT_LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+logger = logging.getLogger(__name__)
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+class _Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count', 'max')
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+        self.max = max(self.max, value)
+
+class PipelineMetrics:
+    """
+    In-process registry of pipeline counters, gauges and histograms.
+
+    Metrics are exported as a Prometheus text file, pushed to StatsD, or
+    summarized into a JSON-serializable dict for XCom. All methods are
+    thread-safe.
+
+    Args:
+        namespace (str): Prefix added to every exported metric name
+        buckets (Tuple[float, ...]): Upper bounds in seconds of the histogram buckets
+    """
+
+    def __init__(self, namespace: str = 'etl', buckets: Tuple[float, ...] = DEFAULT_LATENCY_BUCKETS):
+        self.namespace = namespace
+        self.buckets = tuple(sorted(buckets))
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, _Histogram]] = {}
+        self._lock = threading.Lock()
+
+    def incr(self, name: str, value: float = 1, **labels: Any) -> None:
+        """Increments a counter."""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels: Any) -> None:
+        """Sets a gauge to value."""
+        with self._lock:
+            self._gauges.setdefault(name, {})[_label_key(labels)] = value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        """Records an observation in a histogram."""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = _Histogram(self.buckets)
+            series[key].observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels: Any) -> Iterator[None]:
+        """Observes the wall-clock duration of the block in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def counter_value(self, name: str, **labels: Any) -> float:
+        """Returns the current value of a counter, 0 if it was never incremented."""
+        with self._lock:
+            return self._counters.get(name, {}).get(_label_key(labels), 0)
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Summarizes all metrics into a JSON-serializable dict, e.g. for XCom.
+
+        Returns:
+            Dict[str, Any]: Counters, gauges and histogram count/sum/mean/max keyed by
+                name with Prometheus-style labels
+        """
+        with self._lock:
+            counters = {
+                name + _format_labels(key): value
+                for name, series in self._counters.items() for key, value in series.items()
+            }
+            gauges = {
+                name + _format_labels(key): value
+                for name, series in self._gauges.items() for key, value in series.items()
+            }
+            histograms = {
+                name + _format_labels(key): {
+                    'count': histogram.count,
+                    'sum': round(histogram.sum, 6),
+                    'mean': round(histogram.sum / histogram.count, 6) if histogram.count else 0.0,
+                    'max': round(histogram.max, 6)
+                }
+                for name, series in self._histograms.items() for key, histogram in series.items()
+            }
+        return {'counters': counters, 'gauges': gauges, 'histograms': histograms}
+
+    def to_prometheus(self) -> str:
+        """
+        Renders all metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: The exposition text
+        """
+        lines = []
+        with self._lock:
+            for kind, metrics in (('counter', self._counters), ('gauge', self._gauges)):
+                for name in sorted(metrics):
+                    full_name = f'{self.namespace}_{name}'
+                    lines.append(f'# TYPE {full_name} {kind}')
+                    for key, value in sorted(metrics[name].items()):
+                        lines.append(f'{full_name}{_format_labels(key)} {value}')
+            for name in sorted(self._histograms):
+                full_name = f'{self.namespace}_{name}'
+                lines.append(f'# TYPE {full_name} histogram')
+                for key, histogram in sorted(self._histograms[name].items()):
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f'{full_name}_bucket{_format_labels(key, ("le", repr(bound)))} {cumulative}')
+                    lines.append(f'{full_name}_bucket{_format_labels(key, ("le", "+Inf"))} {histogram.count}')
+                    lines.append(f'{full_name}_sum{_format_labels(key)} {histogram.sum}')
+                    lines.append(f'{full_name}_count{_format_labels(key)} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path: str) -> None:
+        """
+        Writes the metrics to a file for the node_exporter textfile collector.
+
+        The file is written to a temporary name and renamed so the collector never
+        reads a partial file.
+
+        Args:
+            path (str): Target .prom file path
+
+        Raises:
+            OSError: When the file cannot be written
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f'{path}.tmp'
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                file.write(self.to_prometheus())
+            os.replace(temp_path, path)
+        except OSError as e:
+            raise OSError(f"Failed to write metrics to {path}: {str(e)}")
+
+    def to_statsd(self) -> List[str]:
+        """
+        Renders the metrics as StatsD lines.
+
+        Labels are appended to the metric name as dotted values. Histograms are
+        sent as their count and sum (counters) and mean in milliseconds (gauge).
+
+        Returns:
+            List[str]: One StatsD line per value
+        """
+        def statsd_name(name: str, key: LabelKey) -> str:
+            parts = [self.namespace, name] + [value.replace('.', '_').replace(' ', '_') for _, value in key]
+            return '.'.join(parts)
+
+        lines = []
+        with self._lock:
+            for name, series in self._counters.items():
+                for key, value in series.items():
+                    lines.append(f'{statsd_name(name, key)}:{value}|c')
+            for name, series in self._gauges.items():
+                for key, value in series.items():
+                    lines.append(f'{statsd_name(name, key)}:{value}|g')
+            for name, series in self._histograms.items():
+                for key, histogram in series.items():
+                    base = statsd_name(name, key)
+                    mean_ms = histogram.sum / histogram.count * 1000 if histogram.count else 0.0
+                    lines.append(f'{base}.count:{histogram.count}|c')
+                    lines.append(f'{base}.sum:{histogram.sum}|c')
+                    lines.append(f'{base}.mean_ms:{round(mean_ms, 3)}|g')
+        return lines
+
+    def send_statsd(self, host: str, port: int = 8125, max_packet_size: int = 1432) -> None:
+        """
+        Sends the metrics to a StatsD server over UDP.
+
+        Lines are packed into datagrams no larger than max_packet_size bytes.
+
+        Args:
+            host (str): StatsD host
+            port (int): StatsD port
+            max_packet_size (int): Maximum datagram payload size in bytes
+        """
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            packet = b''
+            for line in self.to_statsd():
+                encoded = line.encode('utf-8')
+                if packet and len(packet) + 1 + len(encoded) > max_packet_size:
+                    sock.sendto(packet, (host, port))
+                    packet = b''
+                packet = packet + b'\n' + encoded if packet else encoded
+            if packet:
+                sock.sendto(packet, (host, port))
+        finally:
+            sock.close()
+
+def export_metrics(metrics: PipelineMetrics, job: str) -> None:
+    """
+    Exports metrics to the sinks configured in the environment.
+
+    ETL_METRICS_TEXTFILE_DIR writes <job>.prom into that directory for the
+    Prometheus node_exporter textfile collector; STATSD_HOST (and optionally
+    STATSD_PORT) pushes the metrics to StatsD. Without either, nothing is exported.
+
+    Export failures, such as an unresolvable STATSD_HOST or an unwritable
+    textfile directory, are logged and swallowed: telemetry must not fail a
+    task whose work already succeeded.
+
+    Args:
+        metrics (PipelineMetrics): The metrics to export
+        job (str): Name of the job, used for the .prom file name
+    """
+    textfile_dir = os.getenv('ETL_METRICS_TEXTFILE_DIR')
+    if textfile_dir:
+        try:
+            metrics.write_prometheus(os.path.join(textfile_dir, f'{job}.prom'))
+        except OSError as e:
+            logger.warning(f"Failed to export metrics for {job} to {textfile_dir}: {str(e)}")
+    statsd_host = os.getenv('STATSD_HOST')
+    if statsd_host:
+        try:
+            metrics.send_statsd(statsd_host, int(os.getenv('STATSD_PORT', '8125')))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to send metrics for {job} to StatsD at {statsd_host}: {str(e)}")
@@ -0,0 +1,239 @@
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+import hashlib
+import json
+import mmap
+import os
+import struct
+
+from utils.fingerprint import record_fingerprint
+
+# Sidecar layout: header (magic, metadata length), JSON metadata, then fixed-size
+# entries (16-byte key digest, byte offset, byte length) sorted by digest so a
+# lookup is a binary search over the memory-mapped file. The metadata ties the
+# index to one version of the data file through its content checksum.
+MAGIC = b'ETLIDX2\n'
+_HEADER = struct.Struct('<8sI')
+_ENTRY = struct.Struct('<16sQI')
+_CHECKSUM_BLOCK = 1 << 20
+
+KeyFunction = Callable[[Dict[str, Any]], str]
+
+def index_path_for(path: str) -> str:
+    """Returns the sidecar index path for an output file."""
+    return f'{path}.idx'
+
+def _new_checksum() -> 'hashlib.blake2b':
+    return hashlib.blake2b(digest_size=16)
+
+def key_digest(key: str) -> bytes:
+    """Hashes an index key to the 16-byte digest stored in the index."""
+    return hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+
+class OffsetIndexBuilder:
+    """
+    Collects record positions and the content checksum while an output file
+    is written.
+
+    Args:
+        key (Union[Sequence[str], KeyFunction]): Field names passed to record_fingerprint,
+            or a function returning the key of a record
+    """
+
+    def __init__(self, key: Any):
+        if callable(key):
+            self.key_function: KeyFunction = key
+            self.key_fields: Optional[List[str]] = None
+        else:
+            fields = list(key)
+            if not fields:
+                raise ValueError("Index key fields cannot be empty")
+            self.key_function = lambda record: record_fingerprint(record, fields)
+            self.key_fields = fields
+        self._entries: List[Tuple[bytes, int, int]] = []
+        self._checksum = _new_checksum()
+
+    def digest(self, record: Dict[str, Any]) -> bytes:
+        """Returns the index digest of a record's key."""
+        return key_digest(self.key_function(record))
+
+    def add(self, digest: bytes, offset: int, length: int) -> None:
+        """Records that the JSON of the record with key digest occupies length bytes at offset."""
+        self._entries.append((digest, offset, length))
+
+    def update(self, data: bytes) -> None:
+        """Adds bytes written to the data file to its checksum, in write order."""
+        self._checksum.update(data)
+
+    def write(self, path: str, data_path: str) -> None:
+        """
+        Writes the sorted index atomically.
+
+        Call it once the data file is in its final place: besides the content
+        checksum, the index stores the file's size, inode and modification
+        time, which let readers accept it without rehashing the data.
+
+        Args:
+            path (str): The sidecar path
+            data_path (str): The indexed file
+
+        Raises:
+            OSError: When the index cannot be written
+        """
+        try:
+            stat = os.stat(data_path)
+        except OSError as e:
+            raise OSError(f"Failed to write to file {path}: {str(e)}")
+        metadata = json.dumps({'key_fields': self.key_fields, 'count': len(self._entries),
+                               'data_size': stat.st_size, 'data_inode': stat.st_ino,
+                               'data_mtime_ns': stat.st_mtime_ns,
+                               'checksum': self._checksum.hexdigest()}).encode('utf-8')
+        self._entries.sort()
+        temp_path = f'{path}.tmp'
+        try:
+            with open(temp_path, 'wb') as file:
+                file.write(_HEADER.pack(MAGIC, len(metadata)))
+                file.write(metadata)
+                for entry in self._entries:
+                    file.write(_ENTRY.pack(*entry))
+            os.replace(temp_path, path)
+        except OSError as e:
+            raise OSError(f"Failed to write to file {path}: {str(e)}")
+
+def _map(path: str) -> Optional[mmap.mmap]:
+    with open(path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return None
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+def _file_checksum(data: Optional[mmap.mmap]) -> str:
+    checksum = _new_checksum()
+    if data is not None:
+        for start in range(0, len(data), _CHECKSUM_BLOCK):
+            checksum.update(data[start:start + _CHECKSUM_BLOCK])
+    return checksum.hexdigest()
+
+class IndexedJsonReader:
+    """
+    Random access to records of a JSON output file through its sidecar index.
+
+    Both files are memory-mapped; a lookup binary-searches the index and
+    decodes only the matching records, so it touches a few pages instead of
+    parsing the whole output.
+
+    The index is accepted when the data file is the one it was written for
+    (same size, inode and modification time). Otherwise, e.g. for a copied
+    output, the data is hashed once and compared with the stored checksum.
+
+    Args:
+        path (str): The JSON output file written by write_json with an index key
+        index_path (Optional[str]): The sidecar, defaults to <path>.idx
+
+    Raises:
+        FileNotFoundError: When the file or its index doesn't exist
+        ValueError: When the index is malformed or doesn't match the file
+    """
+
+    def __init__(self, path: str, index_path: Optional[str] = None):
+        self.path = path
+        self.index_path = index_path or index_path_for(path)
+        for required in (path, self.index_path):
+            if not os.path.exists(required):
+                raise FileNotFoundError(f"Path does not exist: {required}")
+
+        self._index = _map(self.index_path)
+        if self._index is None or len(self._index) < _HEADER.size:
+            self.close()
+            raise ValueError(f"Invalid index file: {self.index_path}")
+        magic, metadata_size = _HEADER.unpack_from(self._index, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"Invalid index file: {self.index_path}")
+        metadata = json.loads(self._index[_HEADER.size:_HEADER.size + metadata_size].decode('utf-8'))
+        self.key_fields: Optional[List[str]] = metadata['key_fields']
+        self._entries_start = _HEADER.size + metadata_size
+        self._count = (len(self._index) - self._entries_start) // _ENTRY.size
+
+        stat = os.stat(path)
+        if metadata['data_size'] != stat.st_size or metadata['count'] != self._count:
+            self.close()
+            raise ValueError(f"Index {self.index_path} is stale for {path}")
+        self._data = _map(path)
+        same_file = (metadata['data_inode'], metadata['data_mtime_ns']) == (stat.st_ino, stat.st_mtime_ns)
+        if not same_file and _file_checksum(self._data) != metadata['checksum']:
+            self.close()
+            raise ValueError(f"Index {self.index_path} is stale for {path}")
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _digest_at(self, position: int) -> bytes:
+        start = self._entries_start + position * _ENTRY.size
+        return self._index[start:start + 16]
+
+    def _positions(self, digest: bytes) -> Iterator[Tuple[int, int]]:
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._digest_at(middle) < digest:
+                low = middle + 1
+            else:
+                high = middle
+        while low < self._count and self._digest_at(low) == digest:
+            _, offset, length = _ENTRY.unpack_from(self._index, self._entries_start + low * _ENTRY.size)
+            yield offset, length
+            low += 1
+
+    def get(self, key: str) -> List[Dict[str, Any]]:
+        """
+        Returns every record stored under a key, in file order.
+
+        Args:
+            key (str): The record key, e.g. a record_fingerprint
+
+        Returns:
+            List[Dict[str, Any]]: The matching records; empty when the key is absent
+        """
+        positions = sorted(self._positions(key_digest(key)))
+        return [json.loads(self._data[offset:offset + length].decode('utf-8')) for offset, length in positions]
+
+    def get_record(self, record: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Returns the stored records with the same key fields as record.
+
+        Raises:
+            ValueError: When the index was built with a custom key function
+        """
+        if self.key_fields is None:
+            raise ValueError("Index was built with a custom key function; look records up with get()")
+        return self.get(record_fingerprint(record, self.key_fields))
+
+    def __contains__(self, key: str) -> bool:
+        return self.contains_digest(key_digest(key))
+
+    def contains_digest(self, digest: bytes) -> bool:
+        """Checks for a key by its digest without touching the data file."""
+        return next(self._positions(digest), None) is not None
+
+    def iter_raw(self) -> Iterator[Tuple[bytes, bytes]]:
+        """
+        Yields the key digest and the undecoded JSON bytes of every record, in file order.
+
+        Lets a rewrite copy records it doesn't change without parsing them.
+        """
+        entries = [_ENTRY.unpack_from(self._index, self._entries_start + position * _ENTRY.size)
+                   for position in range(self._count)]
+        for digest, offset, length in sorted(entries, key=lambda entry: entry[1]):
+            yield digest, self._data[offset:offset + length]
+
+    def close(self) -> None:
+        for name in ('_index', '_data'):
+            mapped = getattr(self, name, None)
+            if mapped is not None:
+                mapped.close()
+            setattr(self, name, None)
+
+    def __enter__(self) -> 'IndexedJsonReader':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
@@ -0,0 +1,254 @@
+from datetime import date, datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+import json
+import os
+
+from utils.fingerprint import DEFAULT_KEY_FIELDS, record_fingerprint
+from utils.offset_index import IndexedJsonReader, OffsetIndexBuilder, index_path_for, key_digest
+from utils.records import EnrichedRecord
+from utils.fs import ensure_parent_directory
+from utils.writer import encode_json_record, write_json_array
+
+MANIFEST_NAME = '_manifest'
+# New records are mostly freshly scraped, so partitioning by scrape month
+# keeps a delta within the latest partitions
+DEFAULT_PARTITION_FIELD = 'date_scraped'
+DEFAULT_PARTITIONS = 1
+UNDATED_PERIOD = 'undated'
+
+def _period(value: Any) -> str:
+    """Returns the YYYY-MM month of a DD/MM/YYYY or ISO date, or UNDATED_PERIOD."""
+    if isinstance(value, str):
+        text = value.strip()[:10]
+        for parse in (lambda: datetime.strptime(text, '%d/%m/%Y').date(), lambda: date.fromisoformat(text)):
+            try:
+                return parse().strftime('%Y-%m')
+            except ValueError:
+                pass
+    return UNDATED_PERIOD
+
+class PartitionedJsonStore:
+    """
+    A JSON dataset split into partitions that supports upserts.
+
+    Records are partitioned by the month of their partition_by field and,
+    within a month, by a hash of their record_fingerprint, so partitions grow
+    with the dataset's time span and an upsert of recently scraped records
+    only rewrites the latest months. Records without a parseable date share
+    the 'undated' partitions. Partition files are created when they receive
+    their first record.
+
+    Each partition is a regular write_json array with an offset index
+    sidecar, which serves as the key index: membership checks binary-search
+    it, and unchanged records are copied to the rewritten partition as raw
+    bytes without being decoded. The partition files can still be read as a
+    directory with utils.reader.read_json.
+
+    The layout is fixed when the store is created and kept in the _manifest
+    file. Stores created before partition_by existed keep their hash-only
+    layout.
+
+    Args:
+        root (str): Directory holding the partitions
+        partitions (Optional[int]): Number of hash partitions per month of a new store; None
+            for the stored count, or DEFAULT_PARTITIONS for a new store
+        key_fields (Sequence[str]): Fields identifying a record
+        partition_by (Optional[str]): Date field selecting a record's month, which should be
+            one of the key_fields so updates stay in their partition; None for the stored
+            field, or DEFAULT_PARTITION_FIELD for a new store
+
+    Raises:
+        ValueError: When the arguments contradict an existing store's manifest
+    """
+
+    def __init__(self, root: str, partitions: Optional[int] = None,
+                 key_fields: Sequence[str] = DEFAULT_KEY_FIELDS, partition_by: Optional[str] = None):
+        self.root = root
+        manifest_path = os.path.join(root, MANIFEST_NAME)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, 'r', encoding='utf-8') as file:
+                manifest = json.load(file)
+            if partitions is not None and partitions != manifest['partitions']:
+                raise ValueError(f"Store {root} has {manifest['partitions']} partitions, not {partitions}")
+            if list(key_fields) != manifest['key_fields']:
+                raise ValueError(f"Store {root} is keyed by {manifest['key_fields']}, not {list(key_fields)}")
+            if partition_by is not None and partition_by != manifest.get('partition_by'):
+                raise ValueError(f"Store {root} is partitioned by {manifest.get('partition_by')}, not {partition_by}")
+            self.partitions = manifest['partitions']
+            self.partition_by: Optional[str] = manifest.get('partition_by')
+        else:
+            self.partitions = partitions or DEFAULT_PARTITIONS
+            if self.partitions < 1:
+                raise ValueError("Partitions must be at least 1")
+            self.partition_by = partition_by or DEFAULT_PARTITION_FIELD
+            ensure_parent_directory(manifest_path)
+            temp_path = f'{manifest_path}.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                json.dump({'partitions': self.partitions, 'key_fields': list(key_fields),
+                           'partition_by': self.partition_by}, file)
+            os.replace(temp_path, manifest_path)
+        self.key_fields = list(key_fields)
+
+    def partition_path(self, partition: str) -> str:
+        """Returns the file of a partition."""
+        return os.path.join(self.root, f'part-{partition}.json')
+
+    def partition_of(self, record: Union[Dict[str, Any], EnrichedRecord]) -> str:
+        """Returns the name of the partition a record belongs to."""
+        bucket = int(self._fingerprint(record)[:8], 16) % self.partitions
+        if self.partition_by is None:
+            return f'{bucket:05d}'
+        if isinstance(record, EnrichedRecord):
+            record = record.source
+        return f'{_period(record.get(self.partition_by))}-{bucket:05d}'
+
+    def partition_names(self) -> List[str]:
+        """Returns the names of the existing partitions in order."""
+        try:
+            names = os.listdir(self.root)
+        except FileNotFoundError:
+            return []
+        return sorted(name[len('part-'):-len('.json')] for name in names
+                      if name.startswith('part-') and name.endswith('.json'))
+
+    def _fingerprint(self, record: Union[Dict[str, Any], EnrichedRecord]) -> str:
+        return record_fingerprint(record, self.key_fields)
+
+    def _reader(self, partition: str) -> Optional[IndexedJsonReader]:
+        path = self.partition_path(partition)
+        if not os.path.exists(path):
+            return None
+        try:
+            return IndexedJsonReader(path)
+        except (FileNotFoundError, ValueError):
+            # Rebuilds a missing or stale index from the partition's data
+            self._rewrite(partition, {})
+            return IndexedJsonReader(path)
+
+    def __contains__(self, record: Union[Dict[str, Any], EnrichedRecord]) -> bool:
+        reader = self._reader(self.partition_of(record))
+        if reader is None:
+            return False
+        with reader:
+            return self._fingerprint(record) in reader
+
+    def get(self, record: Union[Dict[str, Any], EnrichedRecord]) -> Optional[Dict[str, Any]]:
+        """
+        Returns the stored record with the same key as record.
+
+        Args:
+            record (Union[Dict[str, Any], EnrichedRecord]): Any record with the key fields
+
+        Returns:
+            Optional[Dict[str, Any]]: The stored record, or None when absent
+        """
+        reader = self._reader(self.partition_of(record))
+        if reader is None:
+            return None
+        with reader:
+            matches = reader.get(self._fingerprint(record))
+        return matches[0] if matches else None
+
+    def __len__(self) -> int:
+        total = 0
+        for partition in self.partition_names():
+            reader = self._reader(partition)
+            if reader is not None:
+                with reader:
+                    total += len(reader)
+        return total
+
+    def _existing(self, partition: str) -> Iterator[Tuple[bytes, bytes]]:
+        """Yields the digest and encoded JSON of the records stored in a partition."""
+        path = self.partition_path(partition)
+        if not os.path.exists(path):
+            return
+        try:
+            reader = IndexedJsonReader(path)
+        except (FileNotFoundError, ValueError):
+            # Missing or stale index, e.g. after a crash between replacing the
+            # data and writing its index: decode the partition once and re-encode it
+            with open(path, 'r', encoding='utf-8') as file:
+                for record in json.load(file):
+                    yield key_digest(self._fingerprint(record)), encode_json_record(record)
+            return
+        with reader:
+            for digest, encoded in reader.iter_raw():
+                yield digest, bytes(encoded)
+
+    def _rewrite(self, partition: str, updates: Dict[bytes, bytes]) -> Tuple[int, int]:
+        """Merges updates into a partition and returns the (inserted, updated) counts."""
+        path = self.partition_path(partition)
+        index = OffsetIndexBuilder(self.key_fields)
+        updated = set()
+
+        def chunks() -> Iterator[Tuple[bytes, bytes]]:
+            for digest, encoded in self._existing(partition):
+                if digest not in updates:
+                    yield digest, encoded
+                elif digest not in updated:
+                    # Replace in place and drop any older duplicates of the key
+                    updated.add(digest)
+                    yield digest, updates[digest]
+            for digest, encoded in updates.items():
+                if digest not in updated:
+                    yield digest, encoded
+
+        temp_path = f'{path}.tmp'
+        try:
+            with open(temp_path, 'wb') as file:
+                write_json_array(file, chunks(), index)
+            # Drop the old index first so it never sits next to the new data
+            try:
+                os.remove(index_path_for(path))
+            except FileNotFoundError:
+                pass
+            os.replace(temp_path, path)
+            index.write(index_path_for(path), path)
+        except OSError as e:
+            raise OSError(f"Failed to write to file {path}: {str(e)}")
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return len(updates) - len(updated), len(updated)
+
+    def upsert(self, records: Iterator[Union[Dict[str, Any], EnrichedRecord]]) -> Dict[str, int]:
+        """
+        Inserts new records and replaces stored records with the same key.
+
+        Updated records keep their position in the partition; new records are
+        appended. When the delta contains a key more than once, the last
+        record wins.
+
+        Args:
+            records (Iterator[Union[Dict[str, Any], EnrichedRecord]]): The delta
+
+        Returns:
+            Dict[str, int]: Counts of inserted and updated records and of rewritten partitions
+
+        Raises:
+            ValueError: When a record isn't a dict
+            OSError: When a partition cannot be written
+        """
+        delta: Dict[str, Dict[bytes, bytes]] = {}
+        for record in records:
+            if isinstance(record, EnrichedRecord):
+                record = record.to_dict()
+            elif not isinstance(record, dict):
+                raise ValueError(f"Expected dict record, got {type(record)}")
+            delta.setdefault(self.partition_of(record), {})[key_digest(self._fingerprint(record))] = \
+                encode_json_record(record)
+
+        stats = {'inserted': 0, 'updated': 0, 'partitions_rewritten': 0}
+        for partition in sorted(delta):
+            inserted, updated = self._rewrite(partition, delta[partition])
+            stats['inserted'] += inserted
+            stats['updated'] += updated
+            stats['partitions_rewritten'] += 1
+        return stats
+
+    def read_all(self) -> Iterator[Dict[str, Any]]:
+        """Yields every stored record, partition by partition."""
+        for partition in self.partition_names():
+            with open(self.partition_path(partition), 'r', encoding='utf-8') as file:
+                yield from json.load(file)
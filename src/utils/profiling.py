@@ -0,0 +1,107 @@
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, Optional
+import cProfile
+import io
+import logging
+import os
+import pstats
+import time
+import tracemalloc
+
+logger = logging.getLogger(__name__)
+
+TRUTHY = ('1', 'true', 'yes', 'on')
+
+def profiling_enabled(params: Optional[Dict[str, Any]] = None) -> bool:
+    """
+    Returns whether stage profiling is switched on.
+
+    Profiling is enabled by a truthy ETL_PROFILE environment variable or a
+    truthy 'profile' entry in params (e.g. the DAG run params).
+
+    Args:
+        params (Optional[Dict[str, Any]]): Run parameters
+
+    Returns:
+        bool: True when profiling is enabled
+    """
+    if os.getenv('ETL_PROFILE', '').strip().lower() in TRUTHY:
+        return True
+    value = (params or {}).get('profile', False)
+    if isinstance(value, str):
+        return value.strip().lower() in TRUTHY
+    return bool(value)
+
+@contextmanager
+def profile_stage(stage: str, output_dir: str, enabled: bool = True, top_n: int = 30) -> Iterator[None]:
+    """
+    Profiles CPU time and memory allocations of the enclosed block.
+
+    When enabled, writes into output_dir:
+      - <stage>.prof: raw cProfile stats, loadable with pstats or snakeviz
+      - <stage>.cpu.txt: the top_n functions by cumulative time
+      - <stage>.alloc.txt: wall time, current/peak traced memory and the top_n
+        allocation sites still alive at the end of the block
+
+    Only the calling thread is CPU-profiled. Lazy iterators must be consumed
+    inside the block for their work to be attributed to the stage.
+
+    Args:
+        stage (str): Stage name used for the output file names
+        output_dir (str): Directory for the profile dumps
+        enabled (bool): When False the block runs without any profiling overhead
+        top_n (int): Number of entries in the text reports
+
+    Raises:
+        OSError: When the output directory cannot be created
+    """
+    if not enabled:
+        yield
+        return
+
+    os.makedirs(output_dir, exist_ok=True)
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        elapsed = time.perf_counter() - start
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        if started_tracing:
+            tracemalloc.stop()
+        _write_reports(stage, output_dir, profiler, snapshot, elapsed, current, peak, top_n)
+
+def _write_reports(stage: str, output_dir: str, profiler: cProfile.Profile, snapshot: tracemalloc.Snapshot,
+                   elapsed: float, current: int, peak: int, top_n: int) -> None:
+    base = os.path.join(output_dir, stage)
+    try:
+        profiler.dump_stats(f'{base}.prof')
+
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(top_n)
+        with open(f'{base}.cpu.txt', 'w', encoding='utf-8') as file:
+            file.write(stream.getvalue())
+
+        snapshot = snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        ))
+        with open(f'{base}.alloc.txt', 'w', encoding='utf-8') as file:
+            file.write(f'stage: {stage}\n')
+            file.write(f'wall_time_seconds: {elapsed:.6f}\n')
+            file.write(f'traced_memory_current_bytes: {current}\n')
+            file.write(f'traced_memory_peak_bytes: {peak}\n\n')
+            file.write(f'Top {top_n} allocation sites:\n')
+            for stat in snapshot.statistics('lineno')[:top_n]:
+                file.write(f'{stat}\n')
+        logger.info(f"Wrote profile for stage '{stage}' to {output_dir}")
+    except OSError as e:
+        # A failed profile dump must not fail the pipeline stage itself
+        logger.error(f"Failed to write profile for stage '{stage}': {str(e)}")
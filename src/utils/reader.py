@@ -1,14 +1,24 @@
 import json
 import os
-from typing import Iterator, Dict, Any
+from typing import Iterator, Dict, Any, Optional
 import glob
 
-def read_json(path: str) -> Iterator[Dict[str, Any]]:
+from utils.dead_letter import DeadLetterWriter
+from utils.schema import Validator
+
+def read_json(path: str, validator: Optional[Validator] = None,
+              dead_letter: Optional[DeadLetterWriter] = None) -> Iterator[Dict[str, Any]]:
     """
     Reads JSON files from a specified directory and yields each record.
     
+    When a dead_letter writer is given, non-dict records, records rejected by the
+    validator and files that aren't valid JSON are written to it together with
+    the reasons, and reading continues with the next record or file.
+    
     Args:
         path (str): The directory containing JSON files or path to a single JSON file.
+        validator (Optional[Validator]): Compiled schema validator, see utils.schema.compile_schema
+        dead_letter (Optional[DeadLetterWriter]): Sink for invalid records instead of raising
         
     Yields:
         dict: Each record from the JSON files.
@@ -39,20 +49,38 @@ def read_json(path: str) -> Iterator[Dict[str, Any]]:
         try:
             with open(json_file, 'r', encoding='utf-8') as file:
                 data = json.load(file)
-                
-                # Handle both single objects and arrays
-                if isinstance(data, list):
-                    for record in data:
-                        if isinstance(record, dict):
-                            yield record
-                        else:
-                            raise ValueError(f"Expected dict record, got {type(record)} in file: {json_file}")
-                elif isinstance(data, dict):
-                    yield data
-                else:
-                    raise ValueError(f"Expected dict or list, got {type(data)} in file: {json_file}")
-                    
         except json.JSONDecodeError as e:
-            raise ValueError(f"Invalid JSON in file {json_file}: {str(e)}")
+            if dead_letter is None:
+                raise ValueError(f"Invalid JSON in file {json_file}: {str(e)}")
+            dead_letter.write(None, [f"Invalid JSON: {str(e)}"], source=json_file)
+            continue
         except IOError as e:
-            raise OSError(f"Error reading file {json_file}: {str(e)}")
\ No newline at end of file
+            raise OSError(f"Error reading file {json_file}: {str(e)}")
+        
+        # Handle both single objects and arrays
+        if isinstance(data, list):
+            records = data
+        elif isinstance(data, dict):
+            records = [data]
+        elif dead_letter is not None:
+            dead_letter.write(data, [f"Expected dict or list, got {type(data)}"], source=json_file)
+            continue
+        else:
+            raise ValueError(f"Expected dict or list, got {type(data)} in file: {json_file}")
+        
+        for index, record in enumerate(records):
+            if validator is not None:
+                reasons = validator(record)
+            elif not isinstance(record, dict):
+                reasons = [f"Expected dict record, got {type(record)}"]
+            else:
+                reasons = None
+            
+            if not reasons:
+                yield record
+            elif dead_letter is not None:
+                dead_letter.write(record, reasons, source=json_file, index=index)
+            elif not isinstance(record, dict):
+                raise ValueError(f"Expected dict record, got {type(record)} in file: {json_file}")
+            else:
+                raise ValueError(f"Invalid record at index {index} in file {json_file}: {'; '.join(reasons)}")
@@ -0,0 +1,97 @@
+from array import array
+from typing import Dict, Any, List, Optional, Tuple
+import sys
+
+class EnrichedRecord:
+    """
+    Compact in-memory representation of an enriched record.
+
+    The source record is referenced rather than copied, candidate addresses are
+    interned so repeated display names share one string, and coordinates live in
+    a single float array instead of one dict per candidate. Use to_dict() to get
+    the plain dict written to output files.
+    """
+
+    __slots__ = ('source', 'addresses', 'coords', 'status', 'error')
+
+    def __init__(self, source: Dict[str, Any], addresses: Tuple[str, ...] = (),
+                 coords: Optional[array] = None, status: str = 'success', error: Optional[str] = None):
+        self.source = source
+        self.addresses = addresses
+        self.coords = coords if coords is not None else array('d')
+        self.status = status
+        self.error = error
+
+    @classmethod
+    def from_candidates(cls, source: Dict[str, Any], candidates: List[Dict[str, str]],
+                        status: str = 'success', error: Optional[str] = None) -> 'EnrichedRecord':
+        """
+        Builds a compact record from geocoding candidates.
+
+        Args:
+            source (Dict[str, Any]): The original input record
+            candidates (List[Dict[str, str]]): Candidates as returned by get_structured_address
+            status (str): Geocoding status
+            error (Optional[str]): Geocoding error message, if any
+
+        Returns:
+            EnrichedRecord: The compact record
+
+        Raises:
+            ValueError: When a candidate has non-numeric coordinates
+        """
+        coords = array('d')
+        for candidate in candidates:
+            coords.append(float(candidate['latitude']))
+            coords.append(float(candidate['longitude']))
+        addresses = tuple(sys.intern(candidate['full_address']) for candidate in candidates)
+        return cls(source, addresses, coords, status, error)
+
+    def __len__(self) -> int:
+        return len(self.addresses)
+
+    @property
+    def full_address(self) -> str:
+        if self.addresses:
+            return self.addresses[0]
+        if self.status == 'no_address':
+            return ''
+        return (self.source.get('project_address') or '').strip()
+
+    @property
+    def latitude(self) -> Optional[float]:
+        return self.coords[0] if self.addresses else None
+
+    @property
+    def longitude(self) -> Optional[float]:
+        return self.coords[1] if self.addresses else None
+
+    def candidates(self) -> List[Dict[str, str]]:
+        """Returns the geocoded candidates in the output dict format."""
+        return [
+            {
+                'full_address': address,
+                'latitude': repr(self.coords[2 * i]),
+                'longitude': repr(self.coords[2 * i + 1])
+            }
+            for i, address in enumerate(self.addresses)
+        ]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Converts the record to the enriched dict format produced by AddressTransformer.
+
+        Returns:
+            Dict[str, Any]: The enriched record with string coordinates
+        """
+        record = self.source.copy()
+        record.update({
+            'geocoded_addresses': self.candidates(),
+            'full_address': self.full_address,
+            'latitude': repr(self.coords[0]) if self.addresses else '',
+            'longitude': repr(self.coords[1]) if self.addresses else '',
+            'geocoding_status': self.status
+        })
+        if self.error is not None:
+            record['geocoding_error'] = self.error
+        return record
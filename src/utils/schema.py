@@ -0,0 +1,128 @@
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+import re
+
+Validator = Callable[[Any], List[str]]
+
+# Declarative description of a scraped input record. Each field maps to:
+#   type:     expected Python type (or tuple of types)
+#   required: whether the field must be present
+#   nullable: whether None is accepted in place of a value
+#   format:   strptime format the string value must match
+INPUT_RECORD_SCHEMA: Dict[str, Dict[str, Any]] = {
+    'publication_media': {'type': str, 'required': True},
+    'project_title': {'type': str, 'required': True},
+    'date_scraped': {'type': str, 'required': True, 'format': '%d/%m/%Y %H:%M:%S'},
+    'project_address': {'type': str, 'required': False, 'nullable': True},
+}
+
+# strptime directives the fast date check understands, with their regex and datetime argument
+_DATE_DIRECTIVES = {
+    '%d': (r'(\d{1,2})', 'day'), '%m': (r'(\d{1,2})', 'month'), '%Y': (r'(\d{4})', 'year'),
+    '%H': (r'(\d{1,2})', 'hour'), '%M': (r'(\d{1,2})', 'minute'), '%S': (r'(\d{1,2})', 'second'),
+}
+
+def _compile_date_check(date_format: str) -> Callable[[str], bool]:
+    """
+    Compiles a strptime format into a date checker.
+
+    Formats built only from %d, %m, %Y, %H, %M and %S are checked with a
+    precompiled regex and a datetime() constructor, which is much faster than
+    strptime; any other format falls back to datetime.strptime.
+    """
+    parts = [part for part in re.split(r'(%.)', date_format) if part]
+    directives = [part for part in parts if part.startswith('%')]
+    if any(part not in _DATE_DIRECTIVES for part in directives) or len(set(directives)) != len(directives):
+        def check_strptime(value: str) -> bool:
+            try:
+                datetime.strptime(value, date_format)
+                return True
+            except ValueError:
+                return False
+        return check_strptime
+
+    pattern = re.compile(''.join(_DATE_DIRECTIVES[part][0] if part.startswith('%') else re.escape(part)
+                                 for part in parts) + r'\Z')
+    names = [_DATE_DIRECTIVES[part][1] for part in directives]
+    defaults = {'year': 1900, 'month': 1, 'day': 1}
+
+    def check_fast(value: str) -> bool:
+        match = pattern.match(value)
+        if match is None:
+            return False
+        fields = dict(defaults)
+        fields.update(zip(names, map(int, match.groups())))
+        try:
+            datetime(**fields)
+            return True
+        except ValueError:
+            return False
+    return check_fast
+
+def _type_name(expected: Union[type, Tuple[type, ...]]) -> str:
+    if isinstance(expected, tuple):
+        return ' or '.join(t.__name__ for t in expected)
+    return expected.__name__
+
+def compile_schema(schema: Dict[str, Dict[str, Any]]) -> Validator:
+    """
+    Compiles a declarative schema into a validator function.
+
+    The schema is inspected once; the returned function only runs the
+    precomputed checks, so it is cheap to call for every record.
+
+    Args:
+        schema (Dict[str, Dict[str, Any]]): Field specifications, see INPUT_RECORD_SCHEMA
+
+    Returns:
+        Validator: Function taking a record and returning a list of reasons it is
+            invalid (empty when the record is valid)
+
+    Raises:
+        ValueError: When the schema itself is malformed
+    """
+    checks: List[Callable[[Dict[str, Any]], Optional[str]]] = []
+    required = []
+
+    for field, spec in schema.items():
+        unknown = set(spec) - {'type', 'required', 'nullable', 'format'}
+        if unknown:
+            raise ValueError(f"Unknown schema options for field '{field}': {sorted(unknown)}")
+        if spec.get('required', False):
+            required.append(field)
+
+        expected = spec.get('type')
+        nullable = spec.get('nullable', False)
+        date_format = spec.get('format')
+        if date_format is not None and expected not in (None, str):
+            raise ValueError(f"Field '{field}' has a format but is not a string field")
+
+        def check(record: Dict[str, Any], field: str = field, expected: Any = expected, nullable: bool = nullable,
+                  date_format: Optional[str] = date_format,
+                  date_check: Optional[Callable[[str], bool]] = _compile_date_check(date_format) if date_format else None):
+            if field not in record:
+                return None
+            value = record[field]
+            if value is None:
+                return None if nullable else f"Field '{field}' must not be null"
+            # bool is a subclass of int, so reject it explicitly for numeric fields
+            if expected is not None and (not isinstance(value, expected) or
+                                         (isinstance(value, bool) and expected in (int, float))):
+                return f"Field '{field}' must be of type {_type_name(expected)}, got {type(value).__name__}"
+            if date_check is not None and not date_check(value):
+                return f"Field '{field}' does not match date format '{date_format}': {value!r}"
+            return None
+
+        checks.append(check)
+
+    def validate(record: Any) -> List[str]:
+        if not isinstance(record, dict):
+            return [f"Expected dict record, got {type(record)}"]
+        reasons = [f"Missing required field '{field}'" for field in required if field not in record]
+        for check in checks:
+            reason = check(record)
+            if reason is not None:
+                reasons.append(reason)
+        return reasons
+
+    return validate
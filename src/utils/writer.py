@@ -1,14 +1,70 @@
+import errno
 import json
 import os
-from typing import Iterator, Dict, Any, List
+from typing import BinaryIO, Callable, Iterable, Iterator, Dict, Any, List, Optional, Sequence, Tuple, Union
 
-def write_json(data: Iterator[Dict[str, Any]], path: str) -> None:
+from utils.fs import ensure_parent_directory
+from utils.offset_index import OffsetIndexBuilder, index_path_for
+from utils.records import EnrichedRecord
+
+def encode_json_record(record: Dict[str, Any]) -> bytes:
+    """Encodes a record as it appears inside the array written by write_json."""
+    # Matches the layout of json.dump(records, file, indent=2)
+    return json.dumps(record, indent=2, ensure_ascii=False).replace('\n', '\n  ').encode('utf-8')
+
+def write_json_array(file: BinaryIO, chunks: Iterable[Tuple[Optional[bytes], bytes]],
+                      index: Optional[OffsetIndexBuilder] = None) -> int:
+    """
+    Writes encoded records as a JSON array, recording their positions and
+    checksum in index.
+    
+    Args:
+        file (BinaryIO): The file being written
+        chunks (Iterable[Tuple[Optional[bytes], bytes]]): Pairs of index key digest (ignored
+            without an index) and record encoded by encode_json_record
+        index (Optional[OffsetIndexBuilder]): Receives each record's offset and length and
+            the written bytes
+    
+    Returns:
+        int: Number of bytes written
+    """
+    def write(data: bytes) -> None:
+        file.write(data)
+        if index is not None:
+            index.update(data)
+    
+    write(b'[')
+    position = 1
+    count = 0
+    for digest, encoded in chunks:
+        separator = b',\n  ' if count else b'\n  '
+        write(separator)
+        write(encoded)
+        position += len(separator)
+        if index is not None:
+            index.add(digest, position, len(encoded))
+        position += len(encoded)
+        count += 1
+    write(b'\n]' if count else b']')
+    return position + (2 if count else 1)
+
+def write_json(data: Iterator[Union[Dict[str, Any], EnrichedRecord]], path: str,
+               index_key: Optional[Union[Sequence[str], Callable[[Dict[str, Any]], str]]] = None) -> None:
     """
     Writes an iterator of dicts to a JSON file.
     
+    With an index_key, a sidecar index (<path>.idx) mapping each record's key
+    to its byte offset and length is written too; read it with
+    utils.offset_index.IndexedJsonReader. Without one, an index left by an
+    earlier write of the same path is removed.
+    
     Args:
-        data (Iterator[Dict[str, Any]]): An iterator of dictionaries to write to the JSON file.
+        data (Iterator[Union[Dict[str, Any], EnrichedRecord]]): An iterator of dictionaries or compact
+            records to write to the JSON file.
         path (str): The file path where the JSON data will be written.
+        index_key (Optional[Union[Sequence[str], Callable[[Dict[str, Any]], str]]]): Field names hashed
+            with record_fingerprint (e.g. utils.fingerprint.DEFAULT_KEY_FIELDS), or a function
+            returning a record's key; None writes no index
         
     Raises:
         ValueError: When path is empty or data is invalid
@@ -20,29 +76,184 @@ def write_json(data: Iterator[Dict[str, Any]], path: str) -> None:
     if not isinstance(path, str):
         raise ValueError("Path must be a string")
     
-    # Ensure the directory exists
-    directory = os.path.dirname(path)
-    if directory and not os.path.exists(directory):
-        try:
-            os.makedirs(directory, exist_ok=True)
-        except OSError as e:
-            raise OSError(f"Failed to create directory {directory}: {str(e)}")
+    ensure_parent_directory(path)
+    index = OffsetIndexBuilder(index_key) if index_key is not None else None
     
-    # Convert iterator to list to handle serialization
-    try:
-        records: List[Dict[str, Any]] = []
+    def chunks() -> Iterator[Tuple[Optional[bytes], bytes]]:
+        # Converts compact records at this boundary
         for record in data:
-            if not isinstance(record, dict):
+            if isinstance(record, EnrichedRecord):
+                record = record.to_dict()
+            elif not isinstance(record, dict):
                 raise ValueError(f"Expected dict record, got {type(record)}")
-            records.append(record)
+            yield (index.digest(record) if index is not None else None), encode_json_record(record)
+    
+    # Write next to the target and swap it in on success, so an invalid record
+    # or a failing upstream iterator leaves the previous output intact
+    temp_path = f'{path}.tmp'
+    try:
+        if os.path.exists(path) and not os.access(path, os.W_OK):
+            raise PermissionError(errno.EACCES, "Permission denied", path)
+        with open(temp_path, 'wb') as file:
+            write_json_array(file, chunks(), index)
+        # Drop the old index first so it never sits next to the new data
+        try:
+            os.remove(index_path_for(path))
+        except FileNotFoundError:
+            pass
+        os.replace(temp_path, path)
         
-        # Write to file with proper JSON formatting
-        with open(path, 'w', encoding='utf-8') as file:
-            json.dump(records, file, indent=2, ensure_ascii=False)
+        if index is not None:
+            index.write(index_path_for(path), path)
             
     except ValueError as e:
         raise ValueError(f"Failed to serialize data to JSON: {str(e)}")
     except OSError as e:
         raise OSError(f"Failed to write to file {path}: {str(e)}")
     except Exception as e:
-        raise ValueError(f"Unexpected error writing JSON: {str(e)}")
\ No newline at end of file
+        raise ValueError(f"Unexpected error writing JSON: {str(e)}")
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+def _to_float(value: Any) -> Optional[float]:
+    if value is None or value == '':
+        return None
+    return float(value)
+
+def _parquet_row(record: Union[Dict[str, Any], EnrichedRecord]) -> Dict[str, Any]:
+    """Converts an enriched record into a Parquet row with float coordinates."""
+    if isinstance(record, EnrichedRecord):
+        record = record.to_dict()
+    elif not isinstance(record, dict):
+        raise ValueError(f"Expected dict record, got {type(record)}")
+    
+    row = dict(record)
+    if 'geocoded_addresses' in row:
+        row['geocoded_addresses'] = [
+            {
+                'full_address': candidate.get('full_address'),
+                'latitude': _to_float(candidate.get('latitude')),
+                'longitude': _to_float(candidate.get('longitude'))
+            }
+            for candidate in row['geocoded_addresses'] or []
+        ]
+    for key in ('latitude', 'longitude'):
+        if key in row:
+            row[key] = _to_float(row[key])
+    return row
+
+def write_parquet(data: Iterator[Union[Dict[str, Any], EnrichedRecord]], path: str,
+                  row_group_size: int = 100_000, compression: str = 'snappy') -> None:
+    """
+    Writes an iterator of enriched records to a Parquet file.
+    
+    Coordinates are stored as doubles and geocoded_addresses as a list of
+    structs, so readers can load individual columns without parsing the rest.
+    Columns other than the enriched ones are inferred from the first row group;
+    fields that first appear in a later row group are rejected. The file is
+    written next to the target and swapped in on success, so a failure
+    leaves the previous output intact.
+    
+    Requires the optional pyarrow dependency.
+    
+    Args:
+        data (Iterator[Union[Dict[str, Any], EnrichedRecord]]): An iterator of dictionaries or compact
+            records to write to the Parquet file.
+        path (str): The file path where the Parquet data will be written.
+        row_group_size (int): Maximum number of records per row group.
+        compression (str): Parquet compression codec, e.g. 'snappy', 'zstd', 'gzip' or 'none'.
+        
+    Raises:
+        ImportError: When pyarrow is not installed
+        ValueError: When path is empty or data is invalid
+        OSError: When there are file system issues
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet output requires pyarrow; install it with 'pip install pyarrow'")
+    
+    if not path:
+        raise ValueError("Path cannot be empty")
+    
+    if not isinstance(path, str):
+        raise ValueError("Path must be a string")
+    
+    if row_group_size <= 0:
+        raise ValueError("row_group_size must be a positive integer")
+    
+    enriched_fields = [
+        pa.field('geocoded_addresses', pa.list_(pa.struct([
+            pa.field('full_address', pa.string()),
+            pa.field('latitude', pa.float64()),
+            pa.field('longitude', pa.float64())
+        ]))),
+        pa.field('full_address', pa.string()),
+        pa.field('latitude', pa.float64()),
+        pa.field('longitude', pa.float64()),
+        pa.field('geocoding_status', pa.string()),
+        pa.field('geocoding_error', pa.string())
+    ]
+    enriched_names = {field.name for field in enriched_fields}
+    
+    ensure_parent_directory(path)
+    
+    def infer_schema(rows: List[Dict[str, Any]]) -> 'pa.Schema':
+        extra_names: Dict[str, None] = {}
+        for row in rows:
+            for key in row:
+                if key not in enriched_names:
+                    extra_names[key] = None
+        extra_fields = []
+        if extra_names:
+            inferred = pa.Table.from_pylist([{key: row.get(key) for key in extra_names} for row in rows]).schema
+            extra_fields = [
+                pa.field(field.name, pa.string()) if pa.types.is_null(field.type) else field
+                for field in inferred
+            ]
+        return pa.schema(extra_fields + enriched_fields)
+    
+    temp_path = f'{path}.tmp'
+    writer = None
+    try:
+        if os.path.exists(path) and not os.access(path, os.W_OK):
+            raise PermissionError(errno.EACCES, "Permission denied", path)
+        batch: List[Dict[str, Any]] = []
+        
+        def flush() -> None:
+            nonlocal writer
+            if writer is None:
+                schema = infer_schema(batch)
+                writer = pq.ParquetWriter(temp_path, schema, compression=compression)
+            unknown = {key for row in batch for key in row} - set(writer.schema.names)
+            if unknown:
+                raise ValueError(f"Fields not present in the first row group: {sorted(unknown)}")
+            table = pa.Table.from_pylist(batch, schema=writer.schema)
+            writer.write_table(table, row_group_size=row_group_size)
+            batch.clear()
+        
+        for record in data:
+            batch.append(_parquet_row(record))
+            if len(batch) >= row_group_size:
+                flush()
+        if batch or writer is None:
+            flush()
+        writer.close()
+        writer = None
+        os.replace(temp_path, path)
+            
+    except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+        raise ValueError(f"Failed to serialize data to Parquet: {str(e)}")
+    except ValueError as e:
+        raise ValueError(f"Failed to serialize data to Parquet: {str(e)}")
+    except OSError as e:
+        raise OSError(f"Failed to write to file {path}: {str(e)}")
+    except Exception as e:
+        raise ValueError(f"Unexpected error writing Parquet: {str(e)}")
+    finally:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
@@ -0,0 +1,189 @@
+import pytest
+import sys
+import os
+import threading
+import time
+from unittest.mock import Mock, patch
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from integrations.adaptive_concurrency import AdaptiveConcurrencyLimiter
+from integrations.geocode_util import GeocodingError, RateLimitedError, GeocodingTimeoutError, NoGeocodingResultsError
+from transformers.address_transformer import AddressTransformer
+from utils.metrics import PipelineMetrics
+
+RESULTS = [{'full_address': 'Bahnhofquai, City, Zurich', 'latitude': '47.3768866', 'longitude': '8.5418596'}]
+
+class TestAdaptiveConcurrencyLimiter:
+
+    def test_additive_increase_when_saturated(self):
+        """Test that healthy requests using the whole limit raise it by about one per round"""
+        metrics = PipelineMetrics()
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_limit=4, metrics=metrics)
+
+        for _ in range(3):
+            limiter.call(lambda address: RESULTS, "Bahnhofquai 8")
+
+        assert limiter.limit == 2
+        assert metrics.summary()['gauges']['geocode_concurrency_limit'] == 2
+
+    def test_no_increase_when_underused(self):
+        """Test that the limit doesn't grow while fewer requests than allowed are in flight"""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=4, max_limit=8)
+
+        for _ in range(20):
+            limiter.call(lambda address: RESULTS, "Bahnhofquai 8")
+
+        assert limiter.limit == 4
+
+    def test_multiplicative_decrease_on_overload(self):
+        """Test that 429s and timeouts halve the limit"""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=8, max_limit=16, max_retries=0)
+
+        with pytest.raises(RateLimitedError):
+            limiter.call(Mock(side_effect=RateLimitedError("429 Too Many Requests")), "A")
+        assert limiter.limit == 4
+
+        with pytest.raises(GeocodingTimeoutError):
+            limiter.call(Mock(side_effect=GeocodingTimeoutError("timed out")), "A")
+        assert limiter.limit == 2
+
+    @patch('integrations.adaptive_concurrency.time.sleep')
+    def test_overloaded_request_retried(self, mock_sleep):
+        """Test that a rate-limited request is retried after its Retry-After instead of being lost"""
+        metrics = PipelineMetrics()
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=8, max_limit=16, metrics=metrics)
+        geocoder = Mock(side_effect=[RateLimitedError("429 Too Many Requests", retry_after=7),
+                                     GeocodingTimeoutError("timed out"), RESULTS])
+
+        assert limiter.call(geocoder, "A") == RESULTS
+
+        assert geocoder.call_count == 3
+        assert [c.args[0] for c in mock_sleep.call_args_list] == [7, 2.0]
+        assert limiter.limit == 2
+        assert metrics.counter_value('geocode_retries_total', reason='rate_limited') == 1
+        assert metrics.counter_value('geocode_retries_total', reason='timeout') == 1
+
+    @patch('integrations.adaptive_concurrency.time.sleep')
+    def test_retries_exhausted(self, mock_sleep):
+        """Test that the error is raised once every retry was rate limited"""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=4, max_limit=4, max_retries=2)
+        geocoder = Mock(side_effect=RateLimitedError("429 Too Many Requests"))
+
+        with pytest.raises(RateLimitedError):
+            limiter.call(geocoder, "A")
+        assert geocoder.call_count == 3
+
+    def test_neutral_outcomes(self):
+        """Test that no-result answers count as healthy and other errors leave the limit alone"""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_limit=4)
+
+        with pytest.raises(GeocodingError):
+            limiter.call(Mock(side_effect=GeocodingError("500 Server Error")), "A")
+        assert limiter.limit == 1
+
+        with pytest.raises(NoGeocodingResultsError):
+            limiter.call(Mock(side_effect=NoGeocodingResultsError("No geocoding results found")), "A")
+        assert limiter._limit > 1
+
+    def test_one_decrease_per_congestion_event(self):
+        """Test that overload errors of requests started before a decrease don't back off again"""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=8, max_limit=8, max_retries=0)
+        release = threading.Event()
+        started = threading.Barrier(4)
+
+        def overloaded(address):
+            started.wait(5)
+            release.wait(5)
+            raise RateLimitedError("429 Too Many Requests")
+
+        def worker():
+            with pytest.raises(RateLimitedError):
+                limiter.call(overloaded, "A")
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.05)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        assert limiter.limit == 4
+
+    def test_rising_latency_decreases(self):
+        """Test that latency well above the baseline is treated as overload"""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=8, max_limit=8, min_samples=5)
+        limiter._samples = 20
+        limiter._short_latency = limiter._long_latency = 0.01
+
+        limiter.call(lambda address: time.sleep(0.2) or RESULTS, "A")
+
+        assert limiter.limit == 4
+
+    def test_limit_bounds_in_flight(self):
+        """Test that no more requests than the limit run at once"""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=2)
+        lock = threading.Lock()
+        state = {'current': 0, 'peak': 0}
+
+        def geocoder(address):
+            with lock:
+                state['current'] += 1
+                state['peak'] = max(state['peak'], state['current'])
+            time.sleep(0.02)
+            with lock:
+                state['current'] -= 1
+            return RESULTS
+
+        threads = [threading.Thread(target=limiter.call, args=(geocoder, str(i))) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+
+        assert state['peak'] == 2
+
+    def test_invalid_limits(self):
+        """Test that inconsistent limits are rejected"""
+        with pytest.raises(ValueError, match="Concurrency limits"):
+            AdaptiveConcurrencyLimiter(initial_limit=10, max_limit=4)
+
+    @patch.dict(os.environ, {'GEOCODE_MAX_CONCURRENCY': '1'})
+    def test_from_env_sequential(self):
+        """Test that a maximum concurrency of one disables the limiter"""
+        assert AdaptiveConcurrencyLimiter.from_env() is None
+
+    @patch('transformers.address_transformer.get_structured_address')
+    def test_concurrent_transform_preserves_order(self, mock_geocode):
+        """Test that concurrent enrichment yields records in input order"""
+        def mock_geocode_side_effect(address):
+            time.sleep(0.001 * (hash(address) % 5))
+            return [{'full_address': address, 'latitude': '47.0', 'longitude': '8.0'}]
+
+        mock_geocode.side_effect = mock_geocode_side_effect
+        metrics = PipelineMetrics()
+        transformer = AddressTransformer(
+            metrics=metrics, concurrency=AdaptiveConcurrencyLimiter(initial_limit=4, max_limit=4, metrics=metrics)
+        )
+        input_data = [{"project_address": f"Street {i}"} for i in range(40)] + ["not a record"]
+
+        results = list(transformer.transform(iter(input_data)))
+
+        assert [r["full_address"] for r in results] == [f"Street {i}" for i in range(40)]
+        assert metrics.counter_value('records_in_total', stage='transform') == 41
+        assert metrics.counter_value('records_out_total', stage='transform') == 40
+        assert metrics.summary()['gauges']['geocode_concurrency_limit'] == 4
+
+    @patch('integrations.adaptive_concurrency.time.sleep')
+    @patch('transformers.address_transformer.get_structured_address')
+    def test_rate_limited_record_not_failed(self, mock_geocode, mock_sleep):
+        """Test that a record whose request was rate limited is retried and enriched"""
+        mock_geocode.side_effect = [RateLimitedError("429 Too Many Requests"), RESULTS]
+        transformer = AddressTransformer(concurrency=AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=2))
+
+        [result] = list(transformer.transform(iter([{"project_address": "Bahnhofquai 8"}])))
+
+        assert result["geocoding_status"] == "success"
+        assert mock_geocode.call_count == 2
@@ -8,6 +8,8 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
 
 from transformers.address_transformer import AddressTransformer
 from integrations.geocode_util import GeocodingError
+from utils.records import EnrichedRecord
+from utils.schema import compile_schema, INPUT_RECORD_SCHEMA
 
 class TestAddressTransformer:
     
@@ -138,6 +140,26 @@ class TestAddressTransformer:
             assert result["longitude"] == ""
             assert result["geocoding_status"] == "no_address"
     
+    @patch('transformers.address_transformer.get_structured_address')
+    def test_null_address_handling(self, mock_geocode):
+        """Test that a schema-valid record with a null address is enriched as having no address"""
+        mock_geocode.return_value = [{'full_address': 'Good Address', 'latitude': '47.5', 'longitude': '8.25'}]
+        input_data = [
+            {"publication_media": "Test Media", "project_title": "Test Project",
+             "date_scraped": "15/03/2024 14:23:45", "project_address": None},
+            {"publication_media": "Test Media", "project_title": "Test Project",
+             "date_scraped": "15/03/2024 14:23:45", "project_address": "Good Address"}
+        ]
+        validate = compile_schema(INPUT_RECORD_SCHEMA)
+        assert [validate(record) for record in input_data] == [[], []]
+
+        for compact in (False, True):
+            results = [record.to_dict() if compact else record
+                       for record in AddressTransformer(compact=compact).transform(iter(input_data))]
+
+            assert [result["geocoding_status"] for result in results] == ["no_address", "success"]
+            assert results[0]["full_address"] == ""
+
     @patch('transformers.address_transformer.get_structured_address')
     def test_geocoding_error_handling(self, mock_geocode):
         """Test handling of geocoding errors"""
@@ -278,4 +300,42 @@ class TestAddressTransformer:
         assert "full_address" in result
         assert "latitude" in result
         assert "longitude" in result
-        assert "geocoding_status" in result
\ No newline at end of file
+        assert "geocoding_status" in result
+    
+    @patch('transformers.address_transformer.get_structured_address')
+    def test_candidate_deduplication(self, mock_geocode):
+        """Test that near-duplicate candidates are collapsed and capped"""
+        mock_geocode.return_value = [
+            {'full_address': 'Bahnhofquai, City, Zurich', 'latitude': '47.3768866', 'longitude': '8.5418596'},
+            {'full_address': 'Bahnhofquai, City, Zurich', 'latitude': '47.3765382', 'longitude': '8.541848'},
+            {'full_address': 'Bahnhofquai, Olten', 'latitude': '47.350107', 'longitude': '7.9061458'}
+        ]
+        input_data = [{"publication_media": "Test Media", "project_address": "Bahnhofquai 8"}]
+
+        results = list(AddressTransformer().transform(iter(input_data)))
+        assert [c["full_address"] for c in results[0]["geocoded_addresses"]] == [
+            "Bahnhofquai, City, Zurich", "Bahnhofquai, Olten"
+        ]
+
+        results = list(AddressTransformer(max_candidates=1).transform(iter(input_data)))
+        assert len(results[0]["geocoded_addresses"]) == 1
+
+        results = list(AddressTransformer(dedup_radius_m=None, max_candidates=None).transform(iter(input_data)))
+        assert len(results[0]["geocoded_addresses"]) == 3
+
+    @patch('transformers.address_transformer.get_structured_address')
+    def test_compact_transformation(self, mock_geocode):
+        """Test that compact mode yields EnrichedRecord instances with the same dict form"""
+        mock_geocode.side_effect = lambda address: [
+            {'full_address': 'Good Address, City, Country', 'latitude': '47.5', 'longitude': '8.25'}
+        ]
+        input_data = [
+            {"publication_media": "Media 1", "project_address": "Good Address"},
+            {"publication_media": "Media 2", "project_address": ""}
+        ]
+
+        compact = list(AddressTransformer(compact=True).transform(iter(input_data)))
+        plain = list(AddressTransformer().transform(iter(input_data)))
+
+        assert all(isinstance(record, EnrichedRecord) for record in compact)
+        assert [record.to_dict() for record in compact] == plain
@@ -0,0 +1,99 @@
+import pytest
+import sys
+import os
+import json
+import tempfile
+import shutil
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from integrations.cache_warmup import warm_cache, export_seed, load_entries, iter_seed_entries, main
+from integrations.geocode_cache import GeocodeCache
+
+RESULTS = [{'full_address': 'Bahnhofquai, City, Zurich', 'latitude': '47.3768866', 'longitude': '8.5418596'}]
+OTHER = [{'full_address': 'Via San Gottardo, Lugano', 'latitude': '46.0101', 'longitude': '8.9600'}]
+
+class TestCacheWarmup:
+
+    def setup_method(self):
+        """Set up temporary directory and an enriched output file"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.enriched_file = os.path.join(self.temp_dir, "enriched_data.json")
+        enriched = [
+            {"project_address": "Bahnhofquai 8", "geocoded_addresses": RESULTS, "geocoding_status": "success"},
+            {"project_address": "bahnhofquai  8", "geocoded_addresses": RESULTS, "geocoding_status": "success"},
+            {"project_address": "Via San Gottardo 39", "geocoded_addresses": OTHER, "geocoding_status": "success"},
+            {"project_address": "Junk Address", "geocoded_addresses": [], "geocoding_status": "failed"},
+            {"project_address": None, "geocoded_addresses": [], "geocoding_status": "no_address"}
+        ]
+        with open(self.enriched_file, 'w') as f:
+            json.dump(enriched, f)
+
+    def teardown_method(self):
+        """Clean up temporary directory"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_warm_from_enriched_output(self):
+        """Test that successful records are loaded and duplicates collapsed"""
+        cache = GeocodeCache()
+        stats = warm_cache(cache, [self.enriched_file])
+
+        assert stats == {'read': 3, 'duplicates': 1, 'written': 2}
+        assert cache.get("BAHNHOFQUAI 8").results == RESULTS
+        assert cache.get("Junk Address") is None
+
+    def test_existing_entries_kept(self):
+        """Test that unexpired entries are only overwritten with replace=True"""
+        cache = GeocodeCache()
+        cache.put("Bahnhofquai 8", OTHER)
+
+        assert warm_cache(cache, [self.enriched_file])['written'] == 1
+        assert cache.get("Bahnhofquai 8").results == OTHER
+
+        assert warm_cache(cache, [self.enriched_file], replace=True)['written'] == 2
+        assert cache.get("Bahnhofquai 8").results == RESULTS
+
+    def test_batches(self):
+        """Test that entries are written across several transactions"""
+        cache = GeocodeCache()
+        entries = [(f"Street {i}", RESULTS) for i in range(25)]
+
+        stats = load_entries(cache, entries, batch_size=10)
+
+        assert stats['written'] == 25
+        assert len(cache) == 25
+
+    def test_export_and_seed_round_trip(self):
+        """Test that an exported seed file warms another cache"""
+        source = GeocodeCache()
+        warm_cache(source, [self.enriched_file])
+        seed_file = os.path.join(self.temp_dir, "seeds", "geocode_seed.jsonl")
+
+        assert export_seed(source, seed_file) == 2
+
+        target = GeocodeCache()
+        assert warm_cache(target, seed_paths=[seed_file])['written'] == 2
+        assert target.get("Via San Gottardo 39").results == OTHER
+
+    def test_invalid_seed_line(self):
+        """Test that malformed seed lines are reported with their line number"""
+        seed_file = os.path.join(self.temp_dir, "bad.jsonl")
+        with open(seed_file, 'w') as f:
+            f.write('{"address": "Bahnhofquai 8", "results": []}\n{"address": 1}\n')
+
+        with pytest.raises(ValueError, match="Invalid seed entry on line 2"):
+            list(iter_seed_entries(seed_file))
+
+    def test_cli(self):
+        """Test warming and exporting a persistent cache from the command line"""
+        cache_path = os.path.join(self.temp_dir, "cache", "geocode.sqlite")
+        seed_file = os.path.join(self.temp_dir, "seed.jsonl")
+
+        stats = main(['--cache', cache_path, '--export', seed_file, self.temp_dir])
+
+        assert stats['written'] == 2
+        assert stats['exported'] == 2
+        cache = GeocodeCache(cache_path)
+        assert len(cache) == 2
+        cache.close()
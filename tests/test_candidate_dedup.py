@@ -0,0 +1,111 @@
+import pytest
+import sys
+import os
+import numpy as np
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from transformers.candidate_dedup import parse_coordinates, pairwise_distances, dedupe_candidates
+
+BAHNHOFQUAI_CANDIDATES = [
+    {
+        'full_address': 'Bahnhofquai, City, Altstadt, Zurich, District Zurich, Zurich, 8001, Switzerland',
+        'latitude': '47.3768866',
+        'longitude': '8.5418596'
+    },
+    {
+        'full_address': 'Bahnhofquai, Lindenhof, Altstadt, Zurich, District Zurich, Zurich, 8001, Switzerland',
+        'latitude': '47.3758222',
+        'longitude': '8.5419804'
+    },
+    {
+        'full_address': 'Bahnhofquai, Lindenhof, Altstadt, Zurich, District Zurich, Zurich, 8001, Switzerland',
+        'latitude': '47.3761727',
+        'longitude': '8.5416967'
+    },
+    {
+        'full_address': 'Bahnhofquai, City, Altstadt, Zurich, District Zurich, Zurich, 8001, Switzerland',
+        'latitude': '47.3765382',
+        'longitude': '8.541848'
+    },
+    {
+        'full_address': 'Bahnhofquai, Olten, Bezirk Olten, Amtei Olten-Gösgen, Solothurn, 4601, Switzerland',
+        'latitude': '47.350107',
+        'longitude': '7.9061458'
+    }
+]
+
+class TestCandidateDedup:
+
+    def test_parse_coordinates(self):
+        """Test bulk parsing of string coordinates"""
+        coords = parse_coordinates(BAHNHOFQUAI_CANDIDATES[:2])
+
+        assert coords.shape == (2, 2)
+        assert coords[0, 0] == pytest.approx(47.3768866)
+        assert coords[1, 1] == pytest.approx(8.5419804)
+
+    def test_parse_coordinates_invalid_values(self):
+        """Test that unparsable coordinates become NaN without affecting valid rows"""
+        candidates = [
+            {'full_address': 'A', 'latitude': '47.0', 'longitude': '8.0'},
+            {'full_address': 'B', 'latitude': 'not-a-number', 'longitude': '8.0'}
+        ]
+
+        coords = parse_coordinates(candidates)
+
+        assert coords[0, 0] == pytest.approx(47.0)
+        assert np.isnan(coords[1, 0])
+
+    def test_pairwise_distances(self):
+        """Test haversine distances between candidates"""
+        coords = parse_coordinates([BAHNHOFQUAI_CANDIDATES[0], BAHNHOFQUAI_CANDIDATES[4]])
+        distances = pairwise_distances(coords)
+
+        assert distances[0, 0] == pytest.approx(0.0)
+        assert distances[0, 1] == pytest.approx(distances[1, 0])
+        # Zurich Bahnhofquai to Olten Bahnhofquai is roughly 47 km
+        assert 45000 < distances[0, 1] < 50000
+
+    def test_dedupe_keeps_distinct_locations(self):
+        """Test that nearby Zurich candidates collapse but Olten is kept"""
+        results = dedupe_candidates(BAHNHOFQUAI_CANDIDATES, radius_m=150)
+
+        assert len(results) == 2
+        assert results[0] is BAHNHOFQUAI_CANDIDATES[0]
+        assert "Olten" in results[1]['full_address']
+
+    def test_dedupe_small_radius(self):
+        """Test that a small radius keeps candidates further apart than the radius"""
+        results = dedupe_candidates(BAHNHOFQUAI_CANDIDATES, radius_m=1)
+
+        assert results == BAHNHOFQUAI_CANDIDATES
+
+    def test_dedupe_top_k(self):
+        """Test capping the number of representatives"""
+        results = dedupe_candidates(BAHNHOFQUAI_CANDIDATES, radius_m=1, top_k=3)
+
+        assert results == BAHNHOFQUAI_CANDIDATES[:3]
+
+    def test_dedupe_drops_invalid_coordinates(self):
+        """Test that candidates without usable coordinates are dropped"""
+        candidates = [
+            {'full_address': 'Bad', 'latitude': 'x', 'longitude': 'y'},
+            {'full_address': 'Good', 'latitude': '47.0', 'longitude': '8.0'}
+        ]
+
+        results = dedupe_candidates(candidates)
+
+        assert results == [candidates[1]]
+
+    def test_dedupe_empty(self):
+        """Test deduplication of an empty candidate list"""
+        assert dedupe_candidates([]) == []
+
+    def test_dedupe_invalid_arguments(self):
+        """Test validation of radius and top_k"""
+        with pytest.raises(ValueError, match="radius_m cannot be negative"):
+            dedupe_candidates(BAHNHOFQUAI_CANDIDATES, radius_m=-1)
+        with pytest.raises(ValueError, match="top_k must be a positive integer"):
+            dedupe_candidates(BAHNHOFQUAI_CANDIDATES, top_k=0)
@@ -0,0 +1,143 @@
+import pytest
+import sys
+import os
+import time
+import threading
+import requests
+from unittest.mock import Mock, patch
+
+# Add repository root and src directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from benchmarks.locationiq_stub import LocationIQStub
+from integrations.endpoint_router import EndpointRouter
+from integrations.geocode_util import get_structured_address, get_router, _send
+
+PARAMS = {'key': 'test', 'q': 'Bahnhofquai 8', 'format': 'json'}
+
+class TestEndpointRouter:
+
+    def test_routes_to_fastest_endpoint(self):
+        """Test that after probing every endpoint, requests go to the fastest one"""
+        with LocationIQStub(latency_ms=60) as slow, LocationIQStub() as fast:
+            router = EndpointRouter([slow.url, fast.url], _send)
+            for _ in range(6):
+                assert router.get(PARAMS).status_code == 200
+            assert router.ranked() == [fast.url, slow.url]
+
+        assert slow.stats['requests'] == 1
+        assert fast.stats['requests'] == 5
+
+    def test_unhealthy_endpoint_skipped(self):
+        """Test failover and skipping of an endpoint failing repeatedly"""
+        with LocationIQStub(error_rate=1.0) as broken, LocationIQStub() as healthy:
+            router = EndpointRouter([broken.url, healthy.url], _send, failure_threshold=2, cooldown=60)
+            router.record(healthy.url, 1.0, ok=True)  # make the broken endpoint look faster
+            router.record(broken.url, 0.001, ok=True)
+
+            assert router.get(PARAMS).status_code == 200
+            assert router.get(PARAMS).status_code == 200
+            assert router.get(PARAMS).status_code == 200
+            assert router.stats()[broken.url]['healthy'] is False
+
+        assert broken.stats['requests'] == 2
+        assert healthy.stats['requests'] == 3
+
+    def test_connection_error_single_endpoint(self):
+        """Test that errors from the only endpoint propagate"""
+        send = Mock(side_effect=requests.exceptions.ConnectionError("refused"))
+        router = EndpointRouter(["http://127.0.0.1:9/search.php"], send)
+
+        with pytest.raises(requests.exceptions.ConnectionError):
+            router.get(PARAMS)
+        send.assert_called_once()
+
+    def test_hedged_request(self):
+        """Test that a request slower than the primary's p95 is hedged to the next endpoint"""
+        with LocationIQStub(latency_ms=500) as degraded, LocationIQStub() as backup:
+            router = EndpointRouter([degraded.url, backup.url], _send, hedge=True, max_hedge_ratio=1.0,
+                                    min_samples=5)
+            for _ in range(5):  # history says the degraded endpoint is fast
+                router.record(degraded.url, 0.01, ok=True)
+            router.record(backup.url, 0.05, ok=True)
+
+            start = time.perf_counter()
+            response = router.get(PARAMS)
+            elapsed = time.perf_counter() - start
+
+        assert response.status_code == 200
+        assert elapsed < 0.4
+        assert router.hedged == 1
+        assert backup.stats['requests'] == 1
+
+    def test_failover_charges_budget(self):
+        """Test that a failover request claims a budget unit and is skipped without one"""
+        error = requests.exceptions.ConnectionError("refused")
+        budget = Mock(return_value=True)
+        send = Mock(side_effect=[error, Mock(status_code=200)])
+        router = EndpointRouter(["http://a", "http://b"], send)
+
+        assert router.get(PARAMS, budget=budget).status_code == 200
+        assert budget.call_count == 1
+
+        send = Mock(side_effect=error)
+        router = EndpointRouter(["http://a", "http://b"], send)
+        with pytest.raises(requests.exceptions.ConnectionError):
+            router.get(PARAMS, budget=Mock(return_value=False))
+        send.assert_called_once()
+
+    def test_hedge_skipped_without_budget(self):
+        """Test that no hedge is sent when the budget is used up"""
+        with LocationIQStub(latency_ms=200) as degraded, LocationIQStub() as backup:
+            router = EndpointRouter([degraded.url, backup.url], _send, hedge=True, max_hedge_ratio=1.0,
+                                    min_samples=5)
+            for _ in range(5):
+                router.record(degraded.url, 0.01, ok=True)
+            router.record(backup.url, 0.05, ok=True)
+
+            response = router.get(PARAMS, budget=Mock(return_value=False))
+            router.close()
+
+            assert response.status_code == 200
+            assert router.hedged == 0
+            assert backup.stats['requests'] == 0
+            assert router._executor is None
+
+    def test_queued_requests_not_hedged(self):
+        """Test that waiting for a free pool thread doesn't count toward the hedge delay"""
+        send = Mock(side_effect=lambda url, params, timeout: time.sleep(0.02) or Mock(status_code=200))
+        router = EndpointRouter(["http://a", "http://b"], send, hedge=True, max_hedge_ratio=1.0,
+                                min_samples=5, max_workers=2)
+        for _ in range(5):
+            router.record("http://a", 0.1, ok=True)
+            router.record("http://b", 0.2, ok=True)
+
+        threads = [threading.Thread(target=router.get, args=(PARAMS,)) for _ in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+        router.close()
+
+        assert send.call_count == 16
+        assert router.hedged == 0
+
+    def test_hedge_ratio_bound(self):
+        """Test that no request is hedged once the hedge budget is spent"""
+        router = EndpointRouter(["http://a", "http://b"], Mock(), hedge=True, max_hedge_ratio=0.0, min_samples=1)
+        router.record("http://a", 0.01, ok=True)
+
+        assert router._hedge_delay("http://a") is None
+
+    def test_geocoding_with_endpoint_list(self):
+        """Test that LOCATIONIQ_ENDPOINTS configures the router used by get_structured_address"""
+        with LocationIQStub() as first, LocationIQStub() as second:
+            with patch.dict(os.environ, {'LOCATIONIQ_API_KEY': 'test', 'LOCATIONIQ_RATE_LIMIT_DELAY': '0',
+                                         'LOCATIONIQ_ENDPOINTS': f"{first.url}, {second.url}"}):
+                assert get_router().urls == [first.url, second.url]
+                for _ in range(4):
+                    assert len(get_structured_address("Bahnhofquai 8")) == 3
+
+        assert first.stats['requests'] + second.stats['requests'] == 4
+        assert first.stats['requests'] >= 1 and second.stats['requests'] >= 1
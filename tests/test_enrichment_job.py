@@ -0,0 +1,120 @@
+import pytest
+import sys
+import os
+import json
+import tempfile
+import shutil
+import threading
+from unittest.mock import patch
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from transformers.address_transformer import TransformCancelledError
+from transformers.enrichment_job import enrich_file, enrich_records, read_completion
+from utils.metrics import PipelineMetrics
+from utils.records import EnrichedRecord
+
+PIPELINE_SETTINGS = ('LOCATIONIQ_DAILY_QUOTA', 'GEOCODE_MAX_CONCURRENCY', 'GEOCODE_CACHE_PATH')
+
+RESULTS = [{'full_address': 'Bahnhofquai, City, Zurich', 'latitude': '47.3768866', 'longitude': '8.5418596'}]
+
+class TestEnrichmentJob:
+
+    def setup_method(self):
+        """Set up temporary data directory, a staged input file and default pipeline settings"""
+        self.env = patch.dict(os.environ)
+        self.env.start()
+        for key in PIPELINE_SETTINGS:
+            os.environ.pop(key, None)
+        self.temp_dir = tempfile.mkdtemp()
+        self.input_path = os.path.join(self.temp_dir, "staging", "extracted.json")
+        self.output_path = os.path.join(self.temp_dir, "staging", "enriched.json")
+        os.makedirs(os.path.dirname(self.input_path))
+        with open(self.input_path, 'w') as f:
+            json.dump([{"project_address": "Bahnhofquai 8"}, {"project_address": ""}], f)
+
+    def teardown_method(self):
+        """Clean up temporary directory and settings"""
+        self.env.stop()
+        shutil.rmtree(self.temp_dir)
+
+    @patch('transformers.address_transformer.get_structured_address')
+    def test_enrich_file(self, mock_geocode):
+        """Test enriching a staged file with the persistent cache under the data directory"""
+        mock_geocode.return_value = RESULTS
+
+        summary = enrich_file(self.input_path, self.output_path, self.temp_dir, "etl_json_pipeline")
+
+        assert summary['records'] == 2
+        assert summary['metrics']['counters']['geocoding_status_total{status="success"}'] == 1
+        with open(self.output_path) as f:
+            assert [r["geocoding_status"] for r in json.load(f)] == ["success", "no_address"]
+        assert os.path.exists(os.path.join(self.temp_dir, "cache", "geocode_cache.sqlite"))
+
+    @patch('transformers.address_transformer.get_structured_address')
+    def test_enrich_records_compact(self, mock_geocode):
+        """Test that the records are held compactly, with and without the quota scheduler"""
+        mock_geocode.return_value = RESULTS
+        records = [{"project_address": "Bahnhofquai 8"}]
+
+        unmetered = enrich_records(records, PipelineMetrics(), self.temp_dir, "etl_json_pipeline")
+        os.environ['LOCATIONIQ_DAILY_QUOTA'] = '10'
+        scheduled = enrich_records(records, PipelineMetrics(), self.temp_dir, "etl_json_pipeline")
+
+        for enriched in (unmetered, scheduled):
+            assert len(enriched) == 1
+            assert isinstance(enriched[0], EnrichedRecord)
+            assert enriched[0].to_dict()["geocoding_status"] == "success"
+
+    @patch('transformers.address_transformer.get_structured_address')
+    def test_rerun_reuses_result_for_same_input(self, mock_geocode):
+        """Test that enriching the same input again returns the recorded summary without geocoding"""
+        mock_geocode.return_value = RESULTS
+
+        first = enrich_file(self.input_path, self.output_path, self.temp_dir, "etl_json_pipeline")
+        second = enrich_file(self.input_path, self.output_path, self.temp_dir, "etl_json_pipeline")
+
+        assert second == first
+        assert mock_geocode.call_count == 1
+        assert read_completion(self.output_path)['result'] == first
+
+    @patch('transformers.address_transformer.get_structured_address')
+    def test_changed_input_enriched_again(self, mock_geocode):
+        """Test that a re-extracted input for the same output isn't answered with the old result"""
+        mock_geocode.return_value = RESULTS
+        enrich_file(self.input_path, self.output_path, self.temp_dir, "etl_json_pipeline")
+        with open(self.input_path, 'w') as f:
+            json.dump([{"project_address": "Bahnhofquai 8"}, {"project_address": "Limmatquai 1"}, {}], f)
+
+        summary = enrich_file(self.input_path, self.output_path, self.temp_dir, "etl_json_pipeline")
+
+        assert summary['records'] == 3
+        with open(self.output_path) as f:
+            assert len(json.load(f)) == 3
+
+    @patch('transformers.address_transformer.get_structured_address')
+    def test_cancelled_job_keeps_previous_output(self, mock_geocode):
+        """Test that a cancelled job stops before geocoding and leaves the old output in place"""
+        with open(self.output_path, 'w') as f:
+            json.dump([{"project_address": "previous"}], f)
+        cancel = threading.Event()
+        cancel.set()
+
+        with pytest.raises(TransformCancelledError):
+            enrich_file(self.input_path, self.output_path, self.temp_dir, "etl_json_pipeline", cancel=cancel)
+
+        mock_geocode.assert_not_called()
+        with open(self.output_path) as f:
+            assert json.load(f) == [{"project_address": "previous"}]
+        assert read_completion(self.output_path) is None
+
+    @patch('transformers.address_transformer.get_structured_address')
+    def test_transform_profiled(self, mock_geocode):
+        """Test that a profile directory receives the transform stage reports"""
+        mock_geocode.return_value = RESULTS
+        profile_dir = os.path.join(self.temp_dir, "profiles")
+
+        enrich_file(self.input_path, self.output_path, self.temp_dir, "etl_json_pipeline", profile_dir=profile_dir)
+
+        assert os.path.exists(os.path.join(profile_dir, "transform.prof"))
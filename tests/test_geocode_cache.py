@@ -0,0 +1,153 @@
+import pytest
+import sys
+import os
+import tempfile
+import shutil
+from unittest.mock import Mock, patch
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from integrations.geocode_cache import GeocodeCache, CachedGeocoder, normalize_address
+from integrations.geocode_util import GeocodingError, NoGeocodingResultsError
+from transformers.address_transformer import AddressTransformer
+from utils.metrics import PipelineMetrics
+
+RESULTS = [{'full_address': 'Bahnhofquai, City, Zurich', 'latitude': '47.3768866', 'longitude': '8.5418596'}]
+
+class TestGeocodeCache:
+
+    def setup_method(self):
+        """Set up temporary directory for tests"""
+        self.temp_dir = tempfile.mkdtemp()
+
+    def teardown_method(self):
+        """Clean up temporary directory"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_normalize_address(self):
+        """Test that whitespace and case differences map to the same key"""
+        assert normalize_address("  Bahnhofquai   8 ") == normalize_address("bahnhofquai 8")
+
+    def test_positive_entry(self):
+        """Test storing and reading geocoding results"""
+        cache = GeocodeCache()
+        assert cache.get("Bahnhofquai 8") is None
+
+        cache.put("Bahnhofquai 8", RESULTS)
+        entry = cache.get("BAHNHOFQUAI 8")
+
+        assert entry.results == RESULTS
+        assert entry.negative is False
+        assert len(cache) == 1
+
+    def test_negative_entry(self):
+        """Test storing a definitive no-result lookup"""
+        cache = GeocodeCache()
+        cache.put_negative("Nowhere 1", "No geocoding results found for address: Nowhere 1")
+        entry = cache.get("Nowhere 1")
+
+        assert entry.negative is True
+        assert entry.error == "No geocoding results found for address: Nowhere 1"
+
+    def test_negative_ttl_is_separate(self):
+        """Test that negative entries use their own TTL"""
+        cache = GeocodeCache(ttl=3600, negative_ttl=60)
+        with patch('integrations.geocode_cache.time.time', return_value=1000.0):
+            cache.put("Bahnhofquai 8", RESULTS)
+            cache.put_negative("Nowhere 1", "No results")
+
+        with patch('integrations.geocode_cache.time.time', return_value=1100.0):
+            assert cache.get("Bahnhofquai 8") is not None
+            assert cache.get("Nowhere 1") is None
+            assert cache.purge_expired() == 1
+
+    def test_persistent_cache(self):
+        """Test that a file-backed cache survives reopening"""
+        path = os.path.join(self.temp_dir, "cache", "geocode.sqlite")
+        cache = GeocodeCache(path)
+        cache.put_many([("Bahnhofquai 8", RESULTS), ("Via San Gottardo 39", RESULTS)])
+        cache.close()
+
+        reopened = GeocodeCache(path)
+        assert reopened.get("Via San Gottardo 39").results == RESULTS
+        assert len(reopened) == 2
+        reopened.close()
+
+    def test_invalid_ttl(self):
+        """Test that non-positive TTLs are rejected"""
+        with pytest.raises(ValueError, match="Cache TTLs must be positive"):
+            GeocodeCache(negative_ttl=0)
+
+    @patch.dict(os.environ, {'GEOCODE_NEGATIVE_CACHE_TTL_SECONDS': '120'})
+    def test_from_env(self):
+        """Test configuring the cache from the environment"""
+        cache = GeocodeCache.from_env()
+
+        assert cache.path == ':memory:'
+        assert cache.negative_ttl == 120
+
+class TestCachedGeocoder:
+
+    def test_caches_results(self):
+        """Test that repeat lookups are served from the cache"""
+        geocoder = Mock(return_value=RESULTS)
+        metrics = PipelineMetrics()
+        cached = CachedGeocoder(geocoder, GeocodeCache(), metrics)
+
+        assert cached("Bahnhofquai 8") == RESULTS
+        assert cached("bahnhofquai  8") == RESULTS
+        geocoder.assert_called_once_with("Bahnhofquai 8")
+        assert metrics.counter_value('geocode_cache_hits_total', kind='positive') == 1
+        assert metrics.counter_value('geocode_cache_misses_total') == 1
+
+    def test_negative_caching(self):
+        """Test that definitive no-result lookups short-circuit repeat calls"""
+        geocoder = Mock(side_effect=NoGeocodingResultsError("No geocoding results found for address: Nowhere"))
+        metrics = PipelineMetrics()
+        cached = CachedGeocoder(geocoder, GeocodeCache(), metrics)
+
+        for _ in range(3):
+            with pytest.raises(NoGeocodingResultsError, match="No geocoding results found"):
+                cached("Nowhere")
+
+        geocoder.assert_called_once()
+        assert metrics.counter_value('geocode_cache_hits_total', kind='negative') == 2
+
+    def test_transient_errors_not_cached(self):
+        """Test that transient failures are retried on the next lookup"""
+        geocoder = Mock(side_effect=[GeocodingError("API request failed: 429 Too Many Requests"), RESULTS])
+        cache = GeocodeCache()
+        cached = CachedGeocoder(geocoder, cache)
+
+        with pytest.raises(GeocodingError, match="429"):
+            cached("Bahnhofquai 8")
+        assert cache.get("Bahnhofquai 8") is None
+
+        assert cached("Bahnhofquai 8") == RESULTS
+        assert geocoder.call_count == 2
+
+    @patch('transformers.address_transformer.get_structured_address')
+    def test_transformer_uses_cache(self, mock_geocode):
+        """Test that the transformer geocodes repeated addresses once"""
+        def mock_geocode_side_effect(address):
+            if address == "Bahnhofquai 8":
+                return RESULTS
+            raise NoGeocodingResultsError(f"No geocoding results found for address: {address}")
+
+        mock_geocode.side_effect = mock_geocode_side_effect
+        input_data = [
+            {"project_address": "Bahnhofquai 8"},
+            {"project_address": "Junk Address"},
+            {"project_address": "Bahnhofquai 8"},
+            {"project_address": "Junk Address"}
+        ]
+
+        metrics = PipelineMetrics()
+        transformer = AddressTransformer(metrics=metrics, cache=GeocodeCache())
+        results = list(transformer.transform(iter(input_data)))
+
+        assert [r["geocoding_status"] for r in results] == ["success", "failed", "success", "failed"]
+        assert results[3]["geocoding_error"] == "No geocoding results found for address: Junk Address"
+        assert mock_geocode.call_count == 2
+        assert metrics.counter_value('geocode_api_calls_total') == 2
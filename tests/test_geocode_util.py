@@ -7,7 +7,7 @@ import requests
 # Add src directory to path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from integrations.geocode_util import get_structured_address, GeocodingError
+from integrations.geocode_util import get_structured_address, GeocodingError, NoGeocodingResultsError, RateLimitedError
 
 class TestGeocodeUtil:
     
@@ -129,4 +129,60 @@ class TestGeocodeUtil:
         mock_get.return_value = mock_response
         
         with pytest.raises(GeocodingError, match="API request failed"):
-            get_structured_address("Test Address")
\ No newline at end of file
+            get_structured_address("Test Address")
+    
+    @patch.dict(os.environ, {'LOCATIONIQ_API_KEY': 'test_api_key'})
+    @patch('integrations.geocode_util.requests.get')
+    @patch('integrations.geocode_util.time.sleep')
+    def test_unable_to_geocode_response(self, mock_sleep, mock_get):
+        """Test that LocationIQ's 404 'Unable to geocode' is a definitive no-result"""
+        mock_response = Mock()
+        mock_response.status_code = 404
+        mock_response.json.return_value = {'error': 'Unable to geocode'}
+        mock_get.return_value = mock_response
+        
+        with pytest.raises(NoGeocodingResultsError, match="No geocoding results found for address: Junk"):
+            get_structured_address("Junk")
+    
+    @patch.dict(os.environ, {'LOCATIONIQ_API_KEY': 'test_api_key'})
+    @patch('integrations.geocode_util.requests.get')
+    @patch('integrations.geocode_util.time.sleep')
+    def test_no_results_error_type(self, mock_sleep, mock_get):
+        """Test that empty results raise NoGeocodingResultsError without re-wrapping"""
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.raise_for_status.return_value = None
+        mock_response.json.return_value = []
+        mock_get.return_value = mock_response
+        
+        with pytest.raises(NoGeocodingResultsError) as exc_info:
+            get_structured_address("Invalid Address")
+        assert str(exc_info.value) == "No geocoding results found for address: Invalid Address"
+    
+    @patch.dict(os.environ, {'LOCATIONIQ_API_KEY': 'test_api_key'})
+    @patch('integrations.geocode_util.requests.get')
+    @patch('integrations.geocode_util.time.sleep')
+    def test_transient_errors_are_not_no_results(self, mock_sleep, mock_get):
+        """Test that HTTP errors are plain GeocodingErrors, not definitive no-results"""
+        mock_response = Mock()
+        mock_response.status_code = 429
+        mock_response.raise_for_status.side_effect = requests.exceptions.HTTPError("429 Too Many Requests")
+        mock_get.return_value = mock_response
+        
+        with pytest.raises(GeocodingError) as exc_info:
+            get_structured_address("Test Address")
+        assert not isinstance(exc_info.value, NoGeocodingResultsError)
+    
+    @patch.dict(os.environ, {'LOCATIONIQ_API_KEY': 'test_api_key'})
+    @patch('integrations.geocode_util.requests.get')
+    @patch('integrations.geocode_util.time.sleep')
+    def test_rate_limited_retry_after(self, mock_sleep, mock_get):
+        """Test that the Retry-After header of a 429 is passed on with the error"""
+        mock_response = Mock()
+        mock_response.status_code = 429
+        mock_response.headers = requests.structures.CaseInsensitiveDict({'Retry-After': '12'})
+        mock_get.return_value = mock_response
+        
+        with pytest.raises(RateLimitedError) as exc_info:
+            get_structured_address("Test Address")
+        assert exc_info.value.retry_after == 12.0
@@ -0,0 +1,74 @@
+import pytest
+import sys
+import os
+import json
+import subprocess
+from unittest.mock import patch
+
+REPO_ROOT = os.path.join(os.path.dirname(__file__), '..')
+SRC_DIR = os.path.abspath(os.path.join(REPO_ROOT, 'src'))
+DAGS_DIR = os.path.abspath(os.path.join(REPO_ROOT, 'dags'))
+PLUGINS_DIR = os.path.abspath(os.path.join(REPO_ROOT, 'plugins'))
+
+# Add src directory to path
+sys.path.append(SRC_DIR)
+
+from integrations.geocode_util import load_environment
+
+PROBE = """
+import json, logging, os, sys
+before = list(sys.path)
+import {module}
+print(json.dumps({{
+    'sys_path_changed': sys.path != before,
+    'root_handlers': len(logging.getLogger().handlers),
+    'api_key_loaded': 'LOCATIONIQ_API_KEY' in os.environ,
+    'loaded': [m for m in ('requests', 'numpy', 'dotenv', 'transformers.address_transformer') if m in sys.modules]
+}}))
+"""
+
+def probe_import(module):
+    env = {key: value for key, value in os.environ.items() if key != 'LOCATIONIQ_API_KEY'}
+    env['PYTHONPATH'] = os.pathsep.join([SRC_DIR, DAGS_DIR, PLUGINS_DIR])
+    completed = subprocess.run([sys.executable, '-c', PROBE.format(module=module)],
+                               env=env, capture_output=True, text=True, check=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+class TestLazyImports:
+
+    def test_transformer_import_has_no_side_effects(self):
+        """Test that importing the transformer doesn't touch sys.path, logging or the environment"""
+        result = probe_import('transformers.address_transformer')
+
+        assert result['sys_path_changed'] is False
+        assert result['root_handlers'] == 0
+        assert result['api_key_loaded'] is False
+        assert 'dotenv' not in result['loaded']
+
+    def test_geocode_util_import_does_not_load_dotenv(self):
+        """Test that importing the geocoder doesn't read .env"""
+        result = probe_import('integrations.geocode_util')
+
+        assert result['api_key_loaded'] is False
+        assert 'dotenv' not in result['loaded']
+
+    @patch.dict(os.environ, {}, clear=True)
+    def test_load_environment(self):
+        """Test that load_environment reads the repository .env file"""
+        load_environment()
+
+        assert os.environ.get('LOCATIONIQ_API_KEY')
+
+    def test_dag_import_is_lightweight(self):
+        """Test that parsing the DAG doesn't import pipeline dependencies"""
+        pytest.importorskip('airflow')
+        result = probe_import('etl_dag')
+
+        assert result['loaded'] == []
+
+    def test_plugin_import_is_lightweight(self):
+        """Test that the triggerer can deserialize the geocoding trigger without pipeline dependencies"""
+        pytest.importorskip('airflow')
+        result = probe_import('geocoding.operators')
+
+        assert result['loaded'] == []
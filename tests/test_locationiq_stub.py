@@ -0,0 +1,108 @@
+import pytest
+import sys
+import os
+import tempfile
+import requests
+from unittest.mock import patch
+
+# Add repository root and src directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from benchmarks.locationiq_stub import LocationIQStub, fake_candidates
+from benchmarks.bench_pipeline import run_single, percentile, pipeline_env
+from integrations.geocode_util import get_structured_address, GeocodingError
+
+class TestLocationIQStub:
+
+    def test_fake_candidates_shape(self):
+        """Test that stub candidates match the LocationIQ response shape"""
+        candidates = fake_candidates("Bahnhofquai 8", count=3)
+
+        assert len(candidates) == 3
+        for candidate in candidates:
+            assert {'display_name', 'lat', 'lon'} <= set(candidate)
+            float(candidate['lat'])
+            float(candidate['lon'])
+        assert candidates == fake_candidates("Bahnhofquai 8", count=3)
+
+    def test_geocoding_against_stub(self):
+        """Test get_structured_address against the local stand-in"""
+        with LocationIQStub() as stub:
+            with patch.dict(os.environ, {'LOCATIONIQ_API_KEY': 'test', 'LOCATIONIQ_API_URL': stub.url,
+                                         'LOCATIONIQ_RATE_LIMIT_DELAY': '0'}):
+                results = get_structured_address("Bahnhofquai 8")
+
+        assert len(results) == 3
+        assert results[0]['full_address'] == "Bahnhofquai 8, Candidate 0, Switzerland"
+        assert stub.stats['ok'] == 1
+
+    def test_rate_limiting(self):
+        """Test that requests above the rate limit get HTTP 429"""
+        with LocationIQStub(rate_limit_per_sec=2) as stub:
+            statuses = [requests.get(stub.url, params={'key': 'test', 'q': 'x'}).status_code for _ in range(4)]
+
+        assert statuses[:2] == [200, 200]
+        assert 429 in statuses[2:]
+        assert stub.stats['rate_limited'] >= 1
+
+    def test_error_responses(self):
+        """Test configurable server errors and no-result responses"""
+        with LocationIQStub(error_rate=1.0) as stub:
+            assert requests.get(stub.url, params={'key': 'test', 'q': 'x'}).status_code == 500
+        with LocationIQStub(no_result_rate=1.0) as stub:
+            response = requests.get(stub.url, params={'key': 'test', 'q': 'x'})
+            assert response.status_code == 404
+            assert response.json() == {'error': 'Unable to geocode'}
+            with patch.dict(os.environ, {'LOCATIONIQ_API_KEY': 'test', 'LOCATIONIQ_API_URL': stub.url,
+                                         'LOCATIONIQ_RATE_LIMIT_DELAY': '0'}):
+                with pytest.raises(GeocodingError):
+                    get_structured_address("Nowhere")
+
+    def test_run_single_benchmark(self):
+        """Test a small end-to-end benchmark run"""
+        with LocationIQStub() as stub, tempfile.TemporaryDirectory() as workdir:
+            with patch.dict(os.environ, {'LOCATIONIQ_API_KEY': 'test', 'LOCATIONIQ_API_URL': stub.url,
+                                         'LOCATIONIQ_RATE_LIMIT_DELAY': '0'}):
+                result = run_single(20, 5, workdir)
+
+        assert result['records'] == 20
+        assert result['geocode_calls'] == 20
+        assert result['statuses'] == {'success': 20}
+        assert result['records_per_sec'] > 0
+        assert result['latency_ms']['p50'] <= result['latency_ms']['p99']
+        assert result['peak_rss_mb'] > 0
+
+    def test_run_single_benchmark_with_cache_and_concurrency(self):
+        """Test a benchmark run through the cache and the adaptive concurrency limiter"""
+        with LocationIQStub() as stub, tempfile.TemporaryDirectory() as workdir:
+            with patch.dict(os.environ, pipeline_env([stub.url], max_concurrency=4, cache_path=':memory:')):
+                result = run_single(20, 5, workdir)
+
+        assert result['statuses'] == {'success': 20}
+        assert result['max_concurrency'] == 4
+        assert result['geocode_calls'] + result['cache_hits'] + result['coalesced'] == 20
+        assert result['geocode_calls'] <= 5
+
+    def test_pipeline_env(self):
+        """Test that the subprocess environment lists every stub and replaces inherited settings"""
+        with patch.dict(os.environ, {'GEOCODE_CACHE_PATH': '/data/cache.sqlite', 'LOCATIONIQ_HEDGE': '1'}):
+            single = pipeline_env(['http://a/search'])
+            routed = pipeline_env(['http://a/search', 'http://b/search'], max_concurrency=8,
+                                  cache_path=':memory:', hedge=True)
+
+        assert single['LOCATIONIQ_API_URL'] == 'http://a/search'
+        assert single['GEOCODE_MAX_CONCURRENCY'] == '1'
+        assert not {'GEOCODE_CACHE_PATH', 'LOCATIONIQ_HEDGE', 'LOCATIONIQ_ENDPOINTS'} & set(single)
+        assert routed['LOCATIONIQ_ENDPOINTS'] == 'http://a/search,http://b/search'
+        assert routed['GEOCODE_MAX_CONCURRENCY'] == '8'
+        assert routed['GEOCODE_CACHE_PATH'] == ':memory:'
+        assert routed['LOCATIONIQ_HEDGE'] == '1'
+
+    def test_percentile(self):
+        """Test nearest-rank percentiles"""
+        values = [float(i) for i in range(1, 101)]
+
+        assert percentile(values, 0.5) == 50.0
+        assert percentile(values, 0.99) == 99.0
+        assert percentile([], 0.5) is None
@@ -0,0 +1,166 @@
+import pytest
+import sys
+import os
+import json
+import socket
+import tempfile
+import shutil
+from unittest.mock import patch
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.metrics import PipelineMetrics, export_metrics
+from transformers.address_transformer import AddressTransformer
+from integrations.geocode_util import GeocodingError
+
+class TestPipelineMetrics:
+
+    def setup_method(self):
+        """Set up temporary directory for tests"""
+        self.temp_dir = tempfile.mkdtemp()
+
+    def teardown_method(self):
+        """Clean up temporary directory"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_counters_and_gauges(self):
+        """Test counter increments and gauge values"""
+        metrics = PipelineMetrics()
+        metrics.incr('records_in_total', stage='transform')
+        metrics.incr('records_in_total', 2, stage='transform')
+        metrics.set_gauge('queue_depth', 5)
+
+        assert metrics.counter_value('records_in_total', stage='transform') == 3
+        assert metrics.counter_value('records_in_total', stage='load') == 0
+
+        summary = metrics.summary()
+        assert summary['counters'] == {'records_in_total{stage="transform"}': 3}
+        assert summary['gauges'] == {'queue_depth': 5}
+        json.dumps(summary)
+
+    def test_histogram_summary(self):
+        """Test histogram observations in the summary"""
+        metrics = PipelineMetrics()
+        metrics.observe('geocode_latency_seconds', 0.1)
+        metrics.observe('geocode_latency_seconds', 0.3)
+
+        histogram = metrics.summary()['histograms']['geocode_latency_seconds']
+        assert histogram['count'] == 2
+        assert histogram['sum'] == pytest.approx(0.4)
+        assert histogram['mean'] == pytest.approx(0.2)
+        assert histogram['max'] == pytest.approx(0.3)
+
+    def test_prometheus_format(self):
+        """Test the Prometheus text exposition output"""
+        metrics = PipelineMetrics(buckets=(0.1, 1.0))
+        metrics.incr('geocoding_status_total', status='success')
+        metrics.observe('geocode_latency_seconds', 0.05)
+        metrics.observe('geocode_latency_seconds', 0.5)
+        metrics.observe('geocode_latency_seconds', 5)
+
+        text = metrics.to_prometheus()
+
+        assert '# TYPE etl_geocoding_status_total counter' in text
+        assert 'etl_geocoding_status_total{status="success"} 1' in text
+        assert '# TYPE etl_geocode_latency_seconds histogram' in text
+        assert 'etl_geocode_latency_seconds_bucket{le="0.1"} 1' in text
+        assert 'etl_geocode_latency_seconds_bucket{le="1.0"} 2' in text
+        assert 'etl_geocode_latency_seconds_bucket{le="+Inf"} 3' in text
+        assert 'etl_geocode_latency_seconds_count 3' in text
+
+    def test_write_prometheus(self):
+        """Test writing a textfile collector file"""
+        metrics = PipelineMetrics()
+        metrics.incr('records_out_total', stage='load')
+        path = os.path.join(self.temp_dir, 'metrics', 'etl.prom')
+
+        metrics.write_prometheus(path)
+
+        with open(path) as f:
+            assert 'etl_records_out_total{stage="load"} 1' in f.read()
+        assert not os.path.exists(path + '.tmp')
+
+    def test_send_statsd(self):
+        """Test pushing metrics to a StatsD server over UDP"""
+        receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        receiver.bind(('127.0.0.1', 0))
+        receiver.settimeout(2)
+        try:
+            metrics = PipelineMetrics()
+            metrics.incr('geocoding_status_total', status='failed')
+            metrics.set_gauge('in_flight', 2)
+            metrics.observe('geocode_latency_seconds', 0.25)
+            metrics.send_statsd('127.0.0.1', receiver.getsockname()[1])
+
+            lines = receiver.recv(4096).decode('utf-8').split('\n')
+        finally:
+            receiver.close()
+
+        assert 'etl.geocoding_status_total.failed:1|c' in lines
+        assert 'etl.in_flight:2|g' in lines
+        assert 'etl.geocode_latency_seconds.count:1|c' in lines
+        assert 'etl.geocode_latency_seconds.mean_ms:250.0|g' in lines
+
+    def test_export_metrics_from_environment(self):
+        """Test exporting to the textfile directory configured in the environment"""
+        metrics = PipelineMetrics()
+        metrics.incr('records_in_total', stage='transform')
+
+        with patch.dict(os.environ, {'ETL_METRICS_TEXTFILE_DIR': self.temp_dir}, clear=True):
+            export_metrics(metrics, 'etl_json_pipeline_transform_task')
+
+        assert os.path.exists(os.path.join(self.temp_dir, 'etl_json_pipeline_transform_task.prom'))
+
+    def test_export_metrics_errors_are_logged(self):
+        """Test that a failing sink doesn't raise"""
+        metrics = PipelineMetrics()
+        metrics.incr('records_in_total', stage='load')
+        blocker = os.path.join(self.temp_dir, 'not_a_directory')
+        with open(blocker, 'w') as f:
+            f.write('')
+
+        environment = {'ETL_METRICS_TEXTFILE_DIR': blocker, 'STATSD_HOST': 'statsd.invalid'}
+        with patch.dict(os.environ, environment, clear=True):
+            with patch.object(socket.socket, 'sendto', side_effect=socket.gaierror("Name or service not known")):
+                export_metrics(metrics, 'etl_json_pipeline_load_task')
+
+    @patch('transformers.address_transformer.get_structured_address')
+    def test_transformer_metrics(self, mock_geocode):
+        """Test that the transformer records counts, statuses and latencies"""
+        def mock_geocode_side_effect(address):
+            if address == "Good Address":
+                return [{'full_address': 'Good Address, City', 'latitude': '47.0', 'longitude': '8.0'}]
+            raise GeocodingError("Bad address")
+
+        mock_geocode.side_effect = mock_geocode_side_effect
+        input_data = [
+            {"project_address": "Good Address"},
+            {"project_address": "Bad Address"},
+            {"project_address": ""},
+            "invalid_string_record"
+        ]
+
+        metrics = PipelineMetrics()
+        list(AddressTransformer(metrics=metrics).transform(iter(input_data)))
+
+        assert metrics.counter_value('records_in_total', stage='transform') == 4
+        assert metrics.counter_value('records_out_total', stage='transform') == 3
+        assert metrics.counter_value('geocode_api_calls_total') == 2
+        assert metrics.counter_value('geocoding_status_total', status='success') == 1
+        assert metrics.counter_value('geocoding_status_total', status='failed') == 1
+        assert metrics.counter_value('geocoding_status_total', status='no_address') == 1
+        assert metrics.summary()['histograms']['geocode_latency_seconds']['count'] == 2
+
+    @patch('transformers.address_transformer.get_structured_address')
+    def test_status_counted_once_when_build_fails(self, mock_geocode):
+        """Test that a record whose compact build fails is only counted as an error"""
+        mock_geocode.return_value = [{'full_address': 'Bad Coordinates', 'latitude': 'x', 'longitude': 'y'}]
+
+        metrics = PipelineMetrics()
+        transformer = AddressTransformer(metrics=metrics, compact=True, dedup_radius_m=None)
+        [result] = list(transformer.transform(iter([{"project_address": "Bad Coordinates"}])))
+
+        assert result.status == 'error'
+        assert metrics.counter_value('geocoding_status_total', status='success') == 0
+        assert metrics.counter_value('geocoding_status_total', status='error') == 1
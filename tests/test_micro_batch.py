@@ -0,0 +1,255 @@
+import pytest
+import sys
+import os
+import json
+import tempfile
+import shutil
+import threading
+import time
+from unittest.mock import patch
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from integrations.quota_scheduler import DailyQuota
+from streaming.micro_batch import MicroBatchProcessor
+from transformers.address_transformer import AddressTransformer
+from utils.metrics import PipelineMetrics
+
+RESULTS = [{'full_address': 'Bahnhofquai, City, Zurich', 'latitude': '47.3768866', 'longitude': '8.5418596'}]
+
+def make_record(address):
+    return {"publication_media": "Media A", "project_title": "Project", "date_scraped": "01/06/2025 10:00:00",
+            "project_address": address}
+
+class TestMicroBatchProcessor:
+
+    def setup_method(self):
+        """Set up temporary stream directory for tests"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.patcher = patch('transformers.address_transformer.get_structured_address', return_value=RESULTS)
+        self.mock_geocode = self.patcher.start()
+
+    def teardown_method(self):
+        """Clean up temporary directory"""
+        self.patcher.stop()
+        shutil.rmtree(self.temp_dir)
+
+    def drop(self, name, records, age=0.0):
+        path = os.path.join(self.temp_dir, "incoming", name)
+        with open(path, 'w') as f:
+            json.dump(records, f)
+        if age:
+            mtime = time.time() - age
+            os.utime(path, (mtime, mtime))
+        return path
+
+    def original_names(self, directory):
+        """Names of the files in a directory without the drop-time prefix added on claim"""
+        return sorted(name.split('-', 1)[1] for name in os.listdir(os.path.join(self.temp_dir, directory)))
+
+    def crash(self, processor):
+        """Releases a processor's lease without cleaning up, as its process exiting would"""
+        processor._lease.close()
+
+    def outputs(self):
+        output_dir = os.path.join(self.temp_dir, "output")
+        return sorted(name for name in os.listdir(output_dir) if name.endswith('.json'))
+
+    def read_output(self, name):
+        with open(os.path.join(self.temp_dir, "output", name)) as f:
+            return json.load(f)
+
+    def make_processor(self, **kwargs):
+        return MicroBatchProcessor(self.temp_dir, AddressTransformer(compact=True), **kwargs)
+
+    def test_batch_size_bound(self):
+        """Test that a batch is flushed once it holds batch_size records"""
+        processor = self.make_processor(batch_size=3, max_latency=3600)
+        self.drop("a.json", [make_record("A 1"), make_record("A 2")])
+        assert processor.run_once() == 0
+        assert self.outputs() == []
+
+        self.drop("b.json", [make_record("B 1")])
+        assert processor.run_once() == 1
+
+        [output] = self.outputs()
+        assert [r["project_address"] for r in self.read_output(output)] == ["A 1", "A 2", "B 1"]
+        assert self.original_names("done") == ["a.json", "b.json"]
+        assert os.listdir(processor.processing_dir) == []
+
+    def test_latency_bound(self):
+        """Test that a small batch is flushed once its oldest file is older than max_latency"""
+        processor = self.make_processor(batch_size=100, max_latency=2)
+        self.drop("a.json", [make_record("A 1")], age=5)
+
+        assert processor.run_once() == 1
+        assert len(self.outputs()) == 1
+
+    def test_claims_each_file_once(self):
+        """Test that two processors on one directory never process the same file"""
+        first = self.make_processor(batch_size=1, max_latency=0)
+        second = self.make_processor(batch_size=1, max_latency=0)
+        for i in range(10):
+            self.drop(f"{i:02d}.json", [make_record(f"Street {i}")])
+
+        threads = [threading.Thread(target=processor.run_once) for processor in (first, second)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+
+        addresses = sorted(r["project_address"] for name in self.outputs() for r in self.read_output(name))
+        assert addresses == sorted(f"Street {i}" for i in range(10))
+
+    def test_ignores_partial_files(self):
+        """Test that temporary, hidden and recently modified files are not claimed"""
+        processor = self.make_processor(batch_size=1, max_latency=0, min_file_age=60)
+        self.drop(".a.json", [make_record("A 1")], age=120)
+        self.drop("b.json.tmp", [make_record("B 1")], age=120)
+        self.drop("c.json", [make_record("C 1")])
+
+        assert processor.claim() == 0
+
+    def test_redelivered_file_not_clobbered(self):
+        """Test that a file re-delivered under the same name is claimed alongside the earlier drop"""
+        processor = self.make_processor(batch_size=100, max_latency=3600)
+        self.drop("batch.json", [make_record("A 1")], age=10)
+        processor.claim()
+        self.drop("batch.json", [make_record("B 1")])
+        processor.claim()
+
+        assert self.original_names(processor.processing_dir) == ["batch.json", "batch.json"]
+        processor.run_once(flush=True)
+
+        assert self.original_names("done") == ["batch.json", "batch.json"]
+        [output] = self.outputs()
+        assert [r["project_address"] for r in self.read_output(output)] == ["A 1", "B 1"]
+
+    def test_claims_only_one_batch(self):
+        """Test that files beyond the next batch stay in incoming unread"""
+        processor = self.make_processor(batch_size=2, max_latency=3600)
+        for i in range(5):
+            self.drop(f"{i:02d}.json", [make_record(f"Street {i}")], age=10 - i)
+
+        assert processor.claim() == 2
+        assert len(os.listdir(os.path.join(self.temp_dir, "incoming"))) == 3
+
+    def test_unreadable_file_moved_to_failed(self):
+        """Test that a claimed file that can't be read is moved aside instead of stopping the loop"""
+        metrics = PipelineMetrics()
+        processor = MicroBatchProcessor(self.temp_dir, AddressTransformer(compact=True), batch_size=1,
+                                        max_latency=0, metrics=metrics)
+        self.drop("a.json", [make_record("A 1")])
+
+        with patch('streaming.micro_batch.read_json', side_effect=OSError("Error reading file")):
+            assert processor.run_once() == 0
+
+        assert self.original_names("failed") == ["a.json"]
+        assert metrics.counter_value('stream_files_failed_total') == 1
+
+    def test_quota_exceeded_records_deferred(self):
+        """Test that records over the daily quota are queued for later batches instead of written"""
+        transformer = AddressTransformer(compact=True, quota=DailyQuota(1))
+        processor = MicroBatchProcessor(self.temp_dir, transformer, batch_size=2, max_latency=0)
+        self.drop("a.json", [make_record("A 1"), make_record("B 1")])
+
+        processor.run_once()
+
+        [output] = self.outputs()
+        assert len(self.read_output(output)) == 1
+        with open(os.path.join(self.temp_dir, "deferred", "stream.jsonl")) as f:
+            assert len(f.readlines()) == 1
+
+    def test_invalid_records_dead_lettered(self):
+        """Test that invalid records are routed to the file's dead-letter file"""
+        processor = self.make_processor(batch_size=1, max_latency=0)
+        self.drop("a.json", [make_record("A 1"), {"project_address": "missing fields"}])
+
+        processor.run_once()
+
+        [output] = self.outputs()
+        assert len(self.read_output(output)) == 1
+        [dead_letter] = os.listdir(os.path.join(self.temp_dir, "dead_letter"))
+        assert dead_letter.endswith("-a.jsonl")
+        with open(os.path.join(self.temp_dir, "dead_letter", dead_letter)) as f:
+            assert len(f.readlines()) == 1
+
+    def test_deterministic_output_on_replay(self):
+        """Test that a batch interrupted after its manifest is replayed to the same output"""
+        processor = self.make_processor(batch_size=2, max_latency=3600)
+        self.drop("a.json", [make_record("A 1")])
+        self.drop("b.json", [make_record("B 1")])
+        processor.claim()
+        batch_id = MicroBatchProcessor.batch_id(processor._pending)
+
+        with patch('streaming.micro_batch.write_json', side_effect=KeyboardInterrupt):
+            with pytest.raises(KeyboardInterrupt):
+                processor.run_once()
+        assert self.outputs() == []
+        assert len(os.listdir(processor.batches_dir)) == 1
+        self.crash(processor)
+
+        restarted = self.make_processor(batch_size=2, max_latency=3600)
+        assert restarted.recover() == 1
+
+        assert self.outputs() == [f"enriched_{batch_id}.json"]
+        assert os.listdir(os.path.join(self.temp_dir, "batches")) == [restarted.owner]
+        assert os.listdir(restarted.batches_dir) == []
+        assert self.original_names("done") == ["a.json", "b.json"]
+
+    def test_recover_leaves_live_claims(self):
+        """Test that a starting processor only takes over the claims of processors that exited"""
+        running = self.make_processor(batch_size=100, max_latency=3600)
+        self.drop("a.json", [make_record("A 1")])
+        assert running.claim() == 1
+
+        starting = self.make_processor(batch_size=100, max_latency=3600)
+        starting.recover()
+        assert starting._pending == []
+        assert self.original_names(running.processing_dir) == ["a.json"]
+
+        self.crash(running)
+        starting.recover()
+        assert [pending.name.split('-', 1)[1] for pending in starting._pending] == ["a.json"]
+        assert not os.path.exists(running.processing_dir)
+        starting.run_once(flush=True)
+        assert [r["project_address"] for name in self.outputs() for r in self.read_output(name)] == ["A 1"]
+
+    def test_close_hands_over_unprocessed_claims(self):
+        """Test that claims left by a cleanly closed processor are recovered"""
+        closed = self.make_processor(batch_size=100, max_latency=3600)
+        self.drop("a.json", [make_record("A 1")])
+        closed.claim()
+        closed.close()
+        assert os.listdir(os.path.join(self.temp_dir, "owners")) == []
+
+        successor = self.make_processor(batch_size=100, max_latency=3600)
+        successor.recover()
+        assert len(successor._pending) == 1
+
+    def test_failed_batch(self):
+        """Test that files of a failing batch are moved aside and the processor continues"""
+        metrics = PipelineMetrics()
+        processor = MicroBatchProcessor(self.temp_dir, AddressTransformer(compact=True), batch_size=1,
+                                        max_latency=0, metrics=metrics)
+        self.drop("a.json", [make_record("A 1")])
+
+        with patch('streaming.micro_batch.write_json', side_effect=OSError("disk full")):
+            assert processor.run_once() == 1
+
+        assert self.original_names("failed") == ["a.json"]
+        assert metrics.counter_value('stream_batches_total', status='failed') == 1
+
+    def test_run_until_stopped(self):
+        """Test the long-running loop picks up dropped files and flushes on stop"""
+        processor = self.make_processor(batch_size=100, max_latency=3600, poll_interval=0.01)
+        stop = threading.Event()
+        thread = threading.Thread(target=processor.run, args=(stop,))
+        thread.start()
+        self.drop("a.json", [make_record("A 1")])
+        time.sleep(0.1)
+        stop.set()
+        thread.join(5)
+
+        assert len(self.outputs()) == 1
@@ -0,0 +1,134 @@
+import pytest
+import sys
+import os
+import json
+import tempfile
+import shutil
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.fingerprint import DEFAULT_KEY_FIELDS, record_fingerprint
+from utils.offset_index import IndexedJsonReader, index_path_for
+from utils.records import EnrichedRecord
+from utils.writer import write_json
+
+def make_record(i, address=None):
+    return {"publication_media": "Media A", "project_title": f"Projekt {i} – Zürich",
+            "date_scraped": f"{i % 28 + 1:02d}/06/2025 10:00:00",
+            "project_address": address or f"Bahnhofstrasse {i}, Zürich",
+            "geocoded_addresses": [{"full_address": f"Bahnhofstrasse {i}", "latitude": 47.0, "longitude": 8.5}]}
+
+class TestRecordFingerprint:
+
+    def test_depends_only_on_key_fields(self):
+        """Test that the fingerprint ignores fields outside the key and their order"""
+        record = make_record(1)
+        other = dict(reversed(list(record.items())), project_title="Changed")
+        assert record_fingerprint(record) == record_fingerprint(other)
+        assert record_fingerprint(record) != record_fingerprint(make_record(2))
+        assert len(record_fingerprint(record)) == 32
+
+    def test_enriched_record(self):
+        """Test that compact records are fingerprinted by their source record"""
+        source = make_record(1)
+        assert record_fingerprint(EnrichedRecord(source)) == record_fingerprint(source)
+
+class TestOffsetIndex:
+
+    def setup_method(self):
+        """Set up temporary directory for tests"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "enriched.json")
+
+    def teardown_method(self):
+        """Clean up temporary directory"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_output_unchanged_by_index(self):
+        """Test that writing the index leaves the JSON output byte-identical"""
+        records = [make_record(i) for i in range(5)]
+        plain_path = os.path.join(self.temp_dir, "plain.json")
+        write_json(iter(records), plain_path)
+        write_json(iter(records), self.path, index_key=DEFAULT_KEY_FIELDS)
+
+        with open(plain_path, 'rb') as plain, open(self.path, 'rb') as indexed:
+            assert plain.read() == indexed.read()
+        assert not os.path.exists(index_path_for(plain_path))
+        assert os.path.exists(index_path_for(self.path))
+
+    def test_random_access(self):
+        """Test that records are found by key and decoded from their byte range"""
+        records = [make_record(i) for i in range(200)]
+        write_json(iter(records), self.path, index_key=DEFAULT_KEY_FIELDS)
+
+        with IndexedJsonReader(self.path) as reader:
+            assert len(reader) == 200
+            for record in (records[0], records[137], records[199]):
+                assert reader.get(record_fingerprint(record)) == [record]
+                assert reader.get_record(record) == [record]
+            assert reader.get(record_fingerprint(make_record(500))) == []
+            assert record_fingerprint(records[5]) in reader
+
+    def test_duplicate_keys(self):
+        """Test that every record sharing a key is returned in file order"""
+        first = make_record(1, address="Same 1")
+        second = dict(make_record(1, address="Same 1"), project_title="Second")
+        write_json(iter([first, make_record(2), second]), self.path, index_key=DEFAULT_KEY_FIELDS)
+
+        with IndexedJsonReader(self.path) as reader:
+            assert reader.get_record(first) == [first, second]
+
+    def test_custom_key_function(self):
+        """Test indexing by a caller-supplied key"""
+        records = [make_record(i) for i in range(3)]
+        write_json(iter(records), self.path, index_key=lambda record: record["project_title"])
+
+        with IndexedJsonReader(self.path) as reader:
+            assert reader.get("Projekt 2 – Zürich") == [records[2]]
+            with pytest.raises(ValueError):
+                reader.get_record(records[2])
+
+    def test_empty_output(self):
+        """Test that an empty output gets an empty index"""
+        write_json(iter([]), self.path, index_key=DEFAULT_KEY_FIELDS)
+
+        with IndexedJsonReader(self.path) as reader:
+            assert len(reader) == 0
+            assert reader.get(record_fingerprint(make_record(1))) == []
+
+    def test_stale_index(self):
+        """Test that an index is rejected when the data changed without changing size"""
+        write_json(iter([make_record(1)]), self.path, index_key=DEFAULT_KEY_FIELDS)
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        with open(self.path, 'wb') as f:
+            f.write(data.replace(b'Media A', b'Media B'))
+
+        with pytest.raises(ValueError, match="stale"):
+            IndexedJsonReader(self.path)
+
+    def test_copied_output_keeps_index(self):
+        """Test that an unchanged copy of the output is accepted by its checksum"""
+        records = [make_record(i) for i in range(3)]
+        write_json(iter(records), self.path, index_key=DEFAULT_KEY_FIELDS)
+        copy_path = os.path.join(self.temp_dir, "copy.json")
+        shutil.copyfile(self.path, copy_path)
+        shutil.copyfile(index_path_for(self.path), index_path_for(copy_path))
+
+        with IndexedJsonReader(copy_path) as reader:
+            assert reader.get_record(records[1]) == [records[1]]
+
+    def test_rewrite_without_index_removes_old_index(self):
+        """Test that rewriting an output without an index key drops its previous index"""
+        write_json(iter([make_record(1)]), self.path, index_key=DEFAULT_KEY_FIELDS)
+        write_json(iter([make_record(1), make_record(2)]), self.path)
+
+        assert not os.path.exists(index_path_for(self.path))
+
+    def test_missing_index(self):
+        """Test that opening a file without an index fails"""
+        write_json(iter([make_record(1)]), self.path)
+
+        with pytest.raises(FileNotFoundError):
+            IndexedJsonReader(self.path)
@@ -0,0 +1,141 @@
+import pytest
+import sys
+import os
+import json
+import tempfile
+import shutil
+from unittest.mock import patch
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.offset_index import index_path_for
+from utils.partitioned_store import PartitionedJsonStore
+from utils.reader import read_json
+from utils.records import EnrichedRecord
+
+def make_record(i, title="Projekt", date_scraped="01/06/2025 10:00:00"):
+    return {"publication_media": "Media A", "project_title": f"{title} {i} – Zürich",
+            "date_scraped": date_scraped, "project_address": f"Bahnhofstrasse {i}, Zürich",
+            "geocoded_addresses": [{"full_address": f"Bahnhofstrasse {i}", "latitude": 47.0, "longitude": 8.5}]}
+
+class TestPartitionedJsonStore:
+
+    def setup_method(self):
+        """Set up temporary store directory for tests"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.root = os.path.join(self.temp_dir, "enriched_data")
+
+    def teardown_method(self):
+        """Clean up temporary directory"""
+        shutil.rmtree(self.temp_dir)
+
+    def titles(self, store):
+        return sorted(record["project_title"] for record in store.read_all())
+
+    def test_insert_and_update(self):
+        """Test that records are merged by fingerprint instead of appended"""
+        store = PartitionedJsonStore(self.root, partitions=4)
+        assert store.upsert(iter(make_record(i) for i in range(10)))['inserted'] == 10
+
+        stats = store.upsert(iter([make_record(3, title="Updated"), make_record(10)]))
+
+        assert stats['inserted'] == 1 and stats['updated'] == 1
+        assert len(store) == 11
+        assert store.get(make_record(3))["project_title"] == "Updated 3 – Zürich"
+        assert make_record(10) in store
+        assert make_record(11) not in store
+        assert len(list(store.read_all())) == 11
+
+    def test_rewrites_only_affected_partitions(self):
+        """Test that partitions without delta records are left untouched"""
+        store = PartitionedJsonStore(self.root, partitions=8)
+        store.upsert(iter(make_record(i) for i in range(40)))
+        record = make_record(7, title="Updated")
+        target = store.partition_path(store.partition_of(record))
+        before = {name: os.stat(os.path.join(self.root, name)).st_mtime_ns for name in os.listdir(self.root)}
+
+        with patch('utils.partitioned_store.json.load', side_effect=AssertionError("decoded old data")):
+            stats = store.upsert(iter([record]))
+
+        assert stats['partitions_rewritten'] == 1
+        for name, mtime in before.items():
+            path = os.path.join(self.root, name)
+            if path not in (target, index_path_for(target)):
+                assert os.stat(path).st_mtime_ns == mtime
+
+    def test_last_delta_record_wins(self):
+        """Test that duplicate keys within a delta collapse to the last record"""
+        store = PartitionedJsonStore(self.root, partitions=2)
+        stats = store.upsert(iter([make_record(1, title="First"), EnrichedRecord(make_record(1, title="Second"))]))
+
+        assert stats['inserted'] == 1
+        assert self.titles(store) == ["Second 1 – Zürich"]
+
+    def test_partitions_readable_as_directory(self):
+        """Test that the partitions can be read back with read_json"""
+        store = PartitionedJsonStore(self.root, partitions=4)
+        store.upsert(iter(make_record(i) for i in range(10)))
+
+        assert len(list(read_json(self.root))) == 10
+
+    def test_stale_index_rebuilt(self):
+        """Test that a partition whose index doesn't match its data is merged from the decoded data"""
+        store = PartitionedJsonStore(self.root, partitions=1)
+        store.upsert(iter(make_record(i) for i in range(3)))
+        os.remove(index_path_for(store.partition_path(store.partition_of(make_record(0)))))
+
+        stats = store.upsert(iter([make_record(1, title="Updated")]))
+
+        assert stats['updated'] == 1
+        assert len(store) == 3
+
+    def test_missing_index_rebuilt_on_lookup(self):
+        """Test that a lookup rebuilds an index lost after the data was replaced"""
+        store = PartitionedJsonStore(self.root, partitions=1)
+        store.upsert(iter(make_record(i) for i in range(3)))
+        os.remove(index_path_for(store.partition_path(store.partition_of(make_record(0)))))
+
+        assert make_record(2) in store
+        assert len(store) == 3
+
+    def test_partitions_follow_scrape_month(self):
+        """Test that a delta of newly scraped records leaves older months untouched"""
+        store = PartitionedJsonStore(self.root, partitions=2)
+        store.upsert(iter(make_record(i, date_scraped=f"15/{month:02d}/2025 10:00:00")
+                          for i in range(20) for month in (4, 5)))
+        before = {name: os.stat(os.path.join(self.root, name)).st_mtime_ns for name in os.listdir(self.root)}
+
+        stats = store.upsert(iter(make_record(i, date_scraped="2025-06-01T08:00:00") for i in range(10)))
+
+        assert stats['inserted'] == 10
+        assert all(name.startswith("2025-06-") for name in store.partition_names()[-2:])
+        for name, mtime in before.items():
+            assert os.stat(os.path.join(self.root, name)).st_mtime_ns == mtime
+        assert store.partition_of(make_record(1, date_scraped=None)).startswith("undated-")
+        assert len(store) == 50
+
+    def test_hash_only_store_kept(self):
+        """Test that a store created without partition_by keeps its hash partition files"""
+        os.makedirs(self.root)
+        with open(os.path.join(self.root, "_manifest"), 'w') as f:
+            json.dump({"partitions": 4, "key_fields": ["project_address", "date_scraped"]}, f)
+        store = PartitionedJsonStore(self.root)
+
+        store.upsert(iter(make_record(i) for i in range(10)))
+
+        assert store.partition_by is None
+        assert all(len(name) == 5 and name.isdigit() for name in store.partition_names())
+        assert len(store) == 10
+
+    def test_manifest_mismatch(self):
+        """Test that reopening a store with another layout fails"""
+        PartitionedJsonStore(self.root, partitions=4)
+
+        assert PartitionedJsonStore(self.root).partitions == 4
+        with pytest.raises(ValueError):
+            PartitionedJsonStore(self.root, partitions=8)
+        with pytest.raises(ValueError):
+            PartitionedJsonStore(self.root, key_fields=("project_address",))
+        with pytest.raises(ValueError):
+            PartitionedJsonStore(self.root, partition_by="date_published")
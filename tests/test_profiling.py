@@ -0,0 +1,83 @@
+import pytest
+import sys
+import os
+import pstats
+import tempfile
+import shutil
+import tracemalloc
+from unittest.mock import patch
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.profiling import profile_stage, profiling_enabled
+
+def busy_stage():
+    return [str(i) * 10 for i in range(20000)]
+
+class TestProfiling:
+
+    def setup_method(self):
+        """Set up temporary directory for tests"""
+        self.temp_dir = tempfile.mkdtemp()
+
+    def teardown_method(self):
+        """Clean up temporary directory"""
+        shutil.rmtree(self.temp_dir)
+
+    @patch.dict(os.environ, {}, clear=True)
+    def test_profiling_disabled_by_default(self):
+        """Test that profiling is off without the env var or param"""
+        assert profiling_enabled() is False
+        assert profiling_enabled({'profile': False}) is False
+        assert profiling_enabled({'profile': 'no'}) is False
+
+    @patch.dict(os.environ, {'ETL_PROFILE': 'true'})
+    def test_profiling_enabled_by_environment(self):
+        """Test enabling profiling with ETL_PROFILE"""
+        assert profiling_enabled() is True
+
+    @patch.dict(os.environ, {}, clear=True)
+    def test_profiling_enabled_by_param(self):
+        """Test enabling profiling with a run param"""
+        assert profiling_enabled({'profile': True}) is True
+        assert profiling_enabled({'profile': '1'}) is True
+
+    def test_profile_stage_writes_reports(self):
+        """Test that CPU and allocation reports are written for the stage"""
+        output_dir = os.path.join(self.temp_dir, 'profiles')
+
+        with profile_stage('transform', output_dir):
+            data = busy_stage()
+
+        assert len(data) == 20000
+        stats = pstats.Stats(os.path.join(output_dir, 'transform.prof'))
+        assert any(func[2] == 'busy_stage' for func in stats.stats)
+
+        with open(os.path.join(output_dir, 'transform.cpu.txt')) as f:
+            assert 'busy_stage' in f.read()
+        with open(os.path.join(output_dir, 'transform.alloc.txt')) as f:
+            report = f.read()
+        assert 'stage: transform' in report
+        assert 'traced_memory_peak_bytes' in report
+        assert 'test_profiling.py' in report
+        assert not tracemalloc.is_tracing()
+
+    def test_profile_stage_disabled(self):
+        """Test that a disabled profiler writes nothing"""
+        output_dir = os.path.join(self.temp_dir, 'profiles')
+
+        with profile_stage('load', output_dir, enabled=False):
+            busy_stage()
+
+        assert not os.path.exists(output_dir)
+
+    def test_profile_stage_reports_on_error(self):
+        """Test that reports are written even when the stage raises"""
+        output_dir = os.path.join(self.temp_dir, 'profiles')
+
+        with pytest.raises(RuntimeError):
+            with profile_stage('extract', output_dir):
+                raise RuntimeError("stage failed")
+
+        assert os.path.exists(os.path.join(output_dir, 'extract.prof'))
@@ -0,0 +1,221 @@
+import pytest
+import sys
+import os
+import json
+import tempfile
+import shutil
+import threading
+from unittest.mock import Mock, patch
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from integrations.quota_scheduler import (
+    DailyQuota, MeteredGeocoder, QuotaExceededError, QuotaScheduler, DeferredQueue, compile_priority
+)
+from integrations.geocode_cache import GeocodeCache
+from transformers.address_transformer import AddressTransformer
+from utils.metrics import PipelineMetrics
+
+RESULTS = [{'full_address': 'Bahnhofquai, City, Zurich', 'latitude': '47.3768866', 'longitude': '8.5418596'}]
+
+def make_record(address, date, media="Media A"):
+    return {"publication_media": media, "project_title": "Project", "date_scraped": date, "project_address": address}
+
+class TestDailyQuota:
+
+    def setup_method(self):
+        """Set up temporary directory for tests"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.state_path = os.path.join(self.temp_dir, "quota", "state.json")
+
+    def teardown_method(self):
+        """Clean up temporary directory"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_acquire_until_exhausted(self):
+        """Test that requests beyond the limit minus the reserve are refused"""
+        quota = DailyQuota(3, reserve=1)
+
+        assert [quota.acquire() for _ in range(3)] == [True, True, False]
+        assert quota.remaining() == 0
+
+    def test_usage_persisted(self):
+        """Test that a second quota on the same day continues from the saved usage"""
+        quota = DailyQuota(5, self.state_path)
+        quota.acquire()
+        quota.acquire()
+
+        assert DailyQuota(5, self.state_path).remaining() == 3
+
+    def test_shared_state_file(self):
+        """Test that quotas sharing a state file draw from one budget without losing updates"""
+        quotas = [DailyQuota(50, self.state_path) for _ in range(4)]
+        granted = []
+
+        def claim(quota):
+            granted.extend(result for result in (quota.acquire() for _ in range(20)) if result)
+
+        threads = [threading.Thread(target=claim, args=(quota,)) for quota in quotas]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(granted) == 50
+        assert all(quota.remaining() == 0 for quota in quotas)
+        with open(self.state_path) as f:
+            assert json.load(f)["used"] == 50
+
+    def test_resets_next_day(self):
+        """Test that usage from another day is ignored"""
+        with patch('integrations.quota_scheduler.time.time', return_value=1700000000.0):
+            quota = DailyQuota(2, self.state_path)
+            quota.acquire()
+            quota.acquire()
+            assert quota.remaining() == 0
+
+        with patch('integrations.quota_scheduler.time.time', return_value=1700000000.0 + 86400):
+            assert quota.remaining() == 2
+            assert DailyQuota(2, self.state_path).remaining() == 2
+
+    def test_invalid_reserve(self):
+        """Test that a reserve consuming the whole quota is rejected"""
+        with pytest.raises(ValueError, match="Quota reserve"):
+            DailyQuota(10, reserve=10)
+
+    @patch.dict(os.environ, {'LOCATIONIQ_DAILY_QUOTA': '', 'GEOCODE_QUOTA_STATE_PATH': ''})
+    def test_from_env_unset(self):
+        """Test that no quota is built without a configured limit"""
+        assert DailyQuota.from_env() is None
+
+    def test_metered_geocoder(self):
+        """Test that calls beyond the quota raise without reaching the geocoder"""
+        geocoder = Mock(return_value=RESULTS)
+        metrics = PipelineMetrics()
+        metered = MeteredGeocoder(geocoder, DailyQuota(1), metrics)
+
+        assert metered("Bahnhofquai 8") == RESULTS
+        with pytest.raises(QuotaExceededError, match="quota of 1 requests exhausted"):
+            metered("Via San Gottardo 39")
+        geocoder.assert_called_once()
+
+class TestPriority:
+
+    def test_recent_first(self):
+        """Test that the default rules put recently scraped records first"""
+        prioritize = compile_priority([{'field': 'date_scraped', 'format': '%d/%m/%Y %H:%M:%S'}])
+        records = [
+            make_record("A", "01/06/2025 10:00:00"),
+            make_record("B", "not a date"),
+            make_record("C", "15/06/2025 09:00:00"),
+            make_record("D", "02/06/2025 10:00:00")
+        ]
+
+        assert [r["project_address"] for r in prioritize(records)] == ["C", "D", "A", "B"]
+
+    def test_rules_combine(self):
+        """Test that earlier rules take precedence over later ones"""
+        prioritize = compile_priority([
+            {'field': 'publication_media', 'values': ['Media B']},
+            {'field': 'date_scraped', 'format': '%d/%m/%Y %H:%M:%S', 'order': 'asc'}
+        ])
+        records = [
+            make_record("A", "02/06/2025 10:00:00"),
+            make_record("B", "03/06/2025 10:00:00", media="Media B"),
+            make_record("C", "01/06/2025 10:00:00")
+        ]
+
+        assert [r["project_address"] for r in prioritize(records)] == ["B", "C", "A"]
+
+    def test_unknown_option(self):
+        """Test that malformed rules are rejected"""
+        with pytest.raises(ValueError, match="Unknown priority rule options"):
+            compile_priority([{'field': 'date_scraped', 'weight': 2}])
+
+class TestQuotaScheduler:
+
+    def setup_method(self):
+        """Set up temporary directory for tests"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.queue_path = os.path.join(self.temp_dir, "deferred", "etl.jsonl")
+
+    def teardown_method(self):
+        """Clean up temporary directory"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_plan(self):
+        """Test that free records always run and quota goes to the most recent uncached addresses"""
+        cache = GeocodeCache()
+        cache.put("Cached 1", RESULTS)
+        records = [
+            make_record("Old 1", "01/01/2025 10:00:00"),
+            make_record("Cached 1", "01/01/2025 10:00:00"),
+            make_record("New 1", "01/06/2025 10:00:00"),
+            make_record("", "01/01/2025 10:00:00"),
+            make_record("new  1", "02/01/2025 10:00:00"),
+            make_record("Mid 1", "01/03/2025 10:00:00")
+        ]
+
+        scheduled, deferred = QuotaScheduler(DailyQuota(2), cache).plan(records)
+
+        assert [r["project_address"] for r in scheduled] == ["Cached 1", "", "New 1", "Mid 1", "new  1"]
+        assert [r["project_address"] for r in deferred] == ["Old 1"]
+
+    @patch('transformers.address_transformer.get_structured_address')
+    def test_run_defers_overflow(self, mock_geocode):
+        """Test that overflow is queued and picked up by the next run"""
+        mock_geocode.return_value = RESULTS
+        records = [
+            make_record("Old 1", "01/01/2025 10:00:00"),
+            make_record("New 1", "01/06/2025 10:00:00")
+        ]
+        metrics = PipelineMetrics()
+        cache = GeocodeCache()
+        queue = DeferredQueue(self.queue_path)
+
+        quota = DailyQuota(1)
+        transformer = AddressTransformer(metrics=metrics, cache=cache, quota=quota)
+        enriched = QuotaScheduler(quota, cache, queue=queue, metrics=metrics).run(transformer, records)
+
+        assert [r["project_address"] for r in enriched] == ["New 1"]
+        assert queue.load() == [records[0]]
+        assert metrics.counter_value('records_deferred_total', stage='transform') == 1
+
+        quota = DailyQuota(1)
+        transformer = AddressTransformer(cache=cache, quota=quota)
+        enriched = QuotaScheduler(quota, cache, queue=queue).run(transformer, records)
+
+        assert sorted(r["project_address"] for r in enriched) == ["New 1", "Old 1"]
+        assert queue.load() == []
+        assert mock_geocode.call_count == 2
+
+    @patch('transformers.address_transformer.get_structured_address')
+    def test_quota_exhausted_mid_run(self, mock_geocode):
+        """Test that records refused by the quota during the run are deferred, not failed"""
+        mock_geocode.return_value = RESULTS
+        quota = DailyQuota(2)
+        records = [make_record("A 1", "01/06/2025 10:00:00"), make_record("B 2", "01/05/2025 10:00:00")]
+        scheduler = QuotaScheduler(quota, queue=DeferredQueue(self.queue_path))
+        # Another consumer uses part of the budget after planning
+        transformer = AddressTransformer(quota=quota)
+        transformer.geocoder = Mock(side_effect=lambda address, budget=None: quota.acquire() and RESULTS)
+
+        enriched = scheduler.run(transformer, records)
+
+        assert [r["project_address"] for r in enriched] == ["A 1"]
+        assert [r["project_address"] for r in scheduler.queue.load()] == ["B 2"]
+
+    @patch('transformers.address_transformer.get_structured_address')
+    def test_transformer_status(self, mock_geocode):
+        """Test that the transformer marks records over quota without calling the API"""
+        mock_geocode.return_value = RESULTS
+        transformer = AddressTransformer(quota=DailyQuota(1))
+
+        results = list(transformer.transform(iter([{"project_address": "A 1"}, {"project_address": "B 2"}])))
+
+        assert [r["geocoding_status"] for r in results] == ["success", "quota_exceeded"]
+        assert "quota" in results[1]["geocoding_error"]
+        assert mock_geocode.call_count == 1
+        # Failover and hedged requests the router sends draw on the same quota
+        assert mock_geocode.call_args.kwargs["budget"] == transformer.quota.acquire
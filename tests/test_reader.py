@@ -9,6 +9,8 @@ import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
 
 from utils.reader import read_json
+from utils.schema import compile_schema, INPUT_RECORD_SCHEMA
+from utils.dead_letter import DeadLetterWriter
 
 class TestReader:
     
@@ -161,4 +163,78 @@ class TestReader:
         assert records[0]["publication_media"] == "Neue Zürcher Zeitung"
         assert records[0]["project_address"] == "Bahnhofquai 8"
         assert records[1]["publication_media"] == "Tages-Anzeiger"
-        assert records[1]["project_address"] == "Via San Gottardo 39"
\ No newline at end of file
+        assert records[1]["project_address"] == "Via San Gottardo 39"
+    
+    def _read_dead_letter(self, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+    
+    def test_read_json_routes_invalid_records_to_dead_letter(self):
+        """Test that invalid records go to the dead-letter file instead of failing the run"""
+        valid = {
+            "publication_media": "Neue Zürcher Zeitung",
+            "project_title": "Neubau eines Spielplatzes",
+            "date_scraped": "15/03/2024 14:23:45",
+            "project_address": "Bahnhofquai 8"
+        }
+        test_data = [valid, "invalid_record", dict(valid, date_scraped="yesterday"), valid]
+        
+        file_path = os.path.join(self.temp_dir, "test.json")
+        with open(file_path, 'w') as f:
+            json.dump(test_data, f)
+        
+        dead_letter_path = os.path.join(self.temp_dir, "dead_letter", "rejected.jsonl")
+        with DeadLetterWriter(dead_letter_path) as dead_letter:
+            records = list(read_json(file_path, compile_schema(INPUT_RECORD_SCHEMA), dead_letter))
+        
+        assert records == [valid, valid]
+        assert dead_letter.count == 2
+        
+        entries = self._read_dead_letter(dead_letter_path)
+        assert entries[0]["source"] == file_path
+        assert entries[0]["index"] == 1
+        assert entries[0]["record"] == "invalid_record"
+        assert entries[0]["reasons"] == ["Expected dict record, got <class 'str'>"]
+        assert entries[1]["index"] == 2
+        assert "date_scraped" in entries[1]["reasons"][0]
+    
+    def test_read_json_validator_without_dead_letter(self):
+        """Test that invalid records raise when no dead-letter sink is configured"""
+        file_path = os.path.join(self.temp_dir, "test.json")
+        with open(file_path, 'w') as f:
+            json.dump([{"project_address": "Bahnhofquai 8"}], f)
+        
+        with pytest.raises(ValueError, match="Invalid record at index 0"):
+            list(read_json(file_path, compile_schema(INPUT_RECORD_SCHEMA)))
+    
+    def test_read_json_dead_letters_invalid_files(self):
+        """Test that malformed files are dead-lettered and the remaining files are still read"""
+        with open(os.path.join(self.temp_dir, "a_invalid.json"), 'w') as f:
+            f.write("{ invalid json }")
+        with open(os.path.join(self.temp_dir, "b_primitive.json"), 'w') as f:
+            json.dump("just a string", f)
+        with open(os.path.join(self.temp_dir, "c_valid.json"), 'w') as f:
+            json.dump([{"id": 1}], f)
+        
+        dead_letter_path = os.path.join(self.temp_dir, "rejected.jsonl")
+        with DeadLetterWriter(dead_letter_path) as dead_letter:
+            records = list(read_json(self.temp_dir, dead_letter=dead_letter))
+        
+        assert records == [{"id": 1}]
+        entries = self._read_dead_letter(dead_letter_path)
+        assert entries[0]["reasons"][0].startswith("Invalid JSON")
+        assert entries[0]["record"] is None
+        assert entries[1]["record"] == "just a string"
+    
+    def test_dead_letter_file_created_lazily(self):
+        """Test that no dead-letter file is created when all records are valid"""
+        file_path = os.path.join(self.temp_dir, "test.json")
+        with open(file_path, 'w') as f:
+            json.dump([{"id": 1}], f)
+        
+        dead_letter_path = os.path.join(self.temp_dir, "rejected.jsonl")
+        with DeadLetterWriter(dead_letter_path) as dead_letter:
+            list(read_json(file_path, dead_letter=dead_letter))
+        
+        assert dead_letter.count == 0
+        assert not os.path.exists(dead_letter_path)
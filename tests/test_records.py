@@ -0,0 +1,89 @@
+import pytest
+import sys
+import os
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.records import EnrichedRecord
+
+class TestEnrichedRecord:
+
+    def setup_method(self):
+        """Set up a sample source record and candidates"""
+        self.source = {
+            "publication_media": "Neue Zürcher Zeitung",
+            "date_scraped": "15/03/2024 14:23:45",
+            "project_address": "Bahnhofquai 8"
+        }
+        self.candidates = [
+            {
+                'full_address': 'Bahnhofquai, City, Altstadt, Zurich, District Zurich, Zurich, 8001, Switzerland',
+                'latitude': '47.3768866',
+                'longitude': '8.5418596'
+            },
+            {
+                'full_address': 'Bahnhofquai, Olten, Bezirk Olten, Amtei Olten-Gösgen, Solothurn, 4601, Switzerland',
+                'latitude': '47.350107',
+                'longitude': '7.9061458'
+            }
+        ]
+
+    def test_from_candidates(self):
+        """Test building a compact record from candidates"""
+        record = EnrichedRecord.from_candidates(self.source, self.candidates)
+
+        assert len(record) == 2
+        assert record.source is self.source
+        assert record.full_address == self.candidates[0]['full_address']
+        assert record.latitude == pytest.approx(47.3768866)
+        assert record.longitude == pytest.approx(8.5418596)
+        assert not hasattr(record, '__dict__')
+
+    def test_to_dict_round_trip(self):
+        """Test that to_dict produces the enriched dict format"""
+        result = EnrichedRecord.from_candidates(self.source, self.candidates).to_dict()
+
+        assert result["project_address"] == "Bahnhofquai 8"
+        assert result["geocoded_addresses"] == self.candidates
+        assert result["full_address"] == self.candidates[0]['full_address']
+        assert result["latitude"] == "47.3768866"
+        assert result["longitude"] == "8.5418596"
+        assert result["geocoding_status"] == "success"
+        assert "geocoding_error" not in result
+        assert "geocoded_addresses" not in self.source
+
+    def test_addresses_are_interned(self):
+        """Test that repeated display names share a single string"""
+        first = EnrichedRecord.from_candidates(self.source, [dict(self.candidates[0])])
+        full_address = self.candidates[0]['full_address']
+        address = full_address[:10] + full_address[10:]
+        assert address is not full_address
+        second = EnrichedRecord.from_candidates(self.source, [dict(self.candidates[0], full_address=address)])
+
+        assert first.addresses[0] is second.addresses[0]
+
+    def test_failed_record(self):
+        """Test conversion of a failed record"""
+        result = EnrichedRecord(self.source, status='failed', error='No results found').to_dict()
+
+        assert result["geocoded_addresses"] == []
+        assert result["full_address"] == "Bahnhofquai 8"
+        assert result["latitude"] == ""
+        assert result["longitude"] == ""
+        assert result["geocoding_status"] == "failed"
+        assert result["geocoding_error"] == "No results found"
+
+    def test_no_address_record(self):
+        """Test conversion of a record without an address"""
+        record = EnrichedRecord({"publication_media": "Test Media"}, status='no_address')
+
+        assert record.latitude is None
+        result = record.to_dict()
+        assert result["full_address"] == ""
+        assert result["geocoding_status"] == "no_address"
+
+    def test_invalid_coordinates(self):
+        """Test that non-numeric coordinates are rejected"""
+        with pytest.raises(ValueError):
+            EnrichedRecord.from_candidates(self.source, [{'full_address': 'X', 'latitude': 'abc', 'longitude': '1'}])
@@ -0,0 +1,74 @@
+import pytest
+import sys
+import os
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.schema import compile_schema, INPUT_RECORD_SCHEMA
+
+VALID_RECORD = {
+    "publication_media": "Neue Zürcher Zeitung",
+    "project_title": "Neubau eines Spielplatzes",
+    "date_scraped": "15/03/2024 14:23:45",
+    "project_address": "Bahnhofquai 8"
+}
+
+class TestSchema:
+
+    def setup_method(self):
+        """Compile the input schema once per test"""
+        self.validate = compile_schema(INPUT_RECORD_SCHEMA)
+
+    def test_valid_record(self):
+        """Test that a record in the sample input format is valid"""
+        assert self.validate(VALID_RECORD) == []
+        assert self.validate(dict(VALID_RECORD, project_address=None)) == []
+        assert self.validate({k: v for k, v in VALID_RECORD.items() if k != 'project_address'}) == []
+
+    def test_missing_required_fields(self):
+        """Test that missing required fields are reported"""
+        reasons = self.validate({"project_address": "Bahnhofquai 8"})
+
+        assert "Missing required field 'publication_media'" in reasons
+        assert "Missing required field 'project_title'" in reasons
+        assert "Missing required field 'date_scraped'" in reasons
+
+    def test_wrong_types(self):
+        """Test that values of the wrong type are reported"""
+        reasons = self.validate(dict(VALID_RECORD, project_title=42, publication_media=None))
+
+        assert "Field 'project_title' must be of type str, got int" in reasons
+        assert "Field 'publication_media' must not be null" in reasons
+
+    def test_date_format(self):
+        """Test date_scraped format and calendar validation"""
+        assert self.validate(dict(VALID_RECORD, date_scraped="2024-03-15 14:23:45"))
+        assert self.validate(dict(VALID_RECORD, date_scraped="31/02/2024 14:23:45"))
+        assert self.validate(dict(VALID_RECORD, date_scraped="15/03/2024 25:00:00"))
+        assert self.validate(dict(VALID_RECORD, date_scraped="1/3/2024 4:03:05")) == []
+
+    def test_non_dict_record(self):
+        """Test that non-dict records are rejected"""
+        assert self.validate("invalid_string_record") == ["Expected dict record, got <class 'str'>"]
+
+    def test_strptime_fallback_format(self):
+        """Test formats outside the fast path"""
+        validate = compile_schema({'day': {'type': str, 'format': '%a %d %b %Y'}})
+
+        assert validate({'day': 'Fri 15 Mar 2024'}) == []
+        assert validate({'day': '15/03/2024'})
+
+    def test_numeric_types_reject_bool(self):
+        """Test that booleans don't pass as integers"""
+        validate = compile_schema({'count': {'type': int, 'required': True}})
+
+        assert validate({'count': 3}) == []
+        assert validate({'count': True}) == ["Field 'count' must be of type int, got bool"]
+
+    def test_invalid_schema(self):
+        """Test that malformed schemas are rejected at compile time"""
+        with pytest.raises(ValueError, match="Unknown schema options"):
+            compile_schema({'a': {'type': str, 'pattern': '.*'}})
+        with pytest.raises(ValueError, match="has a format but is not a string field"):
+            compile_schema({'a': {'type': int, 'format': '%Y'}})
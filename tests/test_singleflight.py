@@ -0,0 +1,108 @@
+import pytest
+import sys
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from integrations.singleflight import SingleFlight, CoalescingGeocoder
+from integrations.geocode_util import GeocodingError
+from utils.metrics import PipelineMetrics
+
+RESULTS = [{'full_address': 'Bahnhofquai, City, Zurich', 'latitude': '47.3768866', 'longitude': '8.5418596'}]
+
+class SlowGeocoder:
+    """Geocoder that blocks until released so concurrent callers overlap"""
+
+    def __init__(self, result=RESULTS, error=None):
+        self.result = result
+        self.error = error
+        self.calls = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, address):
+        self.calls.append(address)
+        self.started.set()
+        self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+def wait_for_waiters(flight, key, count, timeout=5):
+    """Wait until count callers are queued behind the in-flight call for key"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        with flight._lock:
+            call = flight._calls.get(key)
+            if call is not None and call.waiters >= count:
+                return
+        time.sleep(0.01)
+
+def run_concurrently(fn, args, workers):
+    executor = ThreadPoolExecutor(max_workers=workers)
+    futures = [executor.submit(fn, arg) for arg in args]
+    executor.shutdown(wait=False)
+    return futures
+
+class TestSingleFlight:
+
+    def test_single_caller(self):
+        """Test that an uncontended call runs the function and isn't marked shared"""
+        flight = SingleFlight()
+
+        assert flight.do("key", lambda: 42) == (42, False)
+        assert flight.in_flight() == 0
+
+    def test_sequential_calls_rerun(self):
+        """Test that finished calls are forgotten"""
+        flight = SingleFlight()
+        calls = []
+
+        flight.do("key", lambda: calls.append(1))
+        flight.do("key", lambda: calls.append(1))
+
+        assert len(calls) == 2
+
+    def test_concurrent_calls_coalesce(self):
+        """Test that concurrent callers for one address share one lookup"""
+        geocoder = SlowGeocoder()
+        metrics = PipelineMetrics()
+        coalescing = CoalescingGeocoder(geocoder, metrics)
+
+        futures = run_concurrently(coalescing, ["Bahnhofquai 8", " bahnhofquai 8", "BAHNHOFQUAI  8", "Bahnhofquai 8"], 4)
+        geocoder.started.wait(5)
+        wait_for_waiters(coalescing._flight, "bahnhofquai 8", 3)
+        geocoder.release.set()
+
+        assert all(future.result() == RESULTS for future in futures)
+        assert len(geocoder.calls) == 1
+        assert metrics.counter_value('geocode_coalesced_total') == 3
+
+    def test_errors_propagate_to_all_waiters(self):
+        """Test that every waiting caller receives the leader's error"""
+        geocoder = SlowGeocoder(error=GeocodingError("API request failed"))
+        coalescing = CoalescingGeocoder(geocoder)
+
+        futures = run_concurrently(coalescing, ["Bahnhofquai 8"] * 3, 3)
+        geocoder.started.wait(5)
+        wait_for_waiters(coalescing._flight, "bahnhofquai 8", 2)
+        geocoder.release.set()
+
+        for future in futures:
+            with pytest.raises(GeocodingError, match="API request failed"):
+                future.result()
+        assert coalescing._flight.in_flight() == 0
+
+    def test_different_addresses_run_in_parallel(self):
+        """Test that distinct addresses are not coalesced"""
+        calls = []
+        coalescing = CoalescingGeocoder(lambda address: calls.append(address) or RESULTS)
+
+        futures = run_concurrently(coalescing, ["A 1", "B 2", "C 3"], 3)
+
+        assert [future.result() for future in futures] == [RESULTS] * 3
+        assert sorted(calls) == ["A 1", "B 2", "C 3"]
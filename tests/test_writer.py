@@ -8,7 +8,8 @@ import sys
 # Add src directory to path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from utils.writer import write_json
+from utils.writer import write_json, write_parquet
+from utils.records import EnrichedRecord
 
 class TestWriter:
     
@@ -95,6 +96,22 @@ class TestWriter:
         with pytest.raises(ValueError, match="Expected dict record"):
             write_json(iter(test_data), file_path)
     
+    def test_write_json_failure_keeps_previous_output(self):
+        """Test that a write failing midway leaves the previous file intact"""
+        file_path = os.path.join(self.temp_dir, "output.json")
+        write_json(iter([{"run": 1}]), file_path)
+        
+        def failing_records():
+            yield {"run": 2}
+            raise RuntimeError("upstream failed")
+        
+        with pytest.raises(ValueError):
+            write_json(failing_records(), file_path)
+        
+        with open(file_path, 'r') as f:
+            assert json.load(f) == [{"run": 1}]
+        assert os.listdir(self.temp_dir) == ["output.json"]
+    
     def test_write_json_with_unicode(self):
         """Test writing JSON with Unicode characters"""
         test_data = [
@@ -142,6 +159,22 @@ class TestWriter:
         assert record["longitude"] == "8.5417"
         assert record["geocoding_status"] == "success"
     
+    def test_write_json_compact_records(self):
+        """Test that compact records are converted to dicts when written"""
+        source = {"publication_media": "Test Media", "project_address": "Bahnhofquai 8"}
+        candidates = [{'full_address': 'Bahnhofquai 8, Zürich', 'latitude': '47.3769', 'longitude': '8.5417'}]
+        records = [EnrichedRecord.from_candidates(source, candidates), {"plain": "dict"}]
+        
+        file_path = os.path.join(self.temp_dir, "compact.json")
+        write_json(iter(records), file_path)
+        
+        with open(file_path, 'r', encoding='utf-8') as f:
+            written_data = json.load(f)
+        
+        assert written_data[0]["geocoded_addresses"] == candidates
+        assert written_data[0]["latitude"] == "47.3769"
+        assert written_data[1] == {"plain": "dict"}
+    
     def test_write_json_permission_error(self):
         """Test handling of permission errors"""
         # Create a read-only file to simulate a permission error
@@ -159,4 +192,122 @@ class TestWriter:
                 write_json(iter(test_data), file_path)
         finally:
             # Restore permissions for cleanup
-            os.chmod(file_path, 0o666)
\ No newline at end of file
+            os.chmod(file_path, 0o666)
+    
+    def _enriched_records(self, count):
+        return [
+            {
+                "publication_media": "Neue Zürcher Zeitung",
+                "project_title": f"Project {i}",
+                "date_scraped": "15/03/2024 14:23:45",
+                "project_address": "Bahnhofquai 8",
+                "geocoded_addresses": [
+                    {"full_address": "Bahnhofquai, City, Zurich", "latitude": "47.3768866", "longitude": "8.5418596"},
+                    {"full_address": "Bahnhofquai, Olten", "latitude": "47.350107", "longitude": "7.9061458"}
+                ],
+                "full_address": "Bahnhofquai, City, Zurich",
+                "latitude": "47.3768866",
+                "longitude": "8.5418596",
+                "geocoding_status": "success"
+            }
+            for i in range(count)
+        ]
+    
+    def test_write_parquet_enriched_format(self):
+        """Test writing enriched records to Parquet with typed columns"""
+        pq = pytest.importorskip("pyarrow.parquet")
+        records = self._enriched_records(3)
+        records.append({
+            "publication_media": "Test Media",
+            "project_address": "",
+            "geocoded_addresses": [],
+            "full_address": "",
+            "latitude": "",
+            "longitude": "",
+            "geocoding_status": "no_address"
+        })
+        
+        file_path = os.path.join(self.temp_dir, "nested", "enriched.parquet")
+        write_parquet(iter(records), file_path, row_group_size=2, compression='zstd')
+        
+        parquet_file = pq.ParquetFile(file_path)
+        assert parquet_file.metadata.num_rows == 4
+        assert parquet_file.metadata.num_row_groups == 2
+        
+        table = pq.read_table(file_path, columns=["project_title", "latitude"])
+        assert table.column_names == ["project_title", "latitude"]
+        assert table.column("latitude").to_pylist() == [47.3768866, 47.3768866, 47.3768866, None]
+        
+        rows = pq.read_table(file_path).to_pylist()
+        assert rows[0]["geocoded_addresses"][1] == {
+            "full_address": "Bahnhofquai, Olten", "latitude": 47.350107, "longitude": 7.9061458
+        }
+        assert rows[3]["project_title"] is None
+        assert rows[3]["geocoded_addresses"] == []
+    
+    def test_write_parquet_compact_records(self):
+        """Test writing compact records to Parquet"""
+        pq = pytest.importorskip("pyarrow.parquet")
+        source = {"publication_media": "Test Media", "project_address": "Bahnhofquai 8"}
+        candidates = [{'full_address': 'Bahnhofquai 8, Zürich', 'latitude': '47.3769', 'longitude': '8.5417'}]
+        
+        file_path = os.path.join(self.temp_dir, "compact.parquet")
+        write_parquet(iter([EnrichedRecord.from_candidates(source, candidates)]), file_path)
+        
+        rows = pq.read_table(file_path).to_pylist()
+        assert rows[0]["full_address"] == "Bahnhofquai 8, Zürich"
+        assert rows[0]["longitude"] == 8.5417
+    
+    def test_write_parquet_empty_iterator(self):
+        """Test writing an empty iterator to Parquet"""
+        pq = pytest.importorskip("pyarrow.parquet")
+        file_path = os.path.join(self.temp_dir, "empty.parquet")
+        write_parquet(iter([]), file_path)
+        
+        assert pq.read_table(file_path).num_rows == 0
+    
+    def test_write_parquet_smaller_than_json(self):
+        """Test that Parquet output is smaller than the JSON output"""
+        pytest.importorskip("pyarrow.parquet")
+        records = self._enriched_records(1000)
+        json_path = os.path.join(self.temp_dir, "enriched.json")
+        parquet_path = os.path.join(self.temp_dir, "enriched.parquet")
+        
+        write_json(iter(records), json_path)
+        write_parquet(iter(records), parquet_path)
+        
+        assert os.path.getsize(parquet_path) * 3 < os.path.getsize(json_path)
+    
+    def test_write_parquet_failure_keeps_previous_output(self):
+        """Test that a Parquet write failing after some row groups leaves the previous file intact"""
+        pq = pytest.importorskip("pyarrow.parquet")
+        file_path = os.path.join(self.temp_dir, "enriched.parquet")
+        write_parquet(iter(self._enriched_records(10)), file_path)
+        
+        def failing_records():
+            yield from self._enriched_records(4)
+            raise RuntimeError("upstream failed")
+        
+        with pytest.raises(ValueError, match="Unexpected error writing Parquet: upstream failed"):
+            write_parquet(failing_records(), file_path, row_group_size=2)
+        
+        assert pq.read_table(file_path).num_rows == 10
+        assert os.listdir(self.temp_dir) == ["enriched.parquet"]
+    
+    def test_write_parquet_new_field_in_later_row_group(self):
+        """Test that fields missing from the first row group are rejected"""
+        pytest.importorskip("pyarrow.parquet")
+        records = [{"a": "1"}, {"a": "2", "b": "3"}]
+        
+        with pytest.raises(ValueError, match="Fields not present in the first row group"):
+            write_parquet(iter(records), os.path.join(self.temp_dir, "x.parquet"), row_group_size=1)
+    
+    def test_write_parquet_invalid_arguments(self):
+        """Test Parquet argument validation"""
+        pytest.importorskip("pyarrow.parquet")
+        with pytest.raises(ValueError, match="Path cannot be empty"):
+            write_parquet(iter([]), "")
+        with pytest.raises(ValueError, match="row_group_size must be a positive integer"):
+            write_parquet(iter([]), os.path.join(self.temp_dir, "x.parquet"), row_group_size=0)
+        with pytest.raises(ValueError, match="Expected dict record"):
+            write_parquet(iter(["invalid"]), os.path.join(self.temp_dir, "x.parquet"))